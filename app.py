@@ -16,15 +16,27 @@ Features:
 """
 
 import os
+import posixpath
 import sys
 import io
 import json
+import re
 import sqlite3
 import random
 import string
 import csv
+import base64
+import binascii
+import hashlib
 import shutil
-from datetime import datetime, timedelta
+import tempfile
+import queue
+import threading
+import time
+import weakref
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
 from functools import wraps
 
 import smtplib
@@ -36,7 +48,7 @@ from werkzeug.utils import secure_filename
 
 from flask import (
     Flask, render_template, request, jsonify, send_file,
-    redirect, url_for, flash, session, send_from_directory
+    redirect, url_for, flash, session, send_from_directory, stream_with_context, g
 )
 from flask_login import (
     LoginManager, UserMixin, login_user, login_required,
@@ -62,6 +74,12 @@ try:
 except ImportError:
     REPORTLAB_AVAILABLE = False
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 
 # =====================================================================
 # APPLICATION INITIALIZATION
@@ -70,10 +88,12 @@ except ImportError:
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'vesselOS-secure-key-2026-v2')
 app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 100MB max file size
-app.config['ALLOWED_EXTENSIONS'] = {
+app.config['MAX_ATTACHMENT_BYTES'] = 25 * 1024 * 1024  # 25MB per maintenance attachment
+app.config['ALLOWED_EXTENSIONS'] = frozenset({
     'png', 'jpg', 'jpeg', 'gif', 'pdf',
     'doc', 'docx', 'xls', 'xlsx', 'csv', 'txt', 'zip', 'rar'
-}
+})
+IMAGE_EXTENSIONS = frozenset({'png', 'jpg', 'jpeg', 'gif'})
 
 # Configure session security
 app.config['SESSION_COOKIE_SECURE'] = False  # Set to True in production with HTTPS
@@ -87,7 +107,13 @@ limiter = Limiter(
     default_limits=["5000 per day", "500 per hour"],
 )
 
-# Enable gzip compression for faster page loads
+# Enable brotli/gzip compression for faster page loads. JSON list payloads
+# repeat the same keys per row and shrink several-fold; tiny bodies are
+# left alone since compressing them costs more than it saves.
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_MIN_SIZE'] = 500
+# Compressing a streamed body would buffer all of it first, defeating the stream
+app.config['COMPRESS_STREAMS'] = False
 Compress(app)
 
 
@@ -110,6 +136,7 @@ else:
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['DATABASE'] = DB_PATH
+app.config['HAS_SERVICE_EVALUATIONS'] = False  # Resolved by init_db()
 
 # Ensure database directory exists
 DB_DIR = os.path.dirname(DB_PATH) or '.'
@@ -251,19 +278,336 @@ def inject_current_user_profile():
 
 # ==================== DATABASE UTILITIES ====================
 
-def get_db_connection():
+# journal_mode=WAL is persistent in the database file, so it only needs to be
+# switched once per database file and process rather than on every connection
+_wal_databases = set()
+
+# INSERT ... RETURNING needs SQLite 3.35+; older libraries fall back to lastrowid
+SQLITE_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+RETURNING_ID = ' RETURNING id' if SQLITE_HAS_RETURNING else ''
+
+# Idle connections are shared by every thread of the process so a request
+# reuses a warm connection (page cache, parsed schema, pragmas) instead of
+# reconnecting, even when the server starts a new thread per request. The
+# queue is LIFO so the most recently used, hottest connection goes out first.
+# A connection is only ever used by the thread that checked it out.
+# Read-only handlers draw from a separate pool of query_only connections, so
+# they never queue behind the write lock and cannot take it by accident.
+DB_POOL_SIZE = 8
+# Prepared statements kept per connection; pooled connections live long
+# enough to see every endpoint's SQL, more than the default 128 slots hold
+DB_STATEMENT_CACHE_SIZE = 256
+_db_pools = {False: queue.LifoQueue(maxsize=DB_POOL_SIZE), True: queue.LifoQueue(maxsize=DB_POOL_SIZE)}
+_db_pool_pid = os.getpid()
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    sqlite3 connection whose close() returns it to the process-wide pool.
+    
+    On release, cursors that are still open are closed (an unfinished SELECT
+    would otherwise pin its WAL read snapshot) and any uncommitted transaction
+    is rolled back, so the next checkout starts from the same clean state as
+    a fresh connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cursors = weakref.WeakSet()
+        self._idle = False
+        self.readonly = False
+        self.database_path = args[0] if args else kwargs.get('database')
+
+    def cursor(self, *args, **kwargs):
+        cur = super().cursor(*args, **kwargs)
+        self._cursors.add(cur)
+        return cur
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def close(self):
+        if self._idle:
+            return
+        try:
+            for cur in list(self._cursors):
+                cur.close()
+            self._cursors.clear()
+            if self.in_transaction:
+                self.rollback()
+            self.row_factory = sqlite3.Row
+        except sqlite3.Error:
+            super().close()
+            return
+        if os.getpid() != _db_pool_pid:
+            super().close()
+            return
+        self._idle = True
+        try:
+            _db_pools[self.readonly].put_nowait(self)
+        except queue.Full:
+            self._idle = False
+            super().close()
+
+
+def get_db_connection(readonly=False):
     """
     Establish and configure a database connection.
 
+    Connections come from a small process-wide pool; calling close() on them
+    returns them to the pool rather than closing the underlying handle.
+
+    Args:
+        readonly (bool): Take a connection from the read-only pool. Any write
+                         attempted through it fails with
+                         "attempt to write a readonly database".
+
     Returns:
         sqlite3.Connection: Database connection with row factory and safety features enabled.
     """
-    conn = sqlite3.connect(app.config['DATABASE'], timeout=20)
+    global _db_pools, _db_pool_pid
+    if os.getpid() != _db_pool_pid:
+        # Forked worker: connections opened by the parent must not be shared
+        _db_pools = {False: queue.LifoQueue(maxsize=DB_POOL_SIZE), True: queue.LifoQueue(maxsize=DB_POOL_SIZE)}
+        _db_pool_pid = os.getpid()
+    pool = _db_pools[readonly]
+    while True:
+        try:
+            conn = pool.get_nowait()
+        except queue.Empty:
+            break
+        if conn.database_path == app.config['DATABASE']:
+            conn._idle = False
+            return conn
+        sqlite3.Connection.close(conn)
+
+    database = app.config['DATABASE']
+    conn = sqlite3.connect(database, timeout=20, check_same_thread=False,
+                           factory=PooledConnection, cached_statements=DB_STATEMENT_CACHE_SIZE)
     conn.row_factory = sqlite3.Row
-    conn.execute('PRAGMA journal_mode=WAL')  # Better concurrency
-    conn.execute('PRAGMA foreign_keys=ON')   # Enforce referential integrity
+    if database not in _wal_databases:
+        # In-memory databases have no WAL; asking would just report 'memory'
+        if database != ':memory:':
+            conn.execute('PRAGMA journal_mode=WAL')  # Readers don't block the writer
+        _wal_databases.add(database)
+    conn.execute('PRAGMA synchronous=NORMAL')    # WAL stays consistent; fsync at checkpoints only
+    conn.execute('PRAGMA temp_store=MEMORY')     # Sorts and temp indexes off disk
+    conn.execute('PRAGMA mmap_size=268435456')   # Read pages through a 256 MiB memory map
+    conn.execute('PRAGMA cache_size=-16384')     # 16 MiB page cache per connection
+    conn.execute('PRAGMA foreign_keys=ON')       # Enforce referential integrity
+    if readonly:
+        conn.execute('PRAGMA query_only=ON')
+        conn.readonly = True
     return conn
 
+def get_request_db():
+    """
+    Pooled connection shared by everything in the current request.
+
+    Checked out on first use and handed back to the pool by
+    close_request_db() when the app context ends, so views using it need no
+    try/finally of their own. A transaction the view left open is rolled
+    back on release, as with any pooled close().
+
+    Returns:
+        sqlite3.Connection: Writable pooled connection
+    """
+    if 'db' not in g:
+        g.db = get_db_connection()
+    return g.db
+
+@app.teardown_appcontext
+def close_request_db(exc):
+    """Return the request's connection, if one was taken, to the pool."""
+    conn = g.pop('db', None)
+    if conn is not None:
+        conn.close()
+
+def close_db_pools():
+    """
+    Close every pooled connection, refreshing planner statistics first.
+
+    Registered to run at exit. Each write connection runs PRAGMA optimize,
+    which re-analyzes only the tables its own queries showed to have stale
+    or missing sqlite_stat1 rows; analysis_limit keeps that to a sample of
+    each index. Read-only connections cannot write the statistics.
+    """
+    for readonly, pool in _db_pools.items():
+        while True:
+            try:
+                conn = pool.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                if not readonly and os.getpid() == _db_pool_pid:
+                    conn.execute('PRAGMA analysis_limit=400')
+                    conn.execute('PRAGMA optimize')
+            except sqlite3.Error as e:
+                app.logger.error("PRAGMA optimize failed: %s", e)
+            finally:
+                sqlite3.Connection.close(conn)
+
+atexit.register(close_db_pools)
+
+def begin_immediate(conn):
+    """
+    Open a write transaction on ``conn`` before its first read.
+
+    sqlite3 only issues a deferred BEGIN at the first write, so a handler that
+    reads a row and then updates it can fail with "database is locked" when
+    another writer commits in between, without waiting on the busy timeout.
+    Taking the write lock up front queues it behind other writers instead and
+    keeps the value read current until commit.
+    """
+    conn.execute('BEGIN IMMEDIATE')
+
+# Serialized once and returned verbatim for every failed db_endpoint call
+DB_ERROR_BODY = json.dumps({'success': False, 'error': 'Database error'})
+
+def db_endpoint(f):
+    """
+    Decorator translating unexpected failures of a JSON endpoint into the
+    standard database error response.
+    
+    The wrapped view only needs try/finally to release its connection. Any
+    exception is logged once with its traceback and answered with a
+    pre-serialized 500 payload, so internal error text never reaches the client.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        try:
+            return f(*args, **kwargs)
+        except Exception:
+            app.logger.exception(f"Unhandled error in {f.__name__}")
+            return app.response_class(DB_ERROR_BODY, status=500, mimetype='application/json')
+    return decorated_function
+
+# ==================== RESPONSE CACHING ====================
+
+class TTLCache:
+    """
+    Minimal thread-safe key/value cache whose entries expire after ``ttl`` seconds.
+
+    Used for short-lived caching of dashboard payloads that are polled by every
+    open browser tab but only change at seconds-to-minutes granularity.
+    """
+
+    def __init__(self, maxsize=2048, ttl=10):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            now = time.monotonic()
+            if key not in self._data and len(self._data) >= self.maxsize:
+                # Drop expired entries first, then the oldest insertions
+                for stale_key in [k for k, (exp, _) in self._data.items() if exp <= now]:
+                    del self._data[stale_key]
+                while len(self._data) >= self.maxsize:
+                    del self._data[next(iter(self._data))]
+            self._data[key] = (now + self.ttl, value)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[1]
+
+    def discard_where(self, predicate):
+        """Remove every entry whose key satisfies ``predicate``."""
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# Dashboard statistics keyed by (endpoint, user_id)
+dashboard_cache = TTLCache(maxsize=2048, ttl=10)
+
+
+def cached_per_user(cache):
+    """
+    Decorator caching a JSON endpoint's successful response per logged-in user.
+
+    The serialized body is stored under ``(endpoint name, current_user.id)`` and
+    replayed until the cache entry expires. Error responses are never cached.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            key = (f.__name__, current_user.id)
+            body = cache.get(key)
+            if body is None:
+                response = app.make_response(f(*args, **kwargs))
+                if response.status_code != 200 or not (response.get_json(silent=True) or {}).get('success'):
+                    return response
+                body = response.get_data()
+                cache.set(key, body)
+            return app.response_class(body, mimetype='application/json')
+        return decorated_function
+    return decorator
+
+
+def invalidate_dashboard_cache(*user_ids):
+    """Drop cached dashboard payloads for the given users (all users if none given)."""
+    if not user_ids:
+        dashboard_cache.clear()
+        return
+    affected = {user_id for user_id in user_ids if user_id}
+    dashboard_cache.discard_where(lambda key: key[1] in affected)
+
+
+# Active user IDs per role set, used to fan out emergency notifications
+recipient_cache = TTLCache(maxsize=32, ttl=30)
+
+
+def active_user_ids(*roles, conn=None):
+    """
+    Return the IDs of active users holding any of ``roles``.
+
+    Results are cached for 30 seconds; call ``recipient_cache.clear()`` after
+    changing a user's role or active flag to see the change immediately.
+    An empty result is cached too, so callers can skip their notification
+    work entirely while nobody is eligible.
+    """
+    key = tuple(sorted(roles))
+    user_ids = recipient_cache.get(key)
+    if user_ids is None:
+        owns_connection = conn is None
+        if owns_connection:
+            conn = get_db_connection()
+        try:
+            placeholders = ', '.join('?' * len(key))
+            user_ids = [row[0] for row in conn.execute(
+                f"SELECT user_id FROM users WHERE role IN ({placeholders}) AND is_active = 1", key
+            )]
+        finally:
+            if owns_connection:
+                conn.close()
+        if not user_ids:
+            # Logged once per cache refresh rather than once per call
+            app.logger.warning(f"No active users with role(s) {', '.join(key)} to notify")
+        recipient_cache.set(key, user_ids)
+    return user_ids
+
 
 # =====================================================================
 # USER MODEL
@@ -493,14 +837,169 @@ def unauthorized():
 
 # ==================== UTILITY FUNCTIONS ====================
 
+def _json_default(obj):
+    """Encode dates the way orjson does so both serializers agree."""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+def json_dumps(obj):
+    """Serialize ``obj`` to compact JSON bytes, using orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':'), default=_json_default).encode('utf-8')
+
+def json_response(payload, status=200):
+    """Build an application/json response without going through jsonify()."""
+    return app.response_class(json_dumps(payload), status=status, mimetype='application/json')
+
+def json_body_etag(body):
+    """Strong ETag value for a serialized response body."""
+    return hashlib.sha1(body).hexdigest()
+
+def conditional_json_response(body, etag, max_age=3600):
+    """
+    Serve a pre-serialized JSON ``body`` under ``etag``, answering 304 Not
+    Modified when the client's If-None-Match already names it.
+    
+    Flask-Compress appends ":<algorithm>" to the ETag of compressed responses,
+    so validators echoed back in that form match as well.
+    """
+    headers = {'ETag': f'"{etag}"', 'Cache-Control': f'private, max-age={max_age}'}
+    held = {tag.split(':', 1)[0] for tag in request.if_none_match.as_set(include_weak=True)}
+    if etag in held or request.if_none_match.star_tag:
+        return app.response_class(status=304, headers=headers)
+    return app.response_class(body, mimetype='application/json', headers=headers)
+
+# Keyset pagination for listing endpoints (?limit=&before=&before_id=).
+# Timestamps are not unique, so the cursor is the (timestamp, id) pair of the
+# last row shown and queries filter with "(ts, id) < (?, ?)" ordered by
+# "ts DESC, id DESC"; rows sharing the boundary timestamp are then neither
+# repeated nor skipped. Without before_id the row value comparison is NULL
+# on the boundary timestamp, so a bare ?before= still means "strictly older".
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+def page_args():
+    """
+    Read the ``?limit=``, ``?before=`` and ``?before_id=`` pagination arguments.
+    
+    Returns:
+        tuple: (limit clamped to 1..MAX_PAGE_SIZE, before value or None,
+                before_id value or None)
+    """
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        limit = DEFAULT_PAGE_SIZE
+    return (max(1, min(limit, MAX_PAGE_SIZE)), request.args.get('before') or None,
+            request.args.get('before_id') or None)
+
+def keyset_sql(template, cursor_predicate):
+    """
+    Prebuild the first-page and ``?before=`` variants of a keyset-paged query.
+    
+    ``template`` marks where the cursor condition goes with ``{cursor}``. The
+    first-page variant leaves it out instead of guarding it with
+    ``:before IS NULL OR ...``, since that OR stops SQLite from using the
+    cursor to bound the index range and deep pages would walk every newer row.
+    
+    Returns:
+        tuple: (first-page SQL, ``?before=`` SQL), indexed by ``before is not None``
+    """
+    return template.format(cursor=''), template.format(cursor=f'AND {cursor_predicate}')
+
+def rows_json(cursor, key, page_size=None, cursor_column='created_at', cursor_id_column='id', reverse=False):
+    """
+    Respond with ``{"success": true, <key>: [...]}`` built from an executed cursor.
+    
+    Rows are zipped onto the column names from ``cursor.description``; set
+    ``cursor.row_factory = None`` before executing so rows are plain tuples.
+    
+    When ``page_size`` is given the query is expected to be newest-first with
+    ``LIMIT page_size``; the payload then carries ``next_cursor`` and
+    ``next_cursor_id``, the ``cursor_column`` and ``cursor_id_column`` values
+    of the last row when the page is full (else null), to pass back as
+    ``?before=`` and ``?before_id=``. ``reverse`` returns the page oldest-first.
+    """
+    cols = [d[0] for d in cursor.description]
+    items = [dict(zip(cols, row)) for row in cursor.fetchall()]
+    payload = {'success': True, key: items}
+    if page_size is not None:
+        last = items[-1] if len(items) == page_size else {}
+        payload['next_cursor'] = last.get(cursor_column)
+        payload['next_cursor_id'] = last.get(cursor_id_column)
+    if reverse:
+        items.reverse()
+    return json_response(payload)
+
+def stream_json_list(conn, cursor, key, build_row=None, batch_size=200, page_size=None, cursor_column='created_at',
+                     cursor_id_column='id', head=()):
+    """
+    Stream ``{"success": true, <key>: [...]}`` from an executed cursor.
+    
+    Rows are pulled with ``fetchmany(batch_size)`` and serialized batch by
+    batch, so memory stays bounded by the batch rather than the result set
+    and the first bytes go out before the query is exhausted. The connection
+    is closed once the stream finishes.
+    
+    Args:
+        conn (sqlite3.Connection): Connection owning ``cursor``; closed by the stream
+        cursor (sqlite3.Cursor): Cursor with the SELECT already executed
+        key (str): Name of the list in the JSON payload
+        build_row (callable, optional): Maps a fetched row to a JSON-serializable
+                                   dict. Defaults to zipping tuple rows onto
+                                   the column names from ``cursor.description``.
+        batch_size (int, optional): Rows fetched per batch. Defaults to 200.
+        page_size (int, optional): LIMIT of the query; adds ``next_cursor`` and
+                                   ``next_cursor_id`` as in rows_json()
+        cursor_column (str, optional): Field of the built row used for ``next_cursor``
+        cursor_id_column (str, optional): Field of the built row used for ``next_cursor_id``
+        head (list, optional): Rows the caller already fetched from ``cursor``;
+                               they are emitted before the remaining rows
+    
+    Returns:
+        Response: Streamed application/json response
+    """
+    if build_row is None:
+        columns = [d[0] for d in cursor.description]
+        build_row = lambda row: dict(zip(columns, row))
+    
+    def generate():
+        try:
+            yield f'{{"success":true,"{key}":['.encode('utf-8')
+            separator = b''
+            count = 0
+            last = None
+            rows = list(head)
+            while True:
+                if not rows:
+                    rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                items = [build_row(row) for row in rows]
+                count += len(items)
+                last = items[-1]
+                yield separator + b','.join(json_dumps(item) for item in items)
+                separator = b','
+                rows = None
+            if page_size is None:
+                yield b']}'
+            else:
+                last = last if count == page_size else {}
+                yield (b'],"next_cursor":' + json_dumps(last.get(cursor_column))
+                       + b',"next_cursor_id":' + json_dumps(last.get(cursor_id_column)) + b'}')
+        except Exception as e:
+            app.logger.error(f"Error streaming {key}: {e}")
+            raise
+        finally:
+            conn.close()
+    return app.response_class(stream_with_context(generate()), mimetype='application/json')
+
 def allowed_file(filename, file_type='general'):
-    allowed = app.config['ALLOWED_EXTENSIONS']
-    if file_type == 'image':
-        allowed = {'png', 'jpg', 'jpeg', 'gif'}
-    if '.' in filename:
-        ext = filename.rsplit('.', 1)[1].lower()
-        return ext in allowed
-    return False
+    allowed = IMAGE_EXTENSIONS if file_type == 'image' else app.config['ALLOWED_EXTENSIONS']
+    _, dot, ext = filename.rpartition('.')
+    return bool(dot) and ext.lower() in allowed
 
 def generate_id(prefix):
     """
@@ -575,7 +1074,7 @@ def format_time_ago(dt):
         # For older dates, show full date
         return dt.strftime('%b %d, %Y')
 
-def log_activity(activity, details=""):
+def log_activity(activity, details="", conn=None):
     """
     Log user activity to activity logs and audit trail.
 
@@ -585,12 +1084,16 @@ def log_activity(activity, details=""):
     Args:
         activity (str): Type of activity (e.g., 'user_login', 'report_generated')
         details (str): Additional details about the activity
+        conn (sqlite3.Connection, optional): Connection of an open transaction to
+                                   write through; the caller commits it
 
     Returns:
         None
     """
     if current_user.is_authenticated:
-        conn = get_db_connection()
+        owns_connection = conn is None
+        if owns_connection:
+            conn = get_db_connection()
         try:
             c = conn.cursor()
             current_time = datetime.now()
@@ -612,11 +1115,13 @@ def log_activity(activity, details=""):
             
             # Update last activity timestamp
             c.execute("UPDATE users SET last_activity = ? WHERE user_id = ?", (current_time, current_user.id))
-            conn.commit()
+            if owns_connection:
+                conn.commit()
         except Exception as e:
             app.logger.error(f"Error logging activity: {e}")
         finally:
-            conn.close()
+            if owns_connection:
+                conn.close()
 
 def log_entity_change(entity_type, entity_id, field_name, old_value, new_value, action_type="update", change_reason=""):
     """Log changes to any entity in real-time with complete audit trail."""
@@ -758,7 +1263,7 @@ def get_real_time_events(hours=1, severity_filter=None):
     finally:
         conn.close()
 
-def create_notification(user_id, title, message, notif_type, action_url="#"):
+def create_notification(user_id, title, message, notif_type, action_url="#", conn=None):
     """
     Create and store a user notification.
     
@@ -773,6 +1278,10 @@ def create_notification(user_id, title, message, notif_type, action_url="#"):
         notif_type (str): Type of notification (e.g., 'message', 'approval', 'maintenance')
         action_url (str, optional): URL for user to navigate to on notification click.
                                    Defaults to "#" for no action.
+        conn (sqlite3.Connection, optional): Connection of an open transaction to
+                                   write through. The caller is then responsible
+                                   for committing; otherwise a dedicated connection
+                                   is opened and committed.
     
     Returns:
         None
@@ -781,7 +1290,9 @@ def create_notification(user_id, title, message, notif_type, action_url="#"):
         Errors during creation are logged but do not raise exceptions, allowing
         the application to continue functioning even if notification storage fails.
     """
-    conn = get_db_connection()
+    owns_connection = conn is None
+    if owns_connection:
+        conn = get_db_connection()
     try:
         cursor = conn.cursor()
         current_time = datetime.now()
@@ -791,11 +1302,101 @@ def create_notification(user_id, title, message, notif_type, action_url="#"):
                VALUES (?, ?, ?, ?, ?, ?)""",
             (user_id, title, message, notif_type, action_url, current_time)
         )
-        conn.commit()
+        if owns_connection:
+            conn.commit()
     except Exception as e:
         app.logger.error(f"Failed to create notification for user {user_id}: {e}")
     finally:
-        conn.close()
+        if owns_connection:
+            conn.close()
+
+def create_notifications_bulk(user_ids, title, message, notif_type, action_url="#", conn=None):
+    """
+    Create the same notification for several users with a single executemany().
+    
+    Args:
+        user_ids (iterable): IDs of the users receiving the notification
+        title (str): Short notification title
+        message (str): Notification message body
+        notif_type (str): Type of notification (e.g., 'urgent', 'info')
+        action_url (str, optional): URL opened on notification click. Defaults to "#".
+        conn (sqlite3.Connection, optional): Connection of an open transaction to
+                                   write through without committing; otherwise a
+                                   dedicated connection is opened and committed.
+    
+    Returns:
+        None
+    
+    Note:
+        Like create_notification(), errors are logged rather than raised.
+    """
+    current_time = datetime.now()
+    rows = [(user_id, title, message, notif_type, action_url, current_time) for user_id in user_ids]
+    if not rows:
+        return
+    owns_connection = conn is None
+    if owns_connection:
+        conn = get_db_connection()
+    try:
+        conn.executemany(
+            """INSERT INTO notifications 
+               (user_id, title, message, type, action_url, created_at)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            rows
+        )
+        if owns_connection:
+            conn.commit()
+    except Exception as e:
+        app.logger.error(f"Failed to create notifications for {len(rows)} users: {e}")
+    finally:
+        if owns_connection:
+            conn.close()
+
+# Notification fan-out that the response does not depend on is handed to a
+# background worker, which runs each call with its own pooled connection.
+_notification_queue = queue.SimpleQueue()
+_notification_worker = None
+_notification_worker_lock = threading.Lock()
+
+def queue_notification(func, *args, **kwargs):
+    """
+    Run a notification helper such as notify_on_severity() in the background.
+    
+    Only queue work that opens its own connection; the request's connection
+    may already be closed when the worker gets to it.
+    """
+    global _notification_worker
+    if _notification_worker is None or not _notification_worker.is_alive():
+        with _notification_worker_lock:
+            if _notification_worker is None or not _notification_worker.is_alive():
+                _notification_worker = threading.Thread(
+                    target=_run_notification_worker, name='notification-worker', daemon=True
+                )
+                _notification_worker.start()
+    _notification_queue.put((func, args, kwargs))
+
+def _run_notification_task(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception as e:
+        app.logger.error(f"Queued notification {func.__name__} failed: {e}")
+
+def _run_notification_worker():
+    while True:
+        _run_notification_task(*_notification_queue.get())
+
+def flush_notifications():
+    """Run every queued notification task now. Returns the number of tasks run."""
+    count = 0
+    while True:
+        try:
+            task = _notification_queue.get_nowait()
+        except queue.Empty:
+            return count
+        _run_notification_task(*task)
+        count += 1
+
+atexit.register(flush_notifications)
 
 # ==================== EMAIL FUNCTIONS ====================
 
@@ -1084,6 +1685,14 @@ def send_web_push(user_id, title, body, action_url="#", tag="default"):
 
 # ==================== MAINTENANCE REQUEST WORKFLOW HELPERS ====================
 
+# Keywords that indicate critical severity, matched anywhere in the text
+CRITICAL_KEYWORDS = (
+    'fire', 'emergency', 'flooding', 'sinking', 'collision', 'explosion',
+    'critical', 'life safety', 'hull breach', 'engine failure', 'uncontrollable',
+    'immediate', 'urgent', 'severe', 'catastrophic', 'loss of power'
+)
+CRITICAL_KEYWORDS_RE = re.compile('|'.join(map(re.escape, CRITICAL_KEYWORDS)), re.IGNORECASE)
+
 def assess_severity(description, maintenance_type, priority="medium"):
     """
     Automatically assess maintenance severity level based on content analysis.
@@ -1106,20 +1715,11 @@ def assess_severity(description, maintenance_type, priority="medium"):
         Critical keywords checked: fire, emergency, flooding, sinking, collision,
         explosion, critical, life safety, hull breach, engine failure, etc.
     """
-    # Define keywords that indicate critical severity
-    critical_keywords = [
-        'fire', 'emergency', 'flooding', 'sinking', 'collision', 'explosion',
-        'critical', 'life safety', 'hull breach', 'engine failure', 'uncontrollable',
-        'immediate', 'urgent', 'severe', 'catastrophic', 'loss of power'
-    ]
-    
-    # Combine description and type for comprehensive analysis
-    combined_text = f"{description} {maintenance_type}".lower()
-    
-    # Check for critical keywords in combined text
-    for keyword in critical_keywords:
-        if keyword in combined_text:
-            return 'CRITICAL', f'Matched critical keyword: {keyword}'
+    # Combine description and type for comprehensive analysis; the keyword
+    # pattern is case-insensitive, so no lower-cased copy is needed
+    match = CRITICAL_KEYWORDS_RE.search(f"{description} {maintenance_type}")
+    if match:
+        return 'CRITICAL', f'Matched critical keyword: {match.group(0).lower()}'
     
     # Check if priority flag indicates criticality
     if priority.lower() == 'high':
@@ -1128,7 +1728,30 @@ def assess_severity(description, maintenance_type, priority="medium"):
     # Default to routine maintenance
     return 'MINOR', 'No critical indicators found; assessed as routine maintenance'
 
-def log_workflow_action(request_id, action, actor_id=None, details=""):
+def record_request_completion(cursor, request_id, completed_at):
+    """
+    Fold a request's response time into the running dashboard statistics.
+    
+    Must be called inside the transaction that moves the request to
+    'completed', before the status UPDATE. Requests that are already
+    completed (or unknown) are ignored, so repeated completions are not
+    double-counted.
+    
+    Args:
+        cursor (sqlite3.Cursor): Cursor of the caller's open transaction
+        request_id (str): Maintenance request being completed
+        completed_at (datetime): Completion timestamp
+    """
+    cursor.execute("""
+        INSERT INTO dashboard_stats (key, sum_val, n)
+        SELECT 'response_hours', (julianday(?) - julianday(created_at)) * 24, 1
+        FROM maintenance_requests
+        WHERE request_id = ? AND created_at IS NOT NULL
+          AND COALESCE(status, '') != 'completed'
+        ON CONFLICT(key) DO UPDATE SET sum_val = sum_val + excluded.sum_val, n = n + 1
+    """, (completed_at, request_id))
+
+def log_workflow_action(request_id, action, actor_id=None, details="", conn=None):
     """
     Log a maintenance workflow action for audit trail and tracking.
     
@@ -1140,6 +1763,8 @@ def log_workflow_action(request_id, action, actor_id=None, details=""):
         action (str): Type of workflow action (assigned, completed, escalated, etc.)
         actor_id (str, optional): User ID of the person performing the action
         details (str, optional): Additional details about the action
+        conn (sqlite3.Connection, optional): Connection of an open transaction to
+                                   write through; the caller commits it
     
     Returns:
         None
@@ -1147,7 +1772,9 @@ def log_workflow_action(request_id, action, actor_id=None, details=""):
     Note:
         Failures to log are caught and logged but don't prevent workflow continuation.
     """
-    conn = get_db_connection()
+    owns_connection = conn is None
+    if owns_connection:
+        conn = get_db_connection()
     try:
         cursor = conn.cursor()
         workflow_id = generate_id('WFL')
@@ -1157,49 +1784,47 @@ def log_workflow_action(request_id, action, actor_id=None, details=""):
                VALUES (?, ?, ?, ?, ?, ?)""",
             (workflow_id, request_id, action, actor_id, details, datetime.now())
         )
-        conn.commit()
+        if owns_connection:
+            conn.commit()
     except Exception as e:
         app.logger.error(f"Failed to log workflow action for request {request_id}: {e}")
     finally:
-        conn.close()
+        if owns_connection:
+            conn.close()
 
 def notify_on_severity(request_id, severity, assigned_to=None):
     """Send notifications based on severity level."""
     conn = get_db_connection()
     try:
         c = conn.cursor()
-        c.execute("SELECT * FROM maintenance_requests WHERE request_id = ?", (request_id,))
-        request = dict(c.fetchone() or {})
+        c.execute("SELECT ship_name FROM maintenance_requests WHERE request_id = ?", (request_id,))
+        request = c.fetchone()
         
         if not request:
             return
+        ship_name = request['ship_name']
         
         if severity == 'CRITICAL':
             # Notify Port Engineer, Harbour Master, and Port Manager
-            c.execute("SELECT user_id FROM users WHERE role IN ('port_engineer', 'harbour_master', 'port_manager') AND is_active = 1")
-            users = c.fetchall()
-            
-            for user in users:
-                create_notification(
-                    user['user_id'],
-                    f'CRITICAL Maintenance Request: {request.get("ship_name", "Unknown")}',
-                    f'Critical severity auto-assessed for request {request_id}. Immediate attention required.',
-                    'danger',
-                    f'/view-request/{request_id}'
-                )
+            create_notifications_bulk(
+                active_user_ids('port_engineer', 'harbour_master', 'port_manager', conn=conn),
+                f'CRITICAL Maintenance Request: {ship_name}',
+                f'Critical severity auto-assessed for request {request_id}. Immediate attention required.',
+                'danger',
+                f'/view-request/{request_id}',
+                conn=conn
+            )
         else:  # MINOR
             # Notify only Harbour Master
-            c.execute("SELECT user_id FROM users WHERE role = 'harbour_master' AND is_active = 1")
-            hm_users = c.fetchall()
-            
-            for user in hm_users:
-                create_notification(
-                    user['user_id'],
-                    f'Maintenance Request: {request.get("ship_name", "Unknown")}',
-                    f'Minor severity maintenance request {request_id} assigned to you.',
-                    'info',
-                    f'/view-request/{request_id}'
-                )
+            create_notifications_bulk(
+                active_user_ids('harbour_master', conn=conn),
+                f'Maintenance Request: {ship_name}',
+                f'Minor severity maintenance request {request_id} assigned to you.',
+                'info',
+                f'/view-request/{request_id}',
+                conn=conn
+            )
+        conn.commit()
     except Exception as e:
         app.logger.error(f"Error sending severity notifications: {e}")
     finally:
@@ -4544,6 +5169,7 @@ def register():
                  phone, department, location, survey_end_date, 0)
             )
             conn.commit()
+            recipient_cache.clear()
 
             # Notify manager of new registration - wrapped in try-catch to prevent registration failure
             try:
@@ -8996,8 +9622,10 @@ def add_vessel():
                 conn = get_db_connection()
                 c = conn.cursor()
 
-                # Ensure vessel schema exists/migrated on this connection before insert.
-                ensure_vessels_schema(c)
+                # Ensure vessel schema exists/migrated before insert, unless
+                # init_db() already committed it for this process.
+                if not app.config.get('VESSELS_SCHEMA_READY'):
+                    ensure_vessels_schema(c)
                 
                 # Use shipyard_location mapping
                 shipyard_location = place_of_build
@@ -9614,6 +10242,7 @@ def api_manager_approve_user():
                       (current_time, current_user.id, f'user_{action}', 'user', user_ip, 'completed'))
 
             conn.commit()
+            recipient_cache.clear()
             return jsonify({'success': True, 'action': action})
         except Exception as e:
             conn.rollback()
@@ -10096,13 +10725,7 @@ def api_manager_pending_maintenance():
             FROM maintenance_requests
             WHERE status IN ('submitted', 'pending', 'approved')
             ORDER BY
-                CASE priority
-                    WHEN 'critical' THEN 1
-                    WHEN 'high' THEN 2
-                    WHEN 'medium' THEN 3
-                    WHEN 'low' THEN 4
-                    ELSE 5
-                END,
+                priority_rank,
                 created_at DESC
             LIMIT 25
         """)
@@ -10267,46 +10890,46 @@ def api_manager_generate_system_report():
 
 @app.route('/api/messaging/stats')
 @login_required
+@cached_per_user(dashboard_cache)
+@db_endpoint
 def api_messaging_stats():
     """Get messaging statistics for dashboard."""
+    conn = get_db_connection()
     try:
-        conn = get_db_connection()
         c = conn.cursor()
         
-        # Get unread count
-        c.execute("""
-            SELECT COUNT(*) as unread_count FROM messages
-            WHERE recipient_id = ? AND is_read = 0
-        """, (current_user.id,))
-        unread = c.fetchone()['unread_count']
-        
-        # Get total messages
+        # Unread and total counts in a single statement
         c.execute("""
-            SELECT COUNT(*) as total_messages FROM messages
+            SELECT COUNT(CASE WHEN recipient_id = ? AND is_read = 0 THEN 1 END) as unread_count,
+                   COUNT(*) as total_messages
+            FROM messages
             WHERE recipient_id = ? OR sender_id = ?
-        """, (current_user.id, current_user.id))
-        total = c.fetchone()['total_messages']
-        
-        conn.close()
+        """, (current_user.id, current_user.id, current_user.id))
+        unread, total = c.fetchone()
         
         return jsonify({
             'success': True,
             'unread_count': unread,
             'total_messages': total
         })
-    except Exception as e:
-        app.logger.error(f"Error getting messaging stats: {e}")
-        return jsonify({'success': False, 'error': str(e)})
+    finally:
+        conn.close()
 
 # ==================== ENHANCED NOTIFICATION SYSTEM ====================
 
+# Column order of the notification list query; rows are zipped straight onto
+# these names instead of going through dict(sqlite3.Row).
+NOTIFICATION_LIST_COLUMNS = ('id', 'title', 'message', 'type', 'action_url', 'created_at', 'is_read')
+
 @app.route('/api/notifications')
 @login_required
+@db_endpoint
 def api_notifications():
     """Get user notifications."""
     conn = get_db_connection()
     try:
         c = conn.cursor()
+        c.row_factory = None
         c.execute("""
             SELECT id, title, message, type, action_url, created_at, is_read
             FROM notifications
@@ -10315,21 +10938,16 @@ def api_notifications():
             LIMIT 20
         """, (current_user.id,))
 
-        notifications = []
-        for row in c.fetchall():
-            notification = dict(row)
-            notification['timestamp'] = notification['created_at']
-            notifications.append(notification)
+        notifications = [dict(zip(NOTIFICATION_LIST_COLUMNS, row), timestamp=row[5])
+                         for row in c.fetchall()]
 
         return jsonify({'success': True, 'notifications': notifications})
-    except Exception as e:
-        app.logger.error(f"Error getting notifications: {e}")
-        return jsonify({'success': False, 'error': str(e)})
     finally:
         conn.close()
 
 @app.route('/api/notification/read/<int:notification_id>', methods=['POST'])
 @login_required
+@db_endpoint
 def api_notification_read(notification_id):
     """Mark notification as read."""
     conn = get_db_connection()
@@ -10343,15 +10961,12 @@ def api_notification_read(notification_id):
 
         conn.commit()
         return jsonify({'success': True})
-    except Exception as e:
-        conn.rollback()
-        app.logger.error(f"Error marking notification as read: {e}")
-        return jsonify({'success': False, 'error': str(e)})
     finally:
         conn.close()
 
 @app.route('/api/notification/read-all', methods=['POST'])
 @login_required
+@db_endpoint
 def api_notification_read_all():
     """Mark all notifications as read."""
     conn = get_db_connection()
@@ -10365,98 +10980,79 @@ def api_notification_read_all():
 
         conn.commit()
         return jsonify({'success': True})
-    except Exception as e:
-        conn.rollback()
-        app.logger.error(f"Error marking all notifications as read: {e}")
-        return jsonify({'success': False, 'error': str(e)})
     finally:
         conn.close()
 
+NOTIFICATION_DETAIL_COLUMNS = ('id', 'user_id', 'title', 'message', 'type', 'action_url', 'is_read', 'created_at')
+
 @app.route('/api/notification/<int:notification_id>')
 @login_required
+@db_endpoint
 def api_notification_detail(notification_id):
     """Get notification details."""
     conn = get_db_connection()
     try:
         c = conn.cursor()
+        c.row_factory = None
         c.execute("""
             SELECT id, user_id, title, message, type, action_url, is_read, created_at
             FROM notifications
             WHERE id = ? AND (user_id = ? OR user_id = 'system')
         """, (notification_id, current_user.id))
 
-        notification = c.fetchone()
-        if not notification:
+        row = c.fetchone()
+        if not row:
             return jsonify({'success': False, 'error': 'Notification not found or access denied'}), 404
 
-        notification_dict = dict(notification)
-        
-        # Mark as read if not already read
-        if not notification_dict['is_read']:
-            # For system notifications, we need to create a user-specific read record or update if user_id matches
-            if notification_dict['user_id'] == 'system':
-                # For system notifications, we can't update directly, so we'll just return it as read
-                # In a more advanced system, you'd have a separate read_status table
-                pass
-            else:
-                c.execute("""
-                    UPDATE notifications
-                    SET is_read = 1
-                    WHERE id = ? AND user_id = ?
-                """, (notification_id, current_user.id))
-                conn.commit()
-            notification_dict['is_read'] = 1
+        # Mark as read if not already read. System notifications are shared, so
+        # they are only reported as read (a per-user read_status table would be
+        # needed to track them individually).
+        if not row[6] and row[1] != 'system':
+            c.execute("""
+                UPDATE notifications
+                SET is_read = 1
+                WHERE id = ? AND user_id = ?
+            """, (notification_id, current_user.id))
+            conn.commit()
 
-        return jsonify({'success': True, 'notification': notification_dict})
-    except Exception as e:
-        app.logger.error(f"Error getting notification details: {e}")
-        return jsonify({'success': False, 'error': str(e)})
+        return jsonify({'success': True, 'notification': dict(zip(NOTIFICATION_DETAIL_COLUMNS, row), is_read=1)})
     finally:
         conn.close()
 
 # ==================== NOTIFICATION PREFERENCES ROUTES ====================
 
+# Returned for users who never saved preferences (and when the lookup fails)
+DEFAULT_NOTIFICATION_PREFERENCES = {
+    'sound_enabled': True,
+    'browser_notifications': True,
+    'email_notifications': True
+}
+
 @app.route('/api/user/notification-preferences', methods=['GET'])
 @login_required
 def api_get_notification_preferences():
     """Get user's notification preferences."""
     try:
         conn = get_db_connection()
-        c = conn.cursor()
-        
-        c.execute("""
-            SELECT sound_enabled, browser_notifications, email_notifications
-            FROM notification_preferences
-            WHERE user_id = ?
-        """, (current_user.id,))
-        
-        row = c.fetchone()
-        conn.close()
-        
-        if row:
-            preferences = dict(row)
-        else:
-            # Return default preferences if not set
-            preferences = {
-                'sound_enabled': True,
-                'browser_notifications': True,
-                'email_notifications': True
-            }
+        try:
+            row = conn.execute("""
+                SELECT sound_enabled, browser_notifications, email_notifications
+                FROM notification_preferences
+                WHERE user_id = ?
+            """, (current_user.id,)).fetchone()
+        finally:
+            conn.close()
         
         return jsonify({
             'success': True,
-            'preferences': preferences
+            'preferences': dict(row) if row else DEFAULT_NOTIFICATION_PREFERENCES
         })
     except Exception as e:
         app.logger.error(f"Error getting notification preferences: {e}")
         return jsonify({
             'success': False,
             'error': str(e),
-            'preferences': {
-                'sound_enabled': True,
-                'browser_notifications': True,
-                'email_notifications': True
-            }
+            'preferences': DEFAULT_NOTIFICATION_PREFERENCES
         })
 
 @app.route('/api/user/notification-preferences', methods=['POST'])
@@ -10472,33 +11068,21 @@ def api_save_notification_preferences():
         email_notifications = data.get('email_notifications', True)
         
         conn = get_db_connection()
-        c = conn.cursor()
-        
-        # Check if preferences already exist
-        c.execute("""
-            SELECT user_id FROM notification_preferences
-            WHERE user_id = ?
-        """, (current_user.id,))
-        
-        exists = c.fetchone() is not None
-        
-        if exists:
-            # Update existing preferences
-            c.execute("""
-                UPDATE notification_preferences
-                SET sound_enabled = ?, browser_notifications = ?, email_notifications = ?
-                WHERE user_id = ?
-            """, (sound_enabled, browser_notifications, email_notifications, current_user.id))
-        else:
-            # Insert new preferences
-            c.execute("""
+        try:
+            # Insert or update in one statement (user_id is UNIQUE)
+            conn.execute("""
                 INSERT INTO notification_preferences 
                 (user_id, sound_enabled, browser_notifications, email_notifications)
                 VALUES (?, ?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    sound_enabled = excluded.sound_enabled,
+                    browser_notifications = excluded.browser_notifications,
+                    email_notifications = excluded.email_notifications,
+                    updated_at = CURRENT_TIMESTAMP
             """, (current_user.id, sound_enabled, browser_notifications, email_notifications))
-        
-        conn.commit()
-        conn.close()
+            conn.commit()
+        finally:
+            conn.close()
         
         app.logger.info(f"Notification preferences saved for user {current_user.id}")
         
@@ -10626,29 +11210,23 @@ def api_push_unsubscribe():
 @app.route('/api/chief-engineer/dashboard-data')
 @login_required
 @role_required(['chief_engineer'])
+@cached_per_user(dashboard_cache)
+@db_endpoint
 def api_chief_engineer_dashboard_data():
     """Get chief engineer dashboard statistics."""
     conn = get_db_connection()
     try:
         c = conn.cursor()
         
-        # Total requests sent by this chief engineer (check both submitted_by and requested_by for backward compatibility)
-        c.execute("""
-            SELECT COUNT(*) as count
-            FROM maintenance_requests
-            WHERE (
-                submitted_by = ?
-                OR requested_by = ?
-                OR requested_by = ?
-                OR requested_by_email = ?
-            )
-        """, (current_user.id, current_user.id, current_user.email, current_user.email))
-        total_row = c.fetchone()
-        total_requests = dict(total_row).get('count', 0) if total_row else 0
-        
-        # Submitted for harbour master review
+        # All counters in one pass over this chief engineer's requests (check both
+        # submitted_by and requested_by for backward compatibility)
         c.execute("""
-            SELECT COUNT(*) as count
+            SELECT COUNT(*) AS total_requests,
+                   COUNT(CASE WHEN status = 'submitted' THEN 1 END) AS pending_approval,
+                   COUNT(CASE WHEN status = 'in_progress' THEN 1 END) AS in_progress,
+                   COUNT(CASE WHEN status = 'completed' THEN 1 END) AS completed,
+                   COUNT(CASE WHEN status = 'approved' THEN 1 END) AS approved,
+                   COUNT(CASE WHEN status = 'rejected' THEN 1 END) AS rejected
             FROM maintenance_requests
             WHERE (
                 submitted_by = ?
@@ -10656,66 +11234,8 @@ def api_chief_engineer_dashboard_data():
                 OR requested_by = ?
                 OR requested_by_email = ?
             )
-            AND status = 'submitted'
-        """, (current_user.id, current_user.id, current_user.email, current_user.email))
-        pending_row = c.fetchone()
-        pending_approval = dict(pending_row).get('count', 0) if pending_row else 0
-        
-        # In progress
-        c.execute("""
-            SELECT COUNT(*) as count
-            FROM maintenance_requests
-            WHERE (
-                submitted_by = ?
-                OR requested_by = ?
-                OR requested_by = ?
-                OR requested_by_email = ?
-            ) AND status = 'in_progress'
-        """, (current_user.id, current_user.id, current_user.email, current_user.email))
-        inprog_row = c.fetchone()
-        in_progress = dict(inprog_row).get('count', 0) if inprog_row else 0
-        
-        # Completed
-        c.execute("""
-            SELECT COUNT(*) as count
-            FROM maintenance_requests
-            WHERE (
-                submitted_by = ?
-                OR requested_by = ?
-                OR requested_by = ?
-                OR requested_by_email = ?
-            ) AND status = 'completed'
-        """, (current_user.id, current_user.id, current_user.email, current_user.email))
-        comp_row = c.fetchone()
-        completed = dict(comp_row).get('count', 0) if comp_row else 0
-        
-        # Approved
-        c.execute("""
-            SELECT COUNT(*) as count
-            FROM maintenance_requests
-            WHERE (
-                submitted_by = ?
-                OR requested_by = ?
-                OR requested_by = ?
-                OR requested_by_email = ?
-            ) AND status = 'approved'
-        """, (current_user.id, current_user.id, current_user.email, current_user.email))
-        appr_row = c.fetchone()
-        approved = dict(appr_row).get('count', 0) if appr_row else 0
-
-        # Rejected
-        c.execute("""
-            SELECT COUNT(*) as count
-            FROM maintenance_requests
-            WHERE (
-                submitted_by = ?
-                OR requested_by = ?
-                OR requested_by = ?
-                OR requested_by_email = ?
-            ) AND status = 'rejected'
         """, (current_user.id, current_user.id, current_user.email, current_user.email))
-        rej_row = c.fetchone()
-        rejected = dict(rej_row).get('count', 0) if rej_row else 0
+        total_requests, pending_approval, in_progress, completed, approved, rejected = c.fetchone()
         
         return jsonify({
             'success': True,
@@ -10728,21 +11248,35 @@ def api_chief_engineer_dashboard_data():
                 'rejected': rejected
             }
         })
-    except Exception as e:
-        app.logger.error(f"Error getting chief engineer dashboard data: {e}")
-        return jsonify({'success': False, 'error': str(e)})
     finally:
         conn.close()
 
+CHIEF_MY_REQUESTS_COLUMNS = ('request_id', 'ship_name', 'maintenance_type', 'request_type', 'priority',
+                             'criticality', 'status', 'created_at', 'requested_by', 'submitted_by')
+
 @app.route('/api/chief-engineer/my-requests')
 @login_required
 @role_required(['chief_engineer'])
+@db_endpoint
 def api_chief_engineer_my_requests():
-    """Get all maintenance requests created by chief engineer."""
+    """
+    Get maintenance requests created by chief engineer, newest first.
+
+    Query Parameters:
+        - before (str, optional): created_at of the last request already shown;
+                                  returns the next page of older requests.
+        - before_id (str, optional): request_id of that request, so requests
+                                  sharing its created_at are not skipped.
+    """
+    before = request.args.get('before')
+    params = [current_user.id, current_user.id, current_user.email, current_user.email]
+    if before:
+        params += [before, request.args.get('before_id')]
     conn = get_db_connection()
     try:
         c = conn.cursor()
-        c.execute("""
+        c.row_factory = None
+        c.execute(f"""
             SELECT request_id, ship_name, maintenance_type, request_type, priority, criticality,
                    COALESCE(status, workflow_status, 'pending') AS status,
                    created_at, requested_by, submitted_by
@@ -10752,31 +11286,31 @@ def api_chief_engineer_my_requests():
                 OR requested_by = ?
                 OR requested_by = ?
                 OR requested_by_email = ?
-            )
-            ORDER BY created_at DESC
+            ){' AND (created_at, request_id) < (?, ?)' if before else ''}
+            ORDER BY created_at DESC, request_id DESC
             LIMIT 50
-        """, (current_user.id, current_user.id, current_user.email, current_user.email))
+        """, params)
         
-        requests = []
-        for row in c.fetchall():
-            request_data = dict(row)
-            requests.append(request_data)
+        requests = [dict(zip(CHIEF_MY_REQUESTS_COLUMNS, row)) for row in c.fetchall()]
         
         return jsonify({'success': True, 'requests': requests})
-    except Exception as e:
-        app.logger.error(f"Error getting chief engineer requests: {e}")
-        return jsonify({'success': False, 'error': str(e)})
     finally:
         conn.close()
 
+CHIEF_PENDING_APPROVAL_COLUMNS = ('request_id', 'ship_name', 'maintenance_type', 'request_type', 'priority',
+                                  'criticality', 'status', 'created_at', 'requested_by', 'submitted_by',
+                                  'severity')
+
 @app.route('/api/chief-engineer/pending-approval')
 @login_required
 @role_required(['chief_engineer'])
+@db_endpoint
 def api_chief_engineer_pending_approval():
     """Get requests submitted for harbour master review."""
     conn = get_db_connection()
     try:
         c = conn.cursor()
+        c.row_factory = None
         c.execute("""
             SELECT request_id, ship_name, maintenance_type, request_type, priority, criticality,
                    status, created_at, requested_by, submitted_by, severity
@@ -10790,28 +11324,24 @@ def api_chief_engineer_pending_approval():
             ORDER BY created_at DESC
         """, (current_user.id, current_user.id, current_user.email, current_user.email))
         
-        requests = []
-        for row in c.fetchall():
-            request_data = dict(row)
-            requests.append(request_data)
+        requests = [dict(zip(CHIEF_PENDING_APPROVAL_COLUMNS, row)) for row in c.fetchall()]
         
         return jsonify({'success': True, 'requests': requests})
-    except Exception as e:
-        app.logger.error(f"Error getting pending approval requests: {e}")
-        return jsonify({'success': False, 'error': str(e)})
     finally:
         conn.close()
 
 @app.route('/api/chief-engineer/recent-activity')
 @login_required
 @role_required(['chief_engineer'])
+@db_endpoint
 def api_chief_engineer_recent_activity():
     """Get recent activity for chief engineer."""
     conn = get_db_connection()
     try:
         c = conn.cursor()
+        c.row_factory = None
         c.execute("""
-            SELECT request_id, ship_name, status, updated_at
+            SELECT request_id, ship_name, status, updated_at, created_at
             FROM maintenance_requests
             WHERE (
                 submitted_by = ?
@@ -10823,17 +11353,12 @@ def api_chief_engineer_recent_activity():
             LIMIT 10
         """, (current_user.id, current_user.id, current_user.email, current_user.email))
         
-        activities = []
-        for row in c.fetchall():
-            activities.append({
-                'timestamp': row['updated_at'] or row['created_at'],
-                'description': f"Request {row['request_id']} for {row['ship_name']} - Status: {row['status']}"
-            })
+        activities = [{
+            'timestamp': updated_at or created_at,
+            'description': f"Request {request_id} for {ship_name} - Status: {status}"
+        } for request_id, ship_name, status, updated_at, created_at in c.fetchall()]
         
         return jsonify({'success': True, 'activities': activities})
-    except Exception as e:
-        app.logger.error(f"Error getting recent activity: {e}")
-        return jsonify({'success': False, 'error': str(e)})
     finally:
         conn.close()
 
@@ -10842,70 +11367,25 @@ def api_chief_engineer_recent_activity():
 @app.route('/api/captain/dashboard-data')
 @login_required
 @role_required(['captain'])
+@cached_per_user(dashboard_cache)
+@db_endpoint
 def api_captain_dashboard_data():
     """Get captain dashboard statistics."""
     conn = get_db_connection()
     try:
         c = conn.cursor()
         
-        # Get vessel name from user profile or use a default
-        vessel_name = current_user.get_full_name()  # This might need to be stored in user profile
-        
-        # Total requests sent by this captain (check both submitted_by and requested_by for backward compatibility)
+        # All counters in one pass over this captain's requests (check both
+        # submitted_by and requested_by for backward compatibility)
         c.execute("""
-            SELECT COUNT(*) as count
+            SELECT COUNT(*) AS total_requests,
+                   COUNT(CASE WHEN status = 'in_progress' THEN 1 END) AS in_progress,
+                   COUNT(CASE WHEN status = 'completed' THEN 1 END) AS completed,
+                   COUNT(CASE WHEN status = 'rejected' THEN 1 END) AS rejected
             FROM maintenance_requests
             WHERE (submitted_by = ? OR requested_by = ? OR requested_by = ?)
         """, (current_user.id, current_user.id, current_user.email))
-        total_row = c.fetchone()
-        total_requests = dict(total_row).get('count', 0) if total_row else 0
-        
-        # Pending approval (legacy requests awaiting captain review)
-        c.execute("""
-            SELECT COUNT(*) as count
-            FROM maintenance_requests mr
-            LEFT JOIN users u ON mr.submitted_by = u.user_id
-            WHERE mr.status = 'submitted'
-              AND (submitted_by = ? OR requested_by = ? OR requested_by = ?)
-        """, (current_user.id, current_user.id, current_user.email))
-        pend_row = c.fetchone()
-        pending_approval = dict(pend_row).get('count', 0) if pend_row else 0
-        
-        # Submitted (to harbour master)
-        c.execute("""
-            SELECT COUNT(*) as count
-            FROM maintenance_requests
-            WHERE (submitted_by = ? OR requested_by = ? OR requested_by = ?) AND status = 'submitted'
-        """, (current_user.id, current_user.id, current_user.email))
-        subm_row = c.fetchone()
-        submitted = dict(subm_row).get('count', 0) if subm_row else 0
-        
-        # In progress
-        c.execute("""
-            SELECT COUNT(*) as count
-            FROM maintenance_requests
-            WHERE (submitted_by = ? OR requested_by = ? OR requested_by = ?) AND status = 'in_progress'
-        """, (current_user.id, current_user.id, current_user.email))
-        inprog_row = c.fetchone()
-        in_progress = dict(inprog_row).get('count', 0) if inprog_row else 0
-        
-        # Completed
-        c.execute("""
-            SELECT COUNT(*) as count
-            FROM maintenance_requests
-            WHERE (submitted_by = ? OR requested_by = ? OR requested_by = ?) AND status = 'completed'
-        """, (current_user.id, current_user.id, current_user.email))
-        comp_row = c.fetchone()
-        completed = dict(comp_row).get('count', 0) if comp_row else 0
-
-        # Rejected
-        c.execute("""
-            SELECT COUNT(*) as count
-            FROM maintenance_requests
-            WHERE (submitted_by = ? OR requested_by = ? OR requested_by = ?) AND status = 'rejected'
-        """, (current_user.id, current_user.id, current_user.email))
-        rej_row = c.fetchone()
-        rejected = dict(rej_row).get('count', 0) if rej_row else 0
+        total_requests, in_progress, completed, rejected = c.fetchone()
         
         return jsonify({
             'success': True,
@@ -10916,35 +11396,47 @@ def api_captain_dashboard_data():
                 'rejected': rejected
             }
         })
-    except Exception as e:
-        app.logger.error(f"Error getting captain dashboard data: {e}")
-        return jsonify({'success': False, 'error': str(e)})
     finally:
         conn.close()
 
+CAPTAIN_VESSEL_REQUESTS_COLUMNS = ('request_id', 'ship_name', 'maintenance_type', 'request_type', 'priority',
+                                   'criticality', 'status', 'created_at', 'requested_by')
+
 @app.route('/api/captain/vessel-requests')
 @login_required
 @role_required(['captain'])
+@db_endpoint
 def api_captain_vessel_requests():
-    """Get all requests for the captain's vessel."""
+    """
+    Get requests for the captain's vessel, newest first.
+
+    Query Parameters:
+        - before (str, optional): created_at of the last request already shown;
+                                  returns the next page of older requests.
+        - before_id (str, optional): request_id of that request, so requests
+                                  sharing its created_at are not skipped.
+    """
+    before = request.args.get('before')
     conn = get_db_connection()
     try:
         c = conn.cursor()
-        c.execute("""
+        c.row_factory = None
+        c.execute(f"""
             SELECT request_id, ship_name, maintenance_type, request_type, priority, criticality,
                    status, created_at, requested_by
             FROM maintenance_requests
-            ORDER BY created_at DESC
+            {'WHERE (created_at, request_id) < (?, ?)' if before else ''}
+            ORDER BY created_at DESC, request_id DESC
             LIMIT 50
-        """)
+        """, (before, request.args.get('before_id')) if before else ())
         
         requests = []
         for row in c.fetchall():
-            request_data = dict(row)
+            request_data = dict(zip(CAPTAIN_VESSEL_REQUESTS_COLUMNS, row))
             # Get requester name
             if request_data['requested_by']:
-                c.execute("SELECT first_name, last_name FROM users WHERE email = ?", (request_data['requested_by'],))
-                user = c.fetchone()
+                user = conn.execute("SELECT first_name, last_name FROM users WHERE email = ?",
+                                    (request_data['requested_by'],)).fetchone()
                 if user:
                     request_data['requested_by_name'] = f"{user['first_name']} {user['last_name']}"
                 else:
@@ -10952,20 +11444,19 @@ def api_captain_vessel_requests():
             requests.append(request_data)
         
         return jsonify({'success': True, 'requests': requests})
-    except Exception as e:
-        app.logger.error(f"Error getting vessel requests: {e}")
-        return jsonify({'success': False, 'error': str(e)})
     finally:
         conn.close()
 
 @app.route('/api/captain/recent-activity')
 @login_required
 @role_required(['captain'])
+@db_endpoint
 def api_captain_recent_activity():
     """Get recent activity for captain."""
     conn = get_db_connection()
     try:
         c = conn.cursor()
+        c.row_factory = None
         c.execute("""
             SELECT request_id, ship_name, status, updated_at
             FROM maintenance_requests
@@ -10974,18 +11465,12 @@ def api_captain_recent_activity():
             LIMIT 10
         """, (current_user.id, current_user.id))
         
-        activities = []
-        for row in c.fetchall():
-            action = 'approved' if row['status'] == 'approved' else 'rejected'
-            activities.append({
-                'timestamp': row['updated_at'],
-                'description': f"{action.capitalize()} request {row['request_id']} for {row['ship_name']}"
-            })
+        activities = [{
+            'timestamp': updated_at,
+            'description': f"{'Approved' if status == 'approved' else 'Rejected'} request {request_id} for {ship_name}"
+        } for request_id, ship_name, status, updated_at in c.fetchall()]
         
         return jsonify({'success': True, 'activities': activities})
-    except Exception as e:
-        app.logger.error(f"Error getting recent activity: {e}")
-        return jsonify({'success': False, 'error': str(e)})
     finally:
         conn.close()
 
@@ -10993,73 +11478,99 @@ def api_captain_recent_activity():
 
 @app.route('/api/dashboard-data')
 @login_required
+@cached_per_user(dashboard_cache)
+@db_endpoint
 def api_dashboard_data():
     """Get dashboard data for the current user."""
+    conn = get_db_connection()
     try:
-        conn = get_db_connection()
+        c = conn.cursor()
+        
+        # Total maintenance requests and active ships (requests in progress)
+        # in a single pass
+        c.execute("""
+            SELECT COUNT(*) as total_requests,
+                   COUNT(DISTINCT CASE WHEN status IN ('assigned', 'in_progress', 'on_hold')
+                                       THEN ship_name END) as active_ships
+            FROM maintenance_requests
+        """)
+        total_requests, active_ships = c.fetchone()
+        
+        # Get average response time (in hours) from the running totals
+        # maintained by record_request_completion()
+        c.execute("""
+            SELECT sum_val / n as avg_hours
+            FROM dashboard_stats
+            WHERE key = 'response_hours' AND n > 0
+        """)
+        avg_response_result = c.fetchone()
+        avg_response = round(avg_response_result['avg_hours'], 1) if avg_response_result and avg_response_result['avg_hours'] else 0
+        
+        # Get satisfaction rate (from evaluations if table exists)
+        satisfaction_rate = 92  # Default
         try:
-            c = conn.cursor()
-            
-            # Get total maintenance requests
-            c.execute("SELECT COUNT(*) as count FROM maintenance_requests")
-            total_requests_result = c.fetchone()
-            total_requests = total_requests_result['count'] if total_requests_result else 0
-            
-            # Get average response time (in hours)
-            c.execute("""
-                SELECT AVG(
-                    (julianday(updated_at) - julianday(created_at)) * 24
-                ) as avg_hours
-                FROM maintenance_requests
-                WHERE status = 'completed' AND updated_at IS NOT NULL
-            """)
-            avg_response_result = c.fetchone()
-            avg_response = round(avg_response_result['avg_hours'], 1) if avg_response_result and avg_response_result['avg_hours'] else 0
-            
-            # Get satisfaction rate (from evaluations if table exists)
-            satisfaction_rate = 92  # Default
-            try:
-                c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='service_evaluations'")
-                if c.fetchone():
-                    c.execute("""
-                        SELECT AVG(
-                            (quality_score + speed_score + safety_score + cost_score) / 4.0 * 20
-                        ) as satisfaction
-                        FROM service_evaluations
-                    """)
-                    sat_result = c.fetchone()
-                    if sat_result and sat_result['satisfaction']:
-                        satisfaction_rate = round(sat_result['satisfaction'], 0)
-            except:
-                pass
-            
-            # Get active ships (requests in progress)
-            c.execute("""
-                SELECT COUNT(DISTINCT ship_name) as count
-                FROM maintenance_requests
-                WHERE status IN ('assigned', 'in_progress', 'on_hold')
-            """)
-            active_ships_result = c.fetchone()
-            active_ships = active_ships_result['count'] if active_ships_result else 0
-            
-            return jsonify({
-                'success': True,
-                'total_requests': total_requests,
-                'avg_response': avg_response,
-                'satisfaction': satisfaction_rate,
-                'active_ships': active_ships
-            })
-        except Exception as e:
-            app.logger.error(f"Error getting dashboard data: {e}")
-            return jsonify({'success': False, 'error': 'Database error'})
-        finally:
-            conn.close()
-    except Exception as e:
-        app.logger.error(f"Error in dashboard data: {e}")
-        return jsonify({'success': False, 'error': str(e)})
+            if app.config['HAS_SERVICE_EVALUATIONS']:
+                c.execute("""
+                    SELECT AVG(
+                        (quality_score + speed_score + safety_score + cost_score) / 4.0 * 20
+                    ) as satisfaction
+                    FROM service_evaluations
+                """)
+                sat_result = c.fetchone()
+                if sat_result and sat_result['satisfaction']:
+                    satisfaction_rate = round(sat_result['satisfaction'], 0)
+        except:
+            pass
+        
+        return jsonify({
+            'success': True,
+            'total_requests': total_requests,
+            'avg_response': avg_response,
+            'satisfaction': satisfaction_rate,
+            'active_ships': active_ships
+        })
+    finally:
+        conn.close()
 
 # ==================== EMERGENCY REQUEST ROUTES ====================
 
+EMERGENCY_LIST_COLUMNS = ('emergency_id', 'ship_name', 'emergency_type', 'severity_level', 'status',
+                          'created_at', 'reported_by', 'location_name', 'latitude', 'longitude',
+                          'description', 'immediate_actions', 'resources_required', 'authorized_by',
+                          'authorized_at')
+
+def emergency_list_sql(by_status, own_only, paged):
+    """Build the emergency list query with only the conditions that apply."""
+    conditions = [condition for condition, applies in (
+        ('status = :status', by_status),
+        ('reported_by = :user_id', own_only),
+        ('(created_at, emergency_id) < (:before, :before_id)', paged),
+    ) if applies]
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    return f"""
+    SELECT {', '.join(EMERGENCY_LIST_COLUMNS)}
+    FROM emergency_requests
+    {where}
+    ORDER BY created_at DESC, emergency_id DESC
+    LIMIT :limit
+"""
+
+# One statement per (status filter, crew-only, ?before=) combination rather than
+# "(:flag = 0 OR ...)" terms, which would stop SQLite from walking
+# idx_emergency_status_created_id / idx_emergency_reporter_created_id /
+# idx_emergency_created_id from the cursor and make deep pages scan newer rows.
+EMERGENCY_LIST_SQL = {
+    (by_status, own_only, paged): emergency_list_sql(by_status, own_only, paged)
+    for by_status in (False, True) for own_only in (False, True) for paged in (False, True)
+}
+
+
+def build_emergency_list_row(row):
+    """Map an EMERGENCY_LIST_SQL row to its JSON dict."""
+    # latitude/longitude are REAL columns (init_db clears non-numeric legacy
+    # values), so they already come back as float or None.
+    return dict(zip(EMERGENCY_LIST_COLUMNS, row))
+
 @app.route('/api/emergency-requests')
 @login_required
 @role_required(['port_engineer', 'harbour_master', 'quality_officer', 'captain', 'chief_engineer'])
@@ -11077,11 +11588,18 @@ def api_emergency_requests():
     Query Parameters:
         - status (str, optional): Filter by status. Default: 'pending'
                                  Values: 'pending', 'active', 'resolved', 'all'
+        - before (str, optional): created_at of the last emergency already shown
+                                 (keyset pagination)
+        - before_id (str, optional): emergency_id of that emergency, so ones
+                                 sharing its created_at are not skipped
+        - limit (int, optional): Page size. Default: 100, max: 500
     
     Returns:
         JSON response with:
             - success (bool): Operation status
             - emergencies (list): Array of emergency request objects
+            - next_cursor (str): ``before`` value for the next page, or null
+            - next_cursor_id (str): ``before_id`` value for the next page, or null
             - error (str): Error description if failed
     
     Response Fields (per emergency):
@@ -11106,9 +11624,10 @@ def api_emergency_requests():
         - 403: Access denied
         - 500: Database error
     """
-    conn = get_db_connection()
+    conn = get_db_connection(readonly=True)
     try:
         cursor = conn.cursor()
+        cursor.row_factory = None
         
         # Get status filter from query parameter (default to pending)
         status_filter = request.args.get('status', 'pending')
@@ -11116,74 +11635,38 @@ def api_emergency_requests():
         # Check if user is captain or chief_engineer
         is_crew = current_user.role in ['captain', 'chief_engineer']
         
+        # Crew only see their own emergencies, 'all' drops the status filter,
+        # and ?before=/?before_id=/?limit= page backwards by created_at.
+        limit, before, before_id = page_args()
+        sql = EMERGENCY_LIST_SQL[status_filter != 'all', is_crew, before is not None]
+        cursor.execute(sql, {
+            'status': status_filter,
+            'user_id': current_user.id,
+            'before': before,
+            'before_id': before_id,
+            'limit': limit,
+        })
+
+        # The unfiltered list grows with the table, so stream it instead of
+        # materializing every row; the stream closes the connection itself.
         if status_filter == 'all':
-            if is_crew:
-                # For crew, show only their own emergencies
-                cursor.execute("""
-                    SELECT emergency_id, ship_name, emergency_type, severity_level,
-                           status, created_at, reported_by, location_name, latitude, longitude,
-                           description, immediate_actions, resources_required, authorized_by, authorized_at
-                    FROM emergency_requests
-                    WHERE reported_by = ?
-                    ORDER BY created_at DESC
-                """, (current_user.id,))
-            else:
-                # For management, show all emergencies
-                cursor.execute("""
-                    SELECT emergency_id, ship_name, emergency_type, severity_level,
-                           status, created_at, reported_by, location_name, latitude, longitude,
-                           description, immediate_actions, resources_required, authorized_by, authorized_at
-                    FROM emergency_requests
-                    ORDER BY created_at DESC
-                """)
-        else:
-            if is_crew:
-                # For crew, show only their own emergencies with status filter
-                cursor.execute("""
-                    SELECT emergency_id, ship_name, emergency_type, severity_level,
-                           status, created_at, reported_by, location_name, latitude, longitude,
-                           description, immediate_actions, resources_required, authorized_by, authorized_at
-                    FROM emergency_requests
-                    WHERE reported_by = ? AND status = ?
-                    ORDER BY created_at DESC
-                """, (current_user.id, status_filter))
-            else:
-                # For management, show all emergencies with status filter
-                cursor.execute("""
-                    SELECT emergency_id, ship_name, emergency_type, severity_level,
-                           status, created_at, reported_by, location_name, latitude, longitude,
-                           description, immediate_actions, resources_required, authorized_by, authorized_at
-                    FROM emergency_requests
-                    WHERE status = ?
-                    ORDER BY created_at DESC
-                """, (status_filter,))
-
-        emergencies = []
-        for row in cursor.fetchall():
-            emergency = dict(row)
-            
-            # Normalize GPS coordinates
-            if emergency.get('latitude') is not None:
-                try:
-                    emergency['latitude'] = float(emergency['latitude'])
-                except (ValueError, TypeError):
-                    emergency['latitude'] = None
-            
-            if emergency.get('longitude') is not None:
-                try:
-                    emergency['longitude'] = float(emergency['longitude'])
-                except (ValueError, TypeError):
-                    emergency['longitude'] = None
-            
-            emergencies.append(emergency)
+            response = stream_json_list(conn, cursor, 'emergencies', build_emergency_list_row, page_size=limit,
+                                        cursor_id_column='emergency_id')
+            conn = None
+            return response
 
-        return jsonify({'success': True, 'emergencies': emergencies}), 200
+        emergencies = [build_emergency_list_row(row) for row in cursor.fetchall()]
+        last = emergencies[-1] if len(emergencies) == limit else {}
+
+        return json_response({'success': True, 'emergencies': emergencies,
+                              'next_cursor': last.get('created_at'), 'next_cursor_id': last.get('emergency_id')})
 
     except Exception as e:
         app.logger.error(f"Error retrieving emergency requests: {e}")
-        return jsonify({'success': False, 'error': 'Failed to retrieve emergency requests'}), 500
+        return json_response({'success': False, 'error': 'Failed to retrieve emergency requests'}, status=500)
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
 
 @app.route('/api/emergency-details/<emergency_id>')
 @login_required
@@ -11219,25 +11702,12 @@ def api_emergency_details(emergency_id):
 
         emergency = cursor.fetchone()
         if not emergency:
-            return jsonify({'success': False, 'error': 'Emergency request not found'}), 404
-
-        emergency_dict = dict(emergency)
-        # Ensure coordinates are properly serialized (None -> null, numbers as numbers)
-        if emergency_dict.get('latitude') is not None:
-            try:
-                emergency_dict['latitude'] = float(emergency_dict['latitude'])
-            except (ValueError, TypeError):
-                emergency_dict['latitude'] = None
-        if emergency_dict.get('longitude') is not None:
-            try:
-                emergency_dict['longitude'] = float(emergency_dict['longitude'])
-            except (ValueError, TypeError):
-                emergency_dict['longitude'] = None
+            return json_response({'success': False, 'error': 'Emergency request not found'}, status=404)
 
-        return jsonify({'success': True, 'emergency': emergency_dict})
+        return json_response({'success': True, 'emergency': dict(emergency)})
     except Exception as e:
         app.logger.error(f"Error getting emergency details: {e}")
-        return jsonify({'success': False, 'error': str(e)})
+        return json_response({'success': False, 'error': str(e)})
     finally:
         conn.close()
 
@@ -11249,7 +11719,7 @@ def api_declare_emergency():
         data = request.get_json()
         
         if not data:
-            return jsonify({'success': False, 'error': 'No data provided'}), 400
+            return json_response({'success': False, 'error': 'No data provided'}, status=400)
         
         ship_name = data.get('ship_name')
         emergency_type = data.get('emergency_type')
@@ -11267,7 +11737,7 @@ def api_declare_emergency():
         reporter_phone = data.get('reporter_phone', '')
         
         if not ship_name or not emergency_type or not description:
-            return jsonify({'success': False, 'error': 'Missing required fields: Ship Name, Emergency Type, and Description are required'}), 400
+            return json_response({'success': False, 'error': 'Missing required fields: Ship Name, Emergency Type, and Description are required'}, status=400)
         
         # Determine reporter ID
         if current_user.is_authenticated:
@@ -11328,32 +11798,30 @@ def api_declare_emergency():
                 current_time
             ))
             
-            conn.commit()
-            
-            # Send notifications to managers
-            c.execute("SELECT user_id FROM users WHERE role = 'port_engineer' AND is_active = 1")
-            managers = c.fetchall()
-            
-            for manager in managers:
-                manager = dict(manager) if manager else {}
+            # Notify managers in the same transaction
+            recipients = active_user_ids('port_engineer', conn=conn)
+            if recipients:
                 notification_message = f'Emergency {emergency_id}: {emergency_type} on {ship_name}'
                 if not current_user.is_authenticated:
                     notification_message += f'\nReported by: {reporter_info}'
-                create_notification(
-                    manager.get('user_id'),
+                create_notifications_bulk(
+                    recipients,
                     'New Emergency Declared',
                     notification_message,
                     'urgent',
-                    '/emergency-requests'
+                    '/emergency-requests',
+                    conn=conn
                 )
             
             # Log activity (only if authenticated)
             if current_user.is_authenticated:
-                log_activity('emergency_declared', f'Declared emergency {emergency_id}')
+                log_activity('emergency_declared', f'Declared emergency {emergency_id}', conn=conn)
             else:
                 app.logger.info(f'Emergency {emergency_id} declared by public user: {reporter_info}')
             
-            return jsonify({
+            conn.commit()
+            
+            return json_response({
                 'success': True,
                 'emergency_id': emergency_id,
                 'message': 'Emergency declared successfully. Managers have been notified.'
@@ -11361,12 +11829,12 @@ def api_declare_emergency():
         except Exception as e:
             conn.rollback()
             app.logger.error(f"Error declaring emergency: {e}")
-            return jsonify({'success': False, 'error': 'Database error'})
+            return json_response({'success': False, 'error': 'Database error'})
         finally:
             conn.close()
     except Exception as e:
         app.logger.error(f"Error in declare emergency: {e}")
-        return jsonify({'success': False, 'error': str(e)})
+        return json_response({'success': False, 'error': str(e)})
 
 @app.route('/api/emergency-contact-services', methods=['POST'])
 @login_required
@@ -11379,7 +11847,7 @@ def api_emergency_contact_services():
         notes = data.get('notes', '')
         
         if not emergency_id:
-            return jsonify({'success': False, 'error': 'Emergency ID is required'})
+            return json_response({'success': False, 'error': 'Emergency ID is required'})
         
         conn = get_db_connection()
         try:
@@ -11397,50 +11865,50 @@ def api_emergency_contact_services():
             c.execute("""
                 SELECT ship_name, emergency_type FROM emergency_requests WHERE emergency_id = ?
             """, (emergency_id,))
-            emergency_row = c.fetchone()
-            
-            if not emergency_row:
-                return jsonify({'success': False, 'error': 'Emergency not found'})
+            emergency = c.fetchone()
             
-            # Convert Row to dict
-            emergency = dict(emergency_row) if emergency_row else {}
+            if not emergency:
+                return json_response({'success': False, 'error': 'Emergency not found'})
             
             # Notify all port engineers
-            c.execute("SELECT user_id FROM users WHERE role = 'port_engineer' AND is_active = 1")
-            port_engineers = c.fetchall()
+            port_engineers = active_user_ids('port_engineer', conn=conn)
+            
+            # Same message for every engineer, so build it once
+            notification_message = f'Emergency services contacted for {emergency["ship_name"]}'
+            if services_contacted:
+                notification_message += f'\nServices: {", ".join(services_contacted)}'
+            if notes:
+                notification_message += f'\nNotes: {notes}'
+            
+            # Written through this connection: it already holds the write lock
+            # from the activity insert, so a separate connection would block.
+            create_notifications_bulk(
+                port_engineers,
+                'Emergency Services Contacted',
+                notification_message,
+                'urgent',
+                '/emergency-requests',
+                conn=conn
+            )
             
-            for engineer_row in port_engineers:
-                engineer = dict(engineer_row)  # Convert Row to dict
-                notification_message = f'Emergency services contacted for {emergency.get("ship_name", "Unknown")}'
-                if services_contacted:
-                    notification_message += f'\nServices: {", ".join(services_contacted)}'
-                if notes:
-                    notification_message += f'\nNotes: {notes}'
-                    
-                create_notification(
-                    engineer.get('user_id'),
-                    'Emergency Services Contacted',
-                    notification_message,
-                    'urgent',
-                    f'/emergency-requests'
-                )
+            log_activity('emergency_services_contacted', f'Contacted emergency services for {emergency_id}', conn=conn)
             
             conn.commit()
-            log_activity('emergency_services_contacted', f'Contacted emergency services for {emergency_id}')
+            notify_emergency_activity()
             
-            return jsonify({
+            return json_response({
                 'success': True,
                 'message': f'Emergency services contacted. {len(port_engineers)} port engineer(s) notified.'
             })
         except Exception as e:
             conn.rollback()
             app.logger.error(f"Error contacting emergency services: {e}", exc_info=True)
-            return jsonify({'success': False, 'error': 'Database error'})
+            return json_response({'success': False, 'error': 'Database error'})
         finally:
             conn.close()
     except Exception as e:
         app.logger.error(f"Error in emergency contact services: {e}", exc_info=True)
-        return jsonify({'success': False, 'error': str(e)})
+        return json_response({'success': False, 'error': str(e)})
 
 @app.route('/api/emergency-activate-team', methods=['POST'])
 @login_required
@@ -11455,81 +11923,173 @@ def api_emergency_activate_team():
             c = conn.cursor()
             
             # Notify all harbour masters and port engineers
-            c.execute("SELECT user_id FROM users WHERE role IN ('port_engineer', 'harbour_master') AND is_active = 1")
-            team_members = c.fetchall()
-            
-            for member_row in team_members:
-                member = dict(member_row)  # Convert Row to dict
-                create_notification(
-                    member.get('user_id'),
+            recipients = active_user_ids('port_engineer', 'harbour_master', conn=conn)
+            if recipients:
+                create_notifications_bulk(
+                    recipients,
                     'Emergency Response Team Activated',
                     f'Emergency response team has been activated for emergency {emergency_id}',
                     'urgent',
-                    '/emergency-requests'
+                    '/emergency-requests',
+                    conn=conn
                 )
-            
+            log_activity('response_team_activated', f'Activated response team for {emergency_id}', conn=conn)
             conn.commit()
-            log_activity('response_team_activated', f'Activated response team for {emergency_id}')
             
-            return jsonify({
+            return json_response({
                 'success': True,
                 'message': 'Emergency response team activated. All personnel notified.'
             })
         except Exception as e:
             app.logger.error(f"Error activating team: {e}")
-            return jsonify({'success': False, 'error': 'Database error'})
+            return json_response({'success': False, 'error': 'Database error'})
         finally:
             conn.close()
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+        return json_response({'success': False, 'error': str(e)})
 
 # ==================== EMERGENCY ACTIVITY TIMELINE ====================
 
+EMERGENCY_ACTIVITY_INSERT_SQL = """
+    INSERT INTO emergency_activity_log
+    (emergency_id, user_id, action_type, action_description, old_status, new_status, created_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+# SQLite offers no update hook through the sqlite3 module, so writers in this
+# process bump a sequence number and wake the SSE streams waiting on it;
+# rows written by other worker processes are picked up by the periodic re-check.
+emergency_activity_cv = threading.Condition()
+_emergency_activity_seq = 0
+SSE_RECHECK_INTERVAL = 15  # seconds
+
+
+def notify_emergency_activity():
+    """Wake SSE streams after emergency_activity_log rows have been committed."""
+    global _emergency_activity_seq
+    with emergency_activity_cv:
+        _emergency_activity_seq += 1
+        emergency_activity_cv.notify_all()
+
+
+# Timeline entries written on behalf of another change are queued and inserted
+# by a background writer in batches, keeping the extra insert off the request.
+ACTIVITY_LOG_BATCH_SIZE = 256
+ACTIVITY_LOG_FLUSH_INTERVAL = 0.2  # seconds
+_activity_log_queue = queue.SimpleQueue()
+_activity_log_writer = None
+_activity_log_writer_lock = threading.Lock()
+
+
+def queue_emergency_activity(emergency_id, user_id, action_type, description, created_at,
+                             old_status=None, new_status=None):
+    """
+    Queue an emergency_activity_log row for the background writer.
+
+    The row is committed within ACTIVITY_LOG_FLUSH_INTERVAL seconds, so callers
+    should only use this when the response does not depend on the entry.
+    """
+    global _activity_log_writer
+    if _activity_log_writer is None or not _activity_log_writer.is_alive():
+        with _activity_log_writer_lock:
+            if _activity_log_writer is None or not _activity_log_writer.is_alive():
+                _activity_log_writer = threading.Thread(
+                    target=_emergency_activity_writer, name='emergency-activity-writer', daemon=True
+                )
+                _activity_log_writer.start()
+    _activity_log_queue.put((emergency_id, user_id, action_type, description, old_status, new_status, created_at))
+
+
+def flush_emergency_activity():
+    """Insert every queued activity row now. Returns the number of rows written."""
+    batch = []
+    while True:
+        try:
+            batch.append(_activity_log_queue.get_nowait())
+        except queue.Empty:
+            break
+    if batch:
+        _write_emergency_activity(batch)
+    return len(batch)
+
+
+def _write_emergency_activity(batch):
+    conn = get_db_connection()
+    try:
+        conn.executemany(EMERGENCY_ACTIVITY_INSERT_SQL, batch)
+        conn.commit()
+        notify_emergency_activity()
+    except Exception as e:
+        app.logger.error(f"Error writing {len(batch)} queued emergency activities: {e}")
+    finally:
+        conn.close()
+
+
+def _emergency_activity_writer():
+    while True:
+        batch = [_activity_log_queue.get()]
+        deadline = time.monotonic() + ACTIVITY_LOG_FLUSH_INTERVAL
+        while len(batch) < ACTIVITY_LOG_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_activity_log_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        _write_emergency_activity(batch)
+
+
+atexit.register(flush_emergency_activity)
+
+EMERGENCY_ACTIVITIES_SQL = keyset_sql("""
+        SELECT 
+            eal.*,
+            u.first_name || ' ' || u.last_name as user_name,
+            u.role as user_role
+        FROM emergency_activity_log eal
+        LEFT JOIN users u ON eal.user_id = u.user_id
+        WHERE eal.emergency_id = :emergency_id
+          {cursor}
+        ORDER BY eal.created_at DESC, eal.id DESC
+        LIMIT :limit
+    """, "(eal.created_at, eal.id) < (:before, :before_id)")
+
 @app.route('/api/emergency/<emergency_id>/activities')
 @login_required
 def api_emergency_activities(emergency_id):
     """Get activity timeline for an emergency."""
     try:
+        limit, before, before_id = page_args()
         conn = get_db_connection()
         try:
             c = conn.cursor()
-            c.execute("""
-                SELECT 
-                    eal.*,
-                    u.first_name || ' ' || u.last_name as user_name,
-                    u.role as user_role
-                FROM emergency_activity_log eal
-                LEFT JOIN users u ON eal.user_id = u.user_id
-                WHERE eal.emergency_id = ?
-                ORDER BY eal.created_at DESC
-            """, (emergency_id,))
-            
-            activities = []
-            for row in c.fetchall():
-                activity = dict(row)
-                activities.append(activity)
+            c.row_factory = None
+            c.execute(EMERGENCY_ACTIVITIES_SQL[before is not None],
+                      {'emergency_id': emergency_id, 'before': before, 'before_id': before_id, 'limit': limit})
             
-            return jsonify({'success': True, 'activities': activities})
+            return rows_json(c, 'activities', page_size=limit)
         except Exception as e:
             app.logger.error(f"Error getting activities: {e}")
-            return jsonify({'success': False, 'error': 'Database error'})
+            return json_response({'success': False, 'error': 'Database error'})
         finally:
             conn.close()
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+        return json_response({'success': False, 'error': str(e)})
 
 @app.route('/api/emergency/<emergency_id>/log-activity', methods=['POST'])
 @login_required
 def api_log_emergency_activity(emergency_id):
     """Log an activity for an emergency."""
     try:
-        import json as json_module
         data = request.get_json()
         action_type = data.get('action_type')
         action_description = data.get('action_description')
         old_status = data.get('old_status')
         new_status = data.get('new_status')
-        metadata = json_module.dumps(data.get('metadata', {}))
+        # Most entries carry no metadata; store NULL rather than '{}'
+        metadata = data.get('metadata')
+        metadata = json_dumps(metadata).decode('utf-8') if metadata else None
         
         conn = get_db_connection()
         try:
@@ -11542,18 +12102,33 @@ def api_log_emergency_activity(emergency_id):
             """, (emergency_id, current_user.id, action_type, action_description, old_status, new_status, metadata, current_time))
             
             conn.commit()
-            return jsonify({'success': True})
+            notify_emergency_activity()
+            return json_response({'success': True})
         except Exception as e:
             conn.rollback()
             app.logger.error(f"Error logging activity: {e}")
-            return jsonify({'success': False, 'error': 'Database error'})
+            return json_response({'success': False, 'error': 'Database error'})
         finally:
             conn.close()
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+        return json_response({'success': False, 'error': str(e)})
 
 # ==================== EMERGENCY STATUS MANAGEMENT ====================
 
+# Fixed SQL text per status transition so SQLite's statement cache is reused
+# across requests instead of re-preparing a freshly formatted UPDATE each time.
+EMERGENCY_STATUS_UPDATE_SQL = {
+    'resolved': "UPDATE emergency_requests SET status = ?, updated_at = ?, resolved_at = ? WHERE emergency_id = ?",
+    'closed': "UPDATE emergency_requests SET status = ?, updated_at = ?, closed_at = ? WHERE emergency_id = ?",
+}
+EMERGENCY_STATUS_UPDATE_PLAIN_SQL = "UPDATE emergency_requests SET status = ?, updated_at = ? WHERE emergency_id = ?"
+
+EMERGENCY_STATUS_HISTORY_INSERT_SQL = """
+    INSERT INTO emergency_status_history
+    (emergency_id, old_status, new_status, changed_by, change_reason, created_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
 @app.route('/api/emergency/<emergency_id>/update-status', methods=['POST'])
 @login_required
 def api_update_emergency_status(emergency_id):
@@ -11564,150 +12139,135 @@ def api_update_emergency_status(emergency_id):
         change_reason = data.get('reason', '')
         
         if not new_status:
-            return jsonify({'success': False, 'error': 'Status is required'})
+            return json_response({'success': False, 'error': 'Status is required'})
         
         valid_statuses = ['pending', 'authorized', 'in_progress', 'resolved', 'closed']
         if new_status not in valid_statuses:
-            return jsonify({'success': False, 'error': 'Invalid status'})
+            return json_response({'success': False, 'error': 'Invalid status'})
         
         conn = get_db_connection()
         try:
             c = conn.cursor()
+            begin_immediate(conn)
             
             # Get current status
             c.execute("SELECT status FROM emergency_requests WHERE emergency_id = ?", (emergency_id,))
             result = c.fetchone()
             if not result:
-                return jsonify({'success': False, 'error': 'Emergency not found'})
+                return json_response({'success': False, 'error': 'Emergency not found'})
             
             old_status = result['status']
-            
-            # Update status
-            update_fields = ['status = ?', 'updated_at = ?']
-            update_values = [new_status, datetime.now()]
-            
-            if new_status == 'resolved':
-                update_fields.append('resolved_at = ?')
-                update_values.append(datetime.now())
-            elif new_status == 'closed':
-                update_fields.append('closed_at = ?')
-                update_values.append(datetime.now())
-            
-            update_values.append(emergency_id)
-            
-            c.execute(f"""
-                UPDATE emergency_requests
-                SET {', '.join(update_fields)}
-                WHERE emergency_id = ?
-            """, update_values)
-            
-            # Log status change with real-time timestamp
             current_time = datetime.now()
-            c.execute("""
-                INSERT INTO emergency_status_history
-                (emergency_id, old_status, new_status, changed_by, change_reason, created_at)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (emergency_id, old_status, new_status, current_user.id, change_reason, current_time))
             
-            # Log activity with real-time timestamp
-            c.execute("""
-                INSERT INTO emergency_activity_log
-                (emergency_id, user_id, action_type, action_description, old_status, new_status, created_at)
-                VALUES (?, ?, 'status_change', ?, ?, ?, ?)
-            """, (emergency_id, current_user.id, f'Status changed from {old_status} to {new_status}', old_status, new_status, current_time))
+            # Update status (resolved/closed also stamp their own column)
+            if new_status in EMERGENCY_STATUS_UPDATE_SQL:
+                c.execute(EMERGENCY_STATUS_UPDATE_SQL[new_status],
+                          (new_status, current_time, current_time, emergency_id))
+            else:
+                c.execute(EMERGENCY_STATUS_UPDATE_PLAIN_SQL, (new_status, current_time, emergency_id))
             
-            conn.commit()
+            # Log status change with the same timestamp as the update
+            c.execute(EMERGENCY_STATUS_HISTORY_INSERT_SQL,
+                      (emergency_id, old_status, new_status, current_user.id, change_reason, current_time))
             
-            # Send notifications based on status
+            # Send notifications based on status, in the same transaction
             if new_status == 'authorized':
-                c.execute("SELECT user_id FROM users WHERE role = 'harbour_master' AND is_active = 1")
-                managers = c.fetchall()
-                for manager in managers:
-                    manager = dict(manager) if manager else {}
-                    create_notification(
-                        manager.get('user_id'),
-                        'Emergency Authorized',
-                        f'Emergency {emergency_id} has been authorized and requires action.',
-                        'urgent',
-                        '/emergency-requests'
-                    )
+                create_notifications_bulk(
+                    active_user_ids('harbour_master', conn=conn),
+                    'Emergency Authorized',
+                    f'Emergency {emergency_id} has been authorized and requires action.',
+                    'urgent',
+                    '/emergency-requests',
+                    conn=conn
+                )
             
-            log_activity('emergency_status_updated', f'Updated emergency {emergency_id} status to {new_status}')
-            return jsonify({'success': True, 'old_status': old_status, 'new_status': new_status})
+            log_activity('emergency_status_updated', f'Updated emergency {emergency_id} status to {new_status}', conn=conn)
+            conn.commit()
+            queue_emergency_activity(emergency_id, current_user.id, 'status_change',
+                                     f'Status changed from {old_status} to {new_status}', current_time,
+                                     old_status=old_status, new_status=new_status)
+            
+            return json_response({'success': True, 'old_status': old_status, 'new_status': new_status})
         except Exception as e:
             conn.rollback()
             app.logger.error(f"Error updating status: {e}")
-            return jsonify({'success': False, 'error': 'Database error'})
+            return json_response({'success': False, 'error': 'Database error'})
         finally:
             conn.close()
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+        return json_response({'success': False, 'error': str(e)})
+
+EMERGENCY_STATUS_HISTORY_SQL = keyset_sql("""
+        SELECT 
+            esh.*,
+            u.first_name || ' ' || u.last_name as changed_by_name
+        FROM emergency_status_history esh
+        LEFT JOIN users u ON esh.changed_by = u.user_id
+        WHERE esh.emergency_id = :emergency_id
+          {cursor}
+        ORDER BY esh.created_at DESC, esh.id DESC
+        LIMIT :limit
+    """, "(esh.created_at, esh.id) < (:before, :before_id)")
 
 @app.route('/api/emergency/<emergency_id>/status-history')
 @login_required
 def api_emergency_status_history(emergency_id):
     """Get status change history for an emergency."""
     try:
+        limit, before, before_id = page_args()
         conn = get_db_connection()
         try:
             c = conn.cursor()
-            c.execute("""
-                SELECT 
-                    esh.*,
-                    u.first_name || ' ' || u.last_name as changed_by_name
-                FROM emergency_status_history esh
-                LEFT JOIN users u ON esh.changed_by = u.user_id
-                WHERE esh.emergency_id = ?
-                ORDER BY esh.created_at DESC
-            """, (emergency_id,))
-            
-            history = []
-            for row in c.fetchall():
-                history.append(dict(row))
+            c.row_factory = None
+            c.execute(EMERGENCY_STATUS_HISTORY_SQL[before is not None],
+                      {'emergency_id': emergency_id, 'before': before, 'before_id': before_id, 'limit': limit})
             
-            return jsonify({'success': True, 'history': history})
+            return rows_json(c, 'history', page_size=limit)
         except Exception as e:
             app.logger.error(f"Error getting status history: {e}")
-            return jsonify({'success': False, 'error': 'Database error'})
+            return json_response({'success': False, 'error': 'Database error'})
         finally:
             conn.close()
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+        return json_response({'success': False, 'error': str(e)})
 
 # ==================== EMERGENCY COMMUNICATION HUB ====================
 
+EMERGENCY_MESSAGES_SQL = keyset_sql("""
+        SELECT 
+            em.*,
+            u.first_name || ' ' || u.last_name as sender_name,
+            u.role as sender_role
+        FROM emergency_messages em
+        LEFT JOIN users u ON em.sender_id = u.user_id
+        WHERE em.emergency_id = :emergency_id
+          {cursor}
+        ORDER BY em.created_at DESC, em.id DESC
+        LIMIT :limit
+    """, "(em.created_at, em.id) < (:before, :before_id)")
+
 @app.route('/api/emergency/<emergency_id>/messages')
 @login_required
 def api_emergency_messages(emergency_id):
     """Get messages for an emergency."""
     try:
+        limit, before, before_id = page_args()
         conn = get_db_connection()
         try:
             c = conn.cursor()
-            c.execute("""
-                SELECT 
-                    em.*,
-                    u.first_name || ' ' || u.last_name as sender_name,
-                    u.role as sender_role
-                FROM emergency_messages em
-                LEFT JOIN users u ON em.sender_id = u.user_id
-                WHERE em.emergency_id = ?
-                ORDER BY em.created_at ASC
-            """, (emergency_id,))
-            
-            messages = []
-            for row in c.fetchall():
-                message = dict(row)
-                messages.append(message)
+            c.row_factory = None
+            c.execute(EMERGENCY_MESSAGES_SQL[before is not None],
+                      {'emergency_id': emergency_id, 'before': before, 'before_id': before_id, 'limit': limit})
             
-            return jsonify({'success': True, 'messages': messages})
+            # Newest page first from the index, shown oldest-first like a chat
+            return rows_json(c, 'messages', page_size=limit, reverse=True)
         except Exception as e:
             app.logger.error(f"Error getting messages: {e}")
-            return jsonify({'success': False, 'error': 'Database error'})
+            return json_response({'success': False, 'error': 'Database error'})
         finally:
             conn.close()
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+        return json_response({'success': False, 'error': str(e)})
 
 @app.route('/api/emergency/<emergency_id>/send-message', methods=['POST'])
 @login_required
@@ -11718,70 +12278,68 @@ def api_send_emergency_message(emergency_id):
         message = data.get('message')
         
         if not message or not message.strip():
-            return jsonify({'success': False, 'error': 'Message is required'})
+            return json_response({'success': False, 'error': 'Message is required'})
         
         conn = get_db_connection()
         try:
             c = conn.cursor()
             current_time = datetime.now()
-            c.execute("""
+            c.execute(f"""
                 INSERT INTO emergency_messages
                 (emergency_id, sender_id, message, created_at)
-                VALUES (?, ?, ?, ?)
+                VALUES (?, ?, ?, ?){RETURNING_ID}
             """, (emergency_id, current_user.id, message.strip(), current_time))
-            
-            # Log activity with real-time timestamp
-            c.execute("""
-                INSERT INTO emergency_activity_log
-                (emergency_id, user_id, action_type, action_description, created_at)
-                VALUES (?, ?, 'message_sent', ?, ?)
-            """, (emergency_id, current_user.id, f'Sent message: {message[:50]}...', current_time))
+            message_id = c.fetchone()[0] if SQLITE_HAS_RETURNING else c.lastrowid
             
             conn.commit()
+            queue_emergency_activity(emergency_id, current_user.id, 'message_sent',
+                                     f'Sent message: {message[:50]}...', current_time)
             
-            return jsonify({'success': True, 'message_id': c.lastrowid})
+            return json_response({'success': True, 'message_id': message_id})
         except Exception as e:
             conn.rollback()
             app.logger.error(f"Error sending message: {e}")
-            return jsonify({'success': False, 'error': 'Database error'})
+            return json_response({'success': False, 'error': 'Database error'})
         finally:
             conn.close()
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+        return json_response({'success': False, 'error': str(e)})
 
 # ==================== EMERGENCY RESOURCE TRACKING ====================
 
+EMERGENCY_RESOURCES_SQL = keyset_sql("""
+        SELECT 
+            er.*,
+            u.first_name || ' ' || u.last_name as assigned_by_name
+        FROM emergency_resources er
+        LEFT JOIN users u ON er.assigned_by = u.user_id
+        WHERE er.emergency_id = :emergency_id
+          {cursor}
+        ORDER BY er.assigned_at DESC, er.id DESC
+        LIMIT :limit
+    """, "(er.assigned_at, er.id) < (:before, :before_id)")
+
 @app.route('/api/emergency/<emergency_id>/resources')
 @login_required
 def api_emergency_resources(emergency_id):
     """Get resources assigned to an emergency."""
     try:
+        limit, before, before_id = page_args()
         conn = get_db_connection()
         try:
             c = conn.cursor()
-            c.execute("""
-                SELECT 
-                    er.*,
-                    u.first_name || ' ' || u.last_name as assigned_by_name
-                FROM emergency_resources er
-                LEFT JOIN users u ON er.assigned_by = u.user_id
-                WHERE er.emergency_id = ?
-                ORDER BY er.assigned_at DESC
-            """, (emergency_id,))
+            c.row_factory = None
+            c.execute(EMERGENCY_RESOURCES_SQL[before is not None],
+                      {'emergency_id': emergency_id, 'before': before, 'before_id': before_id, 'limit': limit})
             
-            resources = []
-            for row in c.fetchall():
-                resource = dict(row)
-                resources.append(resource)
-            
-            return jsonify({'success': True, 'resources': resources})
+            return rows_json(c, 'resources', page_size=limit, cursor_column='assigned_at')
         except Exception as e:
             app.logger.error(f"Error getting resources: {e}")
-            return jsonify({'success': False, 'error': 'Database error'})
+            return json_response({'success': False, 'error': 'Database error'})
         finally:
             conn.close()
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+        return json_response({'success': False, 'error': str(e)})
 
 @app.route('/api/emergency/<emergency_id>/assign-resource', methods=['POST'])
 @login_required
@@ -11795,36 +12353,32 @@ def api_assign_emergency_resource(emergency_id):
         notes = data.get('notes', '')
         
         if not resource_type or not resource_name:
-            return jsonify({'success': False, 'error': 'Resource type and name are required'})
+            return json_response({'success': False, 'error': 'Resource type and name are required'})
         
         conn = get_db_connection()
         try:
             c = conn.cursor()
             current_time = datetime.now()
-            c.execute("""
+            c.execute(f"""
                 INSERT INTO emergency_resources
                 (emergency_id, resource_type, resource_name, resource_id, assigned_by, notes, assigned_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
+                VALUES (?, ?, ?, ?, ?, ?, ?){RETURNING_ID}
             """, (emergency_id, resource_type, resource_name, resource_id, current_user.id, notes, current_time))
-            
-            # Log activity with real-time timestamp
-            c.execute("""
-                INSERT INTO emergency_activity_log
-                (emergency_id, user_id, action_type, action_description, created_at)
-                VALUES (?, ?, 'resource_assigned', ?, ?)
-            """, (emergency_id, current_user.id, f'Assigned {resource_type}: {resource_name}', current_time))
+            new_resource_id = c.fetchone()[0] if SQLITE_HAS_RETURNING else c.lastrowid
             
             conn.commit()
+            queue_emergency_activity(emergency_id, current_user.id, 'resource_assigned',
+                                     f'Assigned {resource_type}: {resource_name}', current_time)
             
-            return jsonify({'success': True, 'resource_id': c.lastrowid})
+            return json_response({'success': True, 'resource_id': new_resource_id})
         except Exception as e:
             conn.rollback()
             app.logger.error(f"Error assigning resource: {e}")
-            return jsonify({'success': False, 'error': 'Database error'})
+            return json_response({'success': False, 'error': 'Database error'})
         finally:
             conn.close()
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+        return json_response({'success': False, 'error': str(e)})
 
 @app.route('/api/emergency/<emergency_id>/release-resource/<int:resource_id>', methods=['POST'])
 @login_required
@@ -11841,34 +12395,49 @@ def api_release_emergency_resource(emergency_id, resource_id):
             resource = c.fetchone()
             
             if not resource:
-                return jsonify({'success': False, 'error': 'Resource not found'})
+                return json_response({'success': False, 'error': 'Resource not found'})
             
             # Update resource
+            current_time = datetime.now()
             c.execute("""
                 UPDATE emergency_resources
                 SET status = 'released', released_at = ?
                 WHERE id = ? AND emergency_id = ?
-            """, (datetime.now(), resource_id, emergency_id))
-            
-            # Log activity with real-time timestamp
-            current_time = datetime.now()
-            c.execute("""
-                INSERT INTO emergency_activity_log
-                (emergency_id, user_id, action_type, action_description, created_at)
-                VALUES (?, ?, 'resource_released', ?, ?)
-            """, (emergency_id, current_user.id, f'Released {resource["resource_type"]}: {resource["resource_name"]}', current_time))
+            """, (current_time, resource_id, emergency_id))
             
             conn.commit()
+            queue_emergency_activity(emergency_id, current_user.id, 'resource_released',
+                                     f'Released {resource["resource_type"]}: {resource["resource_name"]}', current_time)
             
-            return jsonify({'success': True})
+            return json_response({'success': True})
         except Exception as e:
             conn.rollback()
             app.logger.error(f"Error releasing resource: {e}")
-            return jsonify({'success': False, 'error': 'Database error'})
+            return json_response({'success': False, 'error': 'Database error'})
         finally:
             conn.close()
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+        return json_response({'success': False, 'error': str(e)})
+
+# Columns api_update_emergency_resource may set, in bit order of the field mask
+EMERGENCY_RESOURCE_UPDATE_COLUMNS = ('resource_type', 'resource_name', 'resource_id', 'notes', 'status')
+STATUS_FIELD_BIT = 1 << EMERGENCY_RESOURCE_UPDATE_COLUMNS.index('status')
+
+def _build_emergency_resource_update_sql(mask, released_at):
+    fields = [f'{col} = ?' for bit, col in enumerate(EMERGENCY_RESOURCE_UPDATE_COLUMNS) if mask & (1 << bit)]
+    if released_at == 'set':
+        fields.append('released_at = ?')
+    elif released_at == 'clear':
+        fields.append('released_at = NULL')
+    return f"UPDATE emergency_resources SET {', '.join(fields)} WHERE id = ? AND emergency_id = ?"
+
+# Every supported (field mask, released_at handling) combination, prepared up front
+# so the endpoint never formats SQL per request.
+EMERGENCY_RESOURCE_UPDATE_SQL = {
+    (mask, released_at): _build_emergency_resource_update_sql(mask, released_at)
+    for mask in range(1, 1 << len(EMERGENCY_RESOURCE_UPDATE_COLUMNS))
+    for released_at in ((None, 'set', 'clear') if mask & STATUS_FIELD_BIT else (None,))
+}
 
 @app.route('/api/emergency/<emergency_id>/update-resource/<int:resource_id>', methods=['POST'])
 @login_required
@@ -11884,7 +12453,7 @@ def api_update_emergency_resource(emergency_id, resource_id):
         status = data.get('status')
         
         if not resource_type or not resource_name:
-            return jsonify({'success': False, 'error': 'Resource type and name are required'})
+            return json_response({'success': False, 'error': 'Resource type and name are required'})
         
         conn = get_db_connection()
         try:
@@ -11896,48 +12465,40 @@ def api_update_emergency_resource(emergency_id, resource_id):
             old_resource = c.fetchone()
             
             if not old_resource:
-                return jsonify({'success': False, 'error': 'Resource not found'})
+                return json_response({'success': False, 'error': 'Resource not found'})
             
-            # Build update query dynamically
-            update_fields = []
-            update_values = []
+            current_time = datetime.now()
             
-            if resource_type:
-                update_fields.append('resource_type = ?')
-                update_values.append(resource_type)
-            if resource_name:
-                update_fields.append('resource_name = ?')
-                update_values.append(resource_name)
-            if resource_id_field is not None:
-                update_fields.append('resource_id = ?')
-                update_values.append(resource_id_field)
-            if notes is not None:
-                update_fields.append('notes = ?')
-                update_values.append(notes)
-            if status:
-                update_fields.append('status = ?')
-                update_values.append(status)
-                if status == 'released':
-                    update_fields.append('released_at = ?')
-                    update_values.append(datetime.now())
-                elif status == 'assigned':
-                    update_fields.append('released_at = NULL')
-            
-            if not update_fields:
-                return jsonify({'success': False, 'error': 'No fields to update'})
+            # Pick the prepared UPDATE for the supplied fields
+            supplied = (
+                bool(resource_type),
+                bool(resource_name),
+                resource_id_field is not None,
+                notes is not None,
+                bool(status),
+            )
+            mask = 0
+            update_values = []
+            for bit, (present, value) in enumerate(zip(supplied, (resource_type, resource_name, resource_id_field, notes, status))):
+                if present:
+                    mask |= 1 << bit
+                    update_values.append(value)
             
-            update_values.extend([resource_id, emergency_id])
+            released_at = None
+            if status == 'released':
+                released_at = 'set'
+                update_values.append(current_time)
+            elif status == 'assigned':
+                released_at = 'clear'
             
-            query = f"""
-                UPDATE emergency_resources
-                SET {', '.join(update_fields)}
-                WHERE id = ? AND emergency_id = ?
-            """
+            if not mask:
+                return json_response({'success': False, 'error': 'No fields to update'})
             
-            c.execute(query, update_values)
+            update_values.extend([resource_id, emergency_id])
+            c.execute(EMERGENCY_RESOURCE_UPDATE_SQL[(mask, released_at)], update_values)
+            conn.commit()
             
-            # Log activity with real-time timestamp
-            current_time = datetime.now()
+            # Log activity
             changes = []
             if resource_type and resource_type != old_resource['resource_type']:
                 changes.append(f"type: {old_resource['resource_type']} → {resource_type}")
@@ -11949,91 +12510,94 @@ def api_update_emergency_resource(emergency_id, resource_id):
             change_desc = f'Updated {old_resource["resource_type"]}: {old_resource["resource_name"]}'
             if changes:
                 change_desc += f' ({", ".join(changes)})'
+            queue_emergency_activity(emergency_id, current_user.id, 'resource_updated', change_desc, current_time)
             
-            c.execute("""
-                INSERT INTO emergency_activity_log
-                (emergency_id, user_id, action_type, action_description, created_at)
-                VALUES (?, ?, 'resource_updated', ?, ?)
-            """, (emergency_id, current_user.id, change_desc, current_time))
-            
-            conn.commit()
-            
-            return jsonify({'success': True})
+            return json_response({'success': True})
         except Exception as e:
             conn.rollback()
             app.logger.error(f"Error updating resource: {e}")
-            return jsonify({'success': False, 'error': 'Database error'})
+            return json_response({'success': False, 'error': 'Database error'})
         finally:
             conn.close()
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+        return json_response({'success': False, 'error': str(e)})
+
+# This would typically query a resources database; for now it is a fixed list
+# of common resources, serialized once together with its ETag.
+AVAILABLE_RESOURCES = [
+    {'type': 'personnel', 'name': 'Emergency Response Team', 'id': 'ERT001', 'available': True},
+    {'type': 'personnel', 'name': 'Medical Team', 'id': 'MED001', 'available': True},
+    {'type': 'vessel', 'name': 'Tugboat Alpha', 'id': 'TUG001', 'available': True},
+    {'type': 'vessel', 'name': 'Tugboat Beta', 'id': 'TUG002', 'available': True},
+    {'type': 'equipment', 'name': 'Fire Suppression System', 'id': 'FSS001', 'available': True},
+    {'type': 'equipment', 'name': 'Emergency Medical Kit', 'id': 'EMK001', 'available': True},
+]
+AVAILABLE_RESOURCES_BODY = json_dumps({'success': True, 'resources': AVAILABLE_RESOURCES})
+AVAILABLE_RESOURCES_ETAG = json_body_etag(AVAILABLE_RESOURCES_BODY)
 
 @app.route('/api/emergency/<emergency_id>/available-resources')
 @login_required
 def api_available_resources(emergency_id):
     """Get available resources for assignment."""
-    try:
-        # This would typically query a resources database
-        # For now, return a list of common resources
-        available_resources = [
-            {'type': 'personnel', 'name': 'Emergency Response Team', 'id': 'ERT001', 'available': True},
-            {'type': 'personnel', 'name': 'Medical Team', 'id': 'MED001', 'available': True},
-            {'type': 'vessel', 'name': 'Tugboat Alpha', 'id': 'TUG001', 'available': True},
-            {'type': 'vessel', 'name': 'Tugboat Beta', 'id': 'TUG002', 'available': True},
-            {'type': 'equipment', 'name': 'Fire Suppression System', 'id': 'FSS001', 'available': True},
-            {'type': 'equipment', 'name': 'Emergency Medical Kit', 'id': 'EMK001', 'available': True},
-        ]
-        
-        return jsonify({'success': True, 'resources': available_resources})
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+    return conditional_json_response(AVAILABLE_RESOURCES_BODY, AVAILABLE_RESOURCES_ETAG)
+
+def build_available_resource_row(row):
+    """Map an available_resources row (id .. notes) to its dashboard JSON dict."""
+    resource_id, resource_type, resource_name, id_field, available, location, notes = row
+    return {
+        'id': resource_id,
+        'type': resource_type,
+        'name': resource_name,
+        'id_field': id_field,
+        'available': bool(available),
+        'location': location,
+        'notes': notes
+    }
+
+CURRENT_AVAILABLE_RESOURCES_SQL = """
+    SELECT id, resource_type, resource_name, resource_id, available, location, notes
+    FROM available_resources
+    ORDER BY resource_type, resource_name
+"""
+
+# Served while the available_resources table is still empty
+DEFAULT_AVAILABLE_RESOURCES_BODY = json_dumps({'success': True, 'resources': [
+    build_available_resource_row((None, r['type'], r['name'], r['id'], r['available'], None, None))
+    for r in AVAILABLE_RESOURCES
+]})
+DEFAULT_AVAILABLE_RESOURCES_ETAG = json_body_etag(DEFAULT_AVAILABLE_RESOURCES_BODY)
 
 @app.route('/api/emergency/current/available-resources')
 @login_required
 def api_current_available_resources():
     """Get available resources (generic endpoint for dashboard)."""
     try:
-        conn = get_db_connection()
+        conn = get_db_connection(readonly=True)
         try:
             c = conn.cursor()
-            c.execute("""
-                SELECT id, resource_type, resource_name, resource_id, available, location, notes, created_at, updated_at
-                FROM available_resources
-                ORDER BY resource_type, resource_name
-            """)
-            
-            resources = []
-            for row in c.fetchall():
-                resource = dict(row)
-                resources.append({
-                    'id': resource['id'],
-                    'type': resource['resource_type'],
-                    'name': resource['resource_name'],
-                    'id_field': resource['resource_id'],
-                    'available': bool(resource['available']),
-                    'location': resource['location'],
-                    'notes': resource['notes']
-                })
-            
-            # If no resources in database, return default list
-            if len(resources) == 0:
-                resources = [
-                    {'id': None, 'type': 'personnel', 'name': 'Emergency Response Team', 'id_field': 'ERT001', 'available': True, 'location': None, 'notes': None},
-                    {'id': None, 'type': 'personnel', 'name': 'Medical Team', 'id_field': 'MED001', 'available': True, 'location': None, 'notes': None},
-                    {'id': None, 'type': 'vessel', 'name': 'Tugboat Alpha', 'id_field': 'TUG001', 'available': True, 'location': None, 'notes': None},
-                    {'id': None, 'type': 'vessel', 'name': 'Tugboat Beta', 'id_field': 'TUG002', 'available': True, 'location': None, 'notes': None},
-                    {'id': None, 'type': 'equipment', 'name': 'Fire Suppression System', 'id_field': 'FSS001', 'available': True, 'location': None, 'notes': None},
-                    {'id': None, 'type': 'equipment', 'name': 'Emergency Medical Kit', 'id_field': 'EMK001', 'available': True, 'location': None, 'notes': None},
-                ]
-            
-            return jsonify({'success': True, 'resources': resources})
+            c.row_factory = None
+            c.execute(CURRENT_AVAILABLE_RESOURCES_SQL)
+            
+            # Stream the table when it has rows; the first batch tells us which
+            first_batch = c.fetchmany(200)
+            if first_batch:
+                response = stream_json_list(conn, c, 'resources', build_available_resource_row, head=first_batch)
+                conn = None
+                return response
+            
+            # If no resources in database, return the default list. It must be
+            # revalidated on every request, since it stops applying as soon as
+            # a resource is created.
+            return conditional_json_response(DEFAULT_AVAILABLE_RESOURCES_BODY,
+                                             DEFAULT_AVAILABLE_RESOURCES_ETAG, max_age=0)
         except Exception as e:
             app.logger.error(f"Error getting available resources: {e}")
-            return jsonify({'success': False, 'error': 'Database error'})
+            return json_response({'success': False, 'error': 'Database error'})
         finally:
-            conn.close()
+            if conn is not None:
+                conn.close()
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+        return json_response({'success': False, 'error': str(e)})
 
 @app.route('/api/available-resources', methods=['POST'])
 @login_required
@@ -12051,28 +12615,32 @@ def api_create_available_resource():
         notes = data.get('notes', '')
         
         if not resource_type or not resource_name:
-            return jsonify({'success': False, 'error': 'Resource type and name are required'})
+            return json_response({'success': False, 'error': 'Resource type and name are required'})
         
         conn = get_db_connection()
         try:
             c = conn.cursor()
-            current_time = datetime.now()
+            # Timestamps come from SQLite ('now' is fixed within a statement,
+            # so both columns match); localtime and %f keep the sub-second
+            # format datetime.now() gives the other rows
             c.execute("""
                 INSERT INTO available_resources
                 (resource_type, resource_name, resource_id, available, location, notes, created_by, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (resource_type, resource_name, resource_id, 1 if available else 0, location, notes, current_user.id, current_time, current_time))
+                VALUES (?, ?, ?, ?, ?, ?, ?,
+                        strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'),
+                        strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'))
+            """, (resource_type, resource_name, resource_id, 1 if available else 0, location, notes, current_user.id))
             
             conn.commit()
-            return jsonify({'success': True, 'resource_id': c.lastrowid})
+            return json_response({'success': True, 'resource_id': c.lastrowid})
         except Exception as e:
             conn.rollback()
             app.logger.error(f"Error creating available resource: {e}")
-            return jsonify({'success': False, 'error': 'Database error'})
+            return json_response({'success': False, 'error': 'Database error'})
         finally:
             conn.close()
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+        return json_response({'success': False, 'error': str(e)})
 
 @app.route('/api/available-resources/<int:resource_id>', methods=['PUT'])
 @login_required
@@ -12090,32 +12658,31 @@ def api_update_available_resource(resource_id):
         notes = data.get('notes')
         
         if not resource_type or not resource_name:
-            return jsonify({'success': False, 'error': 'Resource type and name are required'})
+            return json_response({'success': False, 'error': 'Resource type and name are required'})
         
         conn = get_db_connection()
         try:
             c = conn.cursor()
-            current_time = datetime.now()
             c.execute("""
                 UPDATE available_resources
                 SET resource_type = ?, resource_name = ?, resource_id = ?, available = ?, 
-                    location = ?, notes = ?, updated_at = ?
+                    location = ?, notes = ?, updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime')
                 WHERE id = ?
-            """, (resource_type, resource_name, resource_id_field, 1 if available else 0, location, notes, current_time, resource_id))
+            """, (resource_type, resource_name, resource_id_field, 1 if available else 0, location, notes, resource_id))
             
             if c.rowcount == 0:
-                return jsonify({'success': False, 'error': 'Resource not found'})
+                return json_response({'success': False, 'error': 'Resource not found'})
             
             conn.commit()
-            return jsonify({'success': True})
+            return json_response({'success': True})
         except Exception as e:
             conn.rollback()
             app.logger.error(f"Error updating available resource: {e}")
-            return jsonify({'success': False, 'error': 'Database error'})
+            return json_response({'success': False, 'error': 'Database error'})
         finally:
             conn.close()
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+        return json_response({'success': False, 'error': str(e)})
 
 @app.route('/api/available-resources/<int:resource_id>', methods=['DELETE'])
 @login_required
@@ -12130,59 +12697,78 @@ def api_delete_available_resource(resource_id):
             c.execute("DELETE FROM available_resources WHERE id = ?", (resource_id,))
             
             if c.rowcount == 0:
-                return jsonify({'success': False, 'error': 'Resource not found'})
+                return json_response({'success': False, 'error': 'Resource not found'})
             
             conn.commit()
-            return jsonify({'success': True})
+            return json_response({'success': True})
         except Exception as e:
             conn.rollback()
             app.logger.error(f"Error deleting available resource: {e}")
-            return jsonify({'success': False, 'error': 'Database error'})
+            return json_response({'success': False, 'error': 'Database error'})
         finally:
             conn.close()
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+        return json_response({'success': False, 'error': str(e)})
 
 # ==================== REAL-TIME UPDATES (Server-Sent Events) ====================
 
+# Rows past the stream's id watermark, read a bounded batch at a time
+SSE_BATCH_SIZE = 100
+EMERGENCY_STREAM_SQL = """
+    SELECT id, emergency_id, action_type, created_at
+    FROM emergency_activity_log
+    WHERE id > ?
+    ORDER BY id
+    LIMIT ?
+"""
+
 @app.route('/api/emergency/stream')
 @login_required
 def api_emergency_stream():
-    """Server-Sent Events stream for real-time emergency updates."""
+    """
+    Server-Sent Events stream for real-time emergency updates.
+    
+    The stream holds one connection and only queries when woken by
+    notify_emergency_activity() (or every SSE_RECHECK_INTERVAL seconds for
+    writes made by other processes), sending rows past an id watermark.
+    """
     from flask import Response
     import json as json_module
-    import time
     
     def generate():
-        last_check = time.time()
-        
-        while True:
-            try:
-                conn = get_db_connection()
-                c = conn.cursor()
-                
-                # Check for new activities in the last 5 seconds
-                c.execute("""
-                    SELECT emergency_id, action_type, created_at
-                    FROM emergency_activity_log
-                    WHERE created_at > datetime('now', '-5 seconds')
-                    ORDER BY created_at DESC
-                    LIMIT 10
-                """)
-                
-                activities = c.fetchall()
-                if activities:
+        conn = get_db_connection(readonly=True)
+        try:
+            c = conn.cursor()
+            c.execute("SELECT COALESCE(MAX(id), 0) FROM emergency_activity_log")
+            last_id = c.fetchone()[0]
+            
+            while True:
+                with emergency_activity_cv:
+                    seen = _emergency_activity_seq
+                try:
+                    c.execute(EMERGENCY_STREAM_SQL, (last_id, SSE_BATCH_SIZE))
+                    activities = c.fetchall()
                     for activity in activities:
                         yield f"data: {json_module.dumps({'type': 'activity', 'data': dict(activity)})}\n\n"
+                    if activities:
+                        last_id = activities[-1]['id']
+                    else:
+                        yield ": keepalive\n\n"
+                    if len(activities) == SSE_BATCH_SIZE:
+                        continue  # A full batch: more rows are waiting, read on without sleeping
+                except Exception as e:
+                    yield f"data: {json_module.dumps({'type': 'error', 'error': str(e)})}\n\n"
                 
-                conn.close()
-                time.sleep(2)  # Check every 2 seconds
-                
-            except Exception as e:
-                yield f"data: {json_module.dumps({'type': 'error', 'error': str(e)})}\n\n"
-                time.sleep(5)
+                with emergency_activity_cv:
+                    emergency_activity_cv.wait_for(lambda: _emergency_activity_seq != seen,
+                                                   timeout=SSE_RECHECK_INTERVAL)
+        finally:
+            conn.close()
     
-    return Response(generate(), mimetype='text/event-stream')
+    # Never cache the stream, and ask nginx-style proxies not to buffer it.
+    # Flask-Compress leaves streamed responses alone (COMPRESS_STREAMS=False).
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-store', 'X-Accel-Buffering': 'no'})
 
 @app.route('/api/emergency-report/<emergency_id>')
 @login_required
@@ -12196,27 +12782,41 @@ def api_emergency_report(emergency_id):
             emergency = c.fetchone()
             
             if not emergency:
-                return jsonify({'success': False, 'error': 'Emergency not found'})
+                return json_response({'success': False, 'error': 'Emergency not found'})
             
+            # Copied once: the full row goes out as the report details
             emergency_dict = dict(emergency)
             
+            # The report only changes with the emergency row (and who asks
+            # for it), so clients revalidate against a tag over those and
+            # keep their copy, with its original generated_at, on a 304
+            etag = json_body_etag(json_dumps([current_user.id, emergency_dict]))
+            
             # Create comprehensive report
             report = {
                 'emergency_id': emergency_id,
                 'generated_at': datetime.now().isoformat(),
                 'generated_by': current_user.get_full_name(),
                 'emergency_details': emergency_dict,
-                'summary': f"Emergency {emergency_id} - {emergency_dict.get('emergency_type')} on {emergency_dict.get('ship_name')}"
+                'summary': f"Emergency {emergency_id} - {emergency['emergency_type']} on {emergency['ship_name']}"
             }
             
-            return jsonify({'success': True, 'report': report})
+            return conditional_json_response(json_dumps({'success': True, 'report': report}), etag, max_age=0)
         except Exception as e:
             app.logger.error(f"Error generating report: {e}")
-            return jsonify({'success': False, 'error': 'Database error'})
+            return json_response({'success': False, 'error': 'Database error'})
         finally:
             conn.close()
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+        return json_response({'success': False, 'error': str(e)})
+
+EMERGENCY_AUTHORIZE_SQL = f"""
+    UPDATE emergency_requests
+    SET status = 'authorized', authorized_by = ?,
+        authorized_at = strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'),
+        updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime')
+    WHERE emergency_id = ?{' RETURNING ship_name, emergency_type' if SQLITE_HAS_RETURNING else ''}
+"""
 
 @app.route('/api/emergency-authorize', methods=['POST'])
 @login_required
@@ -12231,56 +12831,51 @@ def api_emergency_authorize():
         auth_code = data.get('auth_code')
 
         if not emergency_id or not auth_code:
-            return jsonify({'success': False, 'error': 'Missing required fields'})
+            return json_response({'success': False, 'error': 'Missing required fields'})
 
         # In a real system, validate the authorization code
         if auth_code != "MARINE2026":
-            return jsonify({'success': False, 'error': 'Invalid authorization code'})
+            return json_response({'success': False, 'error': 'Invalid authorization code'})
 
         conn = get_db_connection()
         try:
             c = conn.cursor()
 
-            # Update emergency status with real-time timestamps
-            current_time = datetime.now()
-            c.execute("""
-                UPDATE emergency_requests
-                SET status = 'authorized', authorized_by = ?, authorized_at = ?, updated_at = ?
-                WHERE emergency_id = ?
-            """, (current_user.id, current_time, current_time, emergency_id))
-
-            # Get emergency details for notification
-            c.execute("SELECT ship_name, emergency_type FROM emergency_requests WHERE emergency_id = ?", (emergency_id,))
+            # Update emergency status with database-side timestamps, reading
+            # back the details needed for the notification in the same statement
+            c.execute(EMERGENCY_AUTHORIZE_SQL, (current_user.id, emergency_id))
+            if not SQLITE_HAS_RETURNING:
+                c.execute("SELECT ship_name, emergency_type FROM emergency_requests WHERE emergency_id = ?", (emergency_id,))
             emergency = c.fetchone()
 
-            conn.commit()
-
-            # Log activity
-            log_activity('emergency_authorized', f'Authorized emergency {emergency_id}')
+            if not emergency:
+                return json_response({'success': False, 'error': 'Emergency not found'})
 
-            # Send notifications to harbour masters
-            c.execute("SELECT user_id FROM users WHERE role = 'harbour_master' AND is_active = 1")
-            harbour_masters = c.fetchall()
+            recipients = active_user_ids('harbour_master', conn=conn)
+            log_activity('emergency_authorized', f'Authorized emergency {emergency_id}', conn=conn)
+            conn.commit()
 
-            for harbour_master in harbour_masters:
-                create_notification(
-                    harbour_master['user_id'],
+            # Notify harbour masters in the background once the update is committed
+            if recipients:
+                queue_notification(
+                    create_notifications_bulk,
+                    recipients,
                     'Emergency Authorized',
                     f'Emergency {emergency_id} ({emergency["ship_name"]}) has been authorized. Immediate action required.',
                     'urgent',
                     '/emergency-requests'
                 )
 
-            return jsonify({'success': True})
+            return json_response({'success': True})
         except Exception as e:
             conn.rollback()
             app.logger.error(f"Error authorizing emergency: {e}")
-            return jsonify({'success': False, 'error': 'Database error'})
+            return json_response({'success': False, 'error': 'Database error'})
         finally:
             conn.close()
     except Exception as e:
         app.logger.error(f"Error in emergency authorization: {e}")
-        return jsonify({'success': False, 'error': str(e)})
+        return json_response({'success': False, 'error': str(e)})
 
 # ==================== MAINTENANCE HANDLER ==========================
 
@@ -12288,9 +12883,10 @@ def api_emergency_authorize():
 @login_required
 def api_get_maintenance_requests():
     """Get maintenance requests (for all users)."""
-    conn = get_db_connection()
+    conn = get_db_connection(readonly=True)
     try:
         c = conn.cursor()
+        c.row_factory = None
 
         # Different views based on role
         if current_user.role == 'harbour_master':
@@ -12299,13 +12895,7 @@ def api_get_maintenance_requests():
                        status, created_at, requested_by
                 FROM maintenance_requests
                 ORDER BY
-                    CASE priority
-                        WHEN 'critical' THEN 1
-                        WHEN 'high' THEN 2
-                        WHEN 'medium' THEN 3
-                        WHEN 'low' THEN 4
-                        ELSE 5
-                    END,
+                    priority_rank,
                     created_at DESC
                 LIMIT 50
             """)
@@ -12320,162 +12910,117 @@ def api_get_maintenance_requests():
                 LIMIT 50
             """, (current_user.id, current_user.id, current_user.email))
 
-        requests = []
-        for row in c.fetchall():
-            request_data = dict(row)
-            requests.append(request_data)
-
-        return jsonify({'success': True, 'requests': requests})
+        # Rows go straight from the cursor to the response; the stream
+        # closes the connection when it finishes.
+        response = stream_json_list(conn, c, 'requests')
+        conn = None
+        return response
     except Exception as e:
         app.logger.error(f"Error getting maintenance requests: {e}")
-        return jsonify({'success': False, 'error': str(e)})
+        return json_response({'success': False, 'error': str(e)})
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
 
 # ==================== MAINTENANCE REQUEST ROUTES ====================
 
+# Query shapes behind api_maintenance_requests, one per (view, status filter)
+# pair and built once so the per-request work is a dict lookup and SQLite's
+# statement cache sees the same text every time.
+# view: (extra columns, owner filter, ORDER BY)
+_MAINTENANCE_LIST_VIEWS = {
+    'crew': (', submitted_by', '(submitted_by = ? OR requested_by = ? OR requested_by = ?)', 'created_at DESC'),
+    'manager': ('', None, 'priority_rank, created_at DESC'),
+    'requester': ('', 'requested_by = ?', 'created_at DESC'),
+}
+MAINTENANCE_LIST_ROLE_VIEWS = {
+    'chief_engineer': 'crew',
+    'captain': 'crew',
+    'harbour_master': 'manager',
+    'port_engineer': 'manager',
+}
+
+def _build_maintenance_list_sql(view, by_status):
+    extra_columns, owner_filter, order_by = _MAINTENANCE_LIST_VIEWS[view]
+    conditions = [cond for cond in (owner_filter, 'status = ?' if by_status else None) if cond]
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    return f"""
+        SELECT request_id, ship_name, maintenance_type, request_type, priority, criticality,
+               status, created_at, requested_by{extra_columns}
+        FROM maintenance_requests
+        {where}
+        ORDER BY {order_by}
+        LIMIT 50
+    """
+
+MAINTENANCE_LIST_SQL = {
+    (view, by_status): _build_maintenance_list_sql(view, by_status)
+    for view in _MAINTENANCE_LIST_VIEWS
+    for by_status in (False, True)
+}
+
 @app.route('/api/maintenance-requests')
 @login_required
 def api_maintenance_requests():
     """Get maintenance requests - filtered by user role and status."""
-    conn = get_db_connection()
+    conn = get_db_connection(readonly=True)
     try:
         c = conn.cursor()
+        c.row_factory = None
         
         # Get status filter from query parameter (default to pending for managers)
         status_filter = request.args.get('status', None)
         
-        # Filter based on user role
-        if current_user.role == 'chief_engineer':
-            # Chief Engineer sees only their own requests (check both submitted_by and requested_by)
-            if status_filter:
-                c.execute("""
-                    SELECT request_id, ship_name, maintenance_type, request_type, priority, criticality,
-                           status, created_at, requested_by, submitted_by
-                    FROM maintenance_requests
-                    WHERE (submitted_by = ? OR requested_by = ? OR requested_by = ?) AND status = ?
-                    ORDER BY created_at DESC
-                    LIMIT 50
-                """, (current_user.id, current_user.id, current_user.email, status_filter))
-            else:
-                c.execute("""
-                    SELECT request_id, ship_name, maintenance_type, request_type, priority, criticality,
-                           status, created_at, requested_by, submitted_by
-                    FROM maintenance_requests
-                    WHERE (submitted_by = ? OR requested_by = ? OR requested_by = ?)
-                    ORDER BY created_at DESC
-                    LIMIT 50
-                """, (current_user.id, current_user.id, current_user.email))
-        elif current_user.role == 'captain':
-            # Captain sees only their own requests (check both submitted_by and requested_by)
-            if status_filter:
-                c.execute("""
-                    SELECT request_id, ship_name, maintenance_type, request_type, priority, criticality,
-                           status, created_at, requested_by, submitted_by
-                    FROM maintenance_requests
-                    WHERE (submitted_by = ? OR requested_by = ? OR requested_by = ?) AND status = ?
-                    ORDER BY created_at DESC
-                    LIMIT 50
-                """, (current_user.id, current_user.id, current_user.email, status_filter))
-            else:
-                c.execute("""
-                    SELECT request_id, ship_name, maintenance_type, request_type, priority, criticality,
-                           status, created_at, requested_by, submitted_by
-                    FROM maintenance_requests
-                    WHERE (submitted_by = ? OR requested_by = ? OR requested_by = ?)
-                    ORDER BY created_at DESC
-                    LIMIT 50
-                """, (current_user.id, current_user.id, current_user.email))
-        elif current_user.role in ['harbour_master', 'port_engineer']:
+        # Every role maps to one of a few fixed query shapes (see MAINTENANCE_LIST_SQL)
+        view = MAINTENANCE_LIST_ROLE_VIEWS.get(current_user.role, 'requester')
+        if view == 'crew':
+            # Own requests, matched on both submitted_by and requested_by
+            params = [current_user.id, current_user.id, current_user.email]
+        elif view == 'requester':
+            params = [current_user.email]
+        else:
+            params = []
+        
+        if view == 'manager':
             # Harbour Master and Port Engineer see pending requests by default
-            if status_filter == 'all':
-                # Show all requests
-                c.execute("""
-                    SELECT request_id, ship_name, maintenance_type, request_type, priority, criticality,
-                           status, created_at, requested_by
-                    FROM maintenance_requests
-                    ORDER BY 
-                        CASE priority
-                            WHEN 'critical' THEN 1
-                            WHEN 'high' THEN 2
-                            WHEN 'medium' THEN 3
-                            WHEN 'low' THEN 4
-                            ELSE 5
-                        END,
-                        created_at DESC
-                    LIMIT 50
-                """)
-            elif status_filter:
-                # Show specific status
-                c.execute("""
-                    SELECT request_id, ship_name, maintenance_type, request_type, priority, criticality,
-                           status, created_at, requested_by
-                    FROM maintenance_requests
-                    WHERE status = ?
-                    ORDER BY 
-                        CASE priority
-                            WHEN 'critical' THEN 1
-                            WHEN 'high' THEN 2
-                            WHEN 'medium' THEN 3
-                            WHEN 'low' THEN 4
-                            ELSE 5
-                        END,
-                        created_at DESC
-                    LIMIT 50
-                """, (status_filter,))
-            else:
-                # Default: show pending requests
-                c.execute("""
-                    SELECT request_id, ship_name, maintenance_type, request_type, priority, criticality,
-                           status, created_at, requested_by
-                    FROM maintenance_requests
-                    WHERE status = 'pending'
-                    ORDER BY 
-                        CASE priority
-                            WHEN 'critical' THEN 1
-                            WHEN 'high' THEN 2
-                            WHEN 'medium' THEN 3
-                            WHEN 'low' THEN 4
-                            ELSE 5
-                        END,
-                        created_at DESC
-                    LIMIT 50
-                """)
+            status = None if status_filter == 'all' else (status_filter or 'pending')
         else:
-            # Other users see only their own requests
-            if status_filter:
-                c.execute("""
-                    SELECT request_id, ship_name, maintenance_type, request_type, priority, criticality,
-                           status, created_at, requested_by
-                    FROM maintenance_requests
-                    WHERE requested_by = ? AND status = ?
-                    ORDER BY created_at DESC
-                    LIMIT 50
-                """, (current_user.email, status_filter))
-            else:
-                c.execute("""
-                    SELECT request_id, ship_name, maintenance_type, request_type, priority, criticality,
-                           status, created_at, requested_by
-                    FROM maintenance_requests
-                    WHERE requested_by = ?
-                    ORDER BY created_at DESC
-                    LIMIT 50
-                """, (current_user.email,))
-
-        requests = []
-        for row in c.fetchall():
-            request_data = dict(row)
-            requests.append(request_data)
+            status = status_filter or None
+        if status is not None:
+            params.append(status)
+        
+        c.execute(MAINTENANCE_LIST_SQL[(view, status is not None)], params)
 
-        return jsonify({'success': True, 'requests': requests})
+        response = stream_json_list(conn, c, 'requests')
+        conn = None
+        return response
     except Exception as e:
         app.logger.error(f"Error getting maintenance requests: {e}")
-        return jsonify({'success': False, 'error': str(e)})
+        return json_response({'success': False, 'error': str(e)})
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
 
 # ==================== MAINTENANCE REQUEST ========================
 
+# Map request_type from form to standardized maintenance types
+# Form sends: maintenance, part, repair, inspection
+MAINTENANCE_REQUEST_TYPES = {
+    'maintenance': 'Maintenance Service',
+    'part': 'Part Replacement',
+    'repair': 'Emergency Repair',
+    'inspection': 'Technical Inspection'
+}
+
+# Map criticality to priority
+CRITICALITY_PRIORITIES = {
+    'emergency': 'critical',
+    'urgent': 'high',
+    'high': 'high',
+    'medium': 'medium',
+    'low': 'low'
+}
+
 @app.route('/api/maintenance-requests', methods=['POST'])
 def api_create_maintenance_request():
     """
@@ -12534,7 +13079,7 @@ def api_create_maintenance_request():
         data = request.get_json()
         
         if not data:
-            return jsonify({'success': False, 'error': 'No request data provided'}), 400
+            return json_response({'success': False, 'error': 'No request data provided'}, 400)
 
         # Extract request data
         ship_name = data.get('ship_name')
@@ -12557,42 +13102,26 @@ def api_create_maintenance_request():
         company = data.get('company')
         notes = data.get('notes')
 
-        # Validate all required fields are present
-        required_fields = [
+        # Validate all required fields are present before touching the database
+        if not all((
             ship_name, imo_number, vessel_type, location, request_type,
             criticality, description, requested_by_name, requested_by_email,
             requested_by_phone
-        ]
-        if not all(required_fields):
-            return jsonify({'success': False, 'error': 'Missing required fields'}), 400
+        )):
+            return json_response({'success': False, 'error': 'Missing required fields'}, 400)
 
         # Generate unique request ID
         request_id = generate_id('MRQ')
 
-        # Map request_type from form to standardized maintenance types
-        # Form sends: maintenance, part, repair, inspection
-        request_type_map = {
-            'maintenance': 'Maintenance Service',
-            'part': 'Part Replacement',
-            'repair': 'Emergency Repair',
-            'inspection': 'Technical Inspection'
-        }
+        # Standardize the maintenance type; all variants submitted through
+        # this form are emergency maintenance requests.
         normalized_request_type = (request_type or '').strip().lower()
-        maintenance_type = request_type_map.get(normalized_request_type, request_type)
-
-        # All variants submitted through this form are emergency maintenance requests.
-        if normalized_request_type in {'maintenance', 'part', 'repair', 'inspection'}:
+        if normalized_request_type in MAINTENANCE_REQUEST_TYPES:
             maintenance_type = 'Emergency Maintenance Request'
+        else:
+            maintenance_type = request_type
 
-        # Map criticality to priority
-        priority_map = {
-            'emergency': 'critical',
-            'urgent': 'high',
-            'high': 'high',
-            'medium': 'medium',
-            'low': 'low'
-        }
-        priority = priority_map.get(criticality, 'medium')
+        priority = CRITICALITY_PRIORITIES.get(criticality, 'medium')
 
         # Automatically assess severity based on description and type
         severity, assessment_details = assess_severity(description, maintenance_type, priority)
@@ -12629,28 +13158,33 @@ def api_create_maintenance_request():
                  part_number, part_name, part_category, quantity, manufacturer,
                  requested_by_name, requested_by_email, requested_by_phone, emergency_contact,
                  imo_number, vessel_type, company, eta, submitted_by)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
+                        strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'),
+                        strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime'),
                         ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 request_id, ship_name, maintenance_type, request_type, priority, criticality, description,
                 location, 'TBD', 'To be assessed', requester_id or requested_by_email,
-                initial_status, severity, assessment_details, initial_status, datetime.now(), datetime.now(),
+                initial_status, severity, assessment_details, initial_status,
                 part_number, part_name, part_category, quantity, manufacturer,
                 requested_by_name, requested_by_email, requested_by_phone, emergency_contact,
                 imo_number, vessel_type, company, eta, submitted_by_id
             ))
 
-            # Log workflow action for audit trail
+            # Log workflow action and activity in the same transaction so the
+            # submission is a single commit
             log_workflow_action(
                 request_id, initial_status, requester_id,
-                f'Maintenance request for {ship_name}. Auto-assessed: {severity}'
+                f'Maintenance request for {ship_name}. Auto-assessed: {severity}',
+                conn=conn
             )
 
             # Log activity (if authenticated user)
             if current_user.is_authenticated:
                 log_activity(
                     'maintenance_request_created',
-                    f'Created request {request_id} for {ship_name}. Severity: {severity}'
+                    f'Created request {request_id} for {ship_name}. Severity: {severity}',
+                    conn=conn
                 )
             else:
                 app.logger.info(
@@ -12661,27 +13195,115 @@ def api_create_maintenance_request():
             
             app.logger.info(f"Successfully created maintenance request {request_id} with submitted_by: {submitted_by_id}")
 
-            # Send notifications based on severity level
-            notify_on_severity(request_id, severity)
+            # Send notifications based on severity level without holding up the response
+            queue_notification(notify_on_severity, request_id, severity)
 
-            return jsonify({
+            return json_response({
                 'success': True,
                 'request_id': request_id,
                 'severity': severity,
                 'message': f'Request submitted successfully. Auto-assessed: {severity}'
-            }), 201
+            }, 201)
 
         except Exception as e:
             conn.rollback()
             app.logger.error(f"Database error creating maintenance request: {e}", exc_info=True)
-            return jsonify({'success': False, 'error': 'Failed to create maintenance request'}), 500
+            return json_response({'success': False, 'error': 'Failed to create maintenance request'}, 500)
         finally:
             conn.close()
 
     except Exception as e:
         app.logger.error(f"Error processing maintenance request: {e}", exc_info=True)
-        return jsonify({'success': False, 'error': 'Failed to process request'}), 500
+        return json_response({'success': False, 'error': 'Failed to process request'}, 500)
+
+
+# Uploaded files are copied to disk straight from the request stream in
+# chunks of this size, rather than FileStorage.save()'s 16 KiB default
+UPLOAD_COPY_CHUNK_SIZE = 1024 * 1024
+
+# Names secure_filename() would return unchanged: ASCII letters, digits, '.',
+# '_' and '-', not starting or ending with '.' or '_'
+_SAFE_FILENAME_RE = re.compile(r'[A-Za-z0-9-](?:[A-Za-z0-9._-]*[A-Za-z0-9-])?')
+
+def upload_filename(filename):
+    """secure_filename() with a fast path for names that are already safe."""
+    if os.name != 'nt' and _SAFE_FILENAME_RE.fullmatch(filename):
+        return filename
+    return secure_filename(filename)
+
+
+def copy_upload_stream(stream, out):
+    """Copy an uploaded part into the open file ``out``.
+
+    Parts over Werkzeug's in-memory threshold are already spooled to a
+    temporary file; those are copied with os.sendfile() so the data stays in
+    the kernel. Anything else is read through in chunks.
+    """
+    src_fd = None
+    if hasattr(os, 'sendfile') and not (
+            isinstance(stream, tempfile.SpooledTemporaryFile) and not getattr(stream, '_rolled', False)):
+        try:
+            src_fd = stream.fileno()
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            src_fd = None
+
+    if src_fd is None:
+        shutil.copyfileobj(stream, out, UPLOAD_COPY_CHUNK_SIZE)
+        return
+
+    offset = stream.tell()
+    while True:
+        sent = os.sendfile(out.fileno(), src_fd, offset, UPLOAD_COPY_CHUNK_SIZE * 8)
+        if not sent:
+            break
+        offset += sent
+    stream.seek(offset)
+
+
+def upload_size(f):
+    """Size of an uploaded part, measured on its already-received stream."""
+    stream = f.stream
+    start = stream.tell()
+    size = stream.seek(0, os.SEEK_END) - start
+    stream.seek(start)
+    return size
+
+
+def save_upload(f, save_path, expected_size):
+    """Write an uploaded FileStorage of ``expected_size`` bytes to ``save_path`` and return its size."""
+    with open(save_path, 'wb', buffering=0) as out:
+        # Reserve the space in one extent; a short copy is truncated below
+        if expected_size > UPLOAD_COPY_CHUNK_SIZE and hasattr(os, 'posix_fallocate'):
+            os.posix_fallocate(out.fileno(), 0, expected_size)
+        copy_upload_stream(f.stream, out)
+        file_size = out.tell()
+        if file_size < expected_size:
+            out.truncate(file_size)
+    return file_size
+
+
+MAINTENANCE_ATTACHMENT_INSERT_SQL = """
+    INSERT INTO maintenance_request_attachments
+    (id, request_id, original_filename, stored_filename, file_size, uploader_id, uploaded_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Lists a request's attachments in the same statement that checks the
+# request exists: an unknown request gives no rows, a request without
+# attachments gives a single row of NULLs
+MAINTENANCE_ATTACHMENTS_SQL = """
+    SELECT a.id, a.original_filename, a.stored_filename, a.file_size, a.uploaded_at, a.uploader_id
+    FROM maintenance_requests r
+    LEFT JOIN maintenance_request_attachments a ON a.request_id = r.request_id
+    WHERE r.request_id = ?
+    ORDER BY a.uploaded_at DESC
+"""
 
+# Multi-file uploads are written to disk concurrently; the copies spend
+# their time in sendfile()/write() with the GIL released
+UPLOAD_WRITE_WORKERS = 4
+_upload_executor = ThreadPoolExecutor(max_workers=UPLOAD_WRITE_WORKERS,
+                                      thread_name_prefix='upload-write')
 
 @app.route('/api/maintenance-requests/<request_id>/attachments/upload', methods=['POST'])
 def api_upload_maintenance_attachments(request_id):
@@ -12692,56 +13314,80 @@ def api_upload_maintenance_attachments(request_id):
     files = request.files.getlist('files') or request.files.getlist('file')
     saved = []
 
-    # Create target folder for this request
     safe_request_id = secure_filename(request_id)
     target_folder = os.path.join(app.config['UPLOAD_FOLDER'], 'maintenance_requests', safe_request_id)
-    os.makedirs(target_folder, exist_ok=True)
 
     conn = get_db_connection()
     try:
         c = conn.cursor()
-        
-        # Verify request exists
-        c.execute("SELECT request_id FROM maintenance_requests WHERE request_id = ?", (request_id,))
-        if not c.fetchone():
-            return jsonify(success=False, error='Maintenance request not found'), 404
 
-        for f in files:
+        # Files are written as they come; their rows go in with one executemany(),
+        # whose request_id foreign key also rejects an unknown request
+        uploader_id = current_user.id if current_user.is_authenticated else None
+        uploaded_at = datetime.now()
+        # One clock read per request; the index keeps names from the same
+        # second apart, even when two files share an original name
+        prefix = uploaded_at.strftime('%Y%m%d%H%M%S')
+        rel_prefix = posixpath.join('maintenance_requests', safe_request_id)
+        # The whole body is capped by MAX_CONTENT_LENGTH before it is parsed;
+        # oversized files are skipped here, before anything is written
+        max_file_size = app.config['MAX_ATTACHMENT_BYTES']
+        uploads = []
+        for i, f in enumerate(files):
             if f and f.filename:
                 if not allowed_file(f.filename):
                     continue
+                size = upload_size(f)
+                if size > max_file_size:
+                    continue
                     
                 orig = f.filename
-                timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-                stored_name = f"{timestamp}_{secure_filename(orig)}"
-                save_path = os.path.join(target_folder, stored_name)
-                f.save(save_path)
-                file_size = os.path.getsize(save_path)
-
-                attachment_id = generate_id('ATT')
-                uploader_id = current_user.id if current_user.is_authenticated else None
-                
-                c.execute('''
-                    INSERT INTO maintenance_request_attachments 
-                    (id, request_id, original_filename, stored_filename, file_size, uploader_id, uploaded_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (attachment_id, request_id, orig, 
-                      os.path.join('maintenance_requests', safe_request_id, stored_name), 
-                      file_size, uploader_id, datetime.now()))
-                
-                saved.append({
-                    'id': attachment_id,
-                    'original_filename': orig,
-                    'stored_filename': stored_name,
-                    'file_size': file_size
-                })
+                stored_name = f"{prefix}_{i:03d}_{upload_filename(orig)}"
+                uploads.append((f, orig, stored_name, size))
+
+        # Nothing to write or insert, so no folder, transaction or commit either
+        if not uploads:
+            return jsonify(success=False, error='No allowed files'), 400
+
+        # Create target folder for this request
+        os.makedirs(target_folder, exist_ok=True)
+        save_paths = [os.path.join(target_folder, u[2]) for u in uploads]
+        if len(uploads) > 1:
+            sizes = list(_upload_executor.map(save_upload, [u[0] for u in uploads], save_paths,
+                                              [u[3] for u in uploads]))
+        else:
+            sizes = [save_upload(u[0], path, u[3]) for u, path in zip(uploads, save_paths)]
+
+        rows = []
+        for (f, orig, stored_name, _), file_size in zip(uploads, sizes):
+            attachment_id = generate_id('ATT')
+            rows.append((attachment_id, request_id, orig,
+                         posixpath.join(rel_prefix, stored_name),
+                         file_size, uploader_id, uploaded_at))
+
+            saved.append({
+                'id': attachment_id,
+                'original_filename': orig,
+                'stored_filename': stored_name,
+                'file_size': file_size
+            })
 
+        c.executemany(MAINTENANCE_ATTACHMENT_INSERT_SQL, rows)
         conn.commit()
         return jsonify(success=True, saved=saved, message=f'Uploaded {len(saved)} files')
     
+    except sqlite3.IntegrityError:
+        conn.rollback()
+        for item in saved:
+            os.remove(os.path.join(target_folder, item['stored_filename']))
+        try:
+            os.rmdir(target_folder)
+        except OSError:
+            pass  # Not empty: it holds earlier uploads
+        return jsonify(success=False, error='Maintenance request not found'), 404
     except Exception as e:
         conn.rollback()
-        app.logger.error(f"Error uploading maintenance request attachments: {e}")
+        app.logger.error("Error uploading maintenance request attachments: %s", e)
         return jsonify(success=False, error=str(e)), 500
     finally:
         conn.close()
@@ -12750,34 +13396,156 @@ def api_upload_maintenance_attachments(request_id):
 @app.route('/api/maintenance-requests/<request_id>/attachments', methods=['GET'])
 def api_get_maintenance_attachments(request_id):
     """Get all attachments for a maintenance request."""
-    conn = get_db_connection()
+    conn = get_db_connection(readonly=True)
     try:
         c = conn.cursor()
+        c.row_factory = None
         
-        # Verify request exists
-        c.execute("SELECT request_id FROM maintenance_requests WHERE request_id = ?", (request_id,))
-        if not c.fetchone():
+        c.execute(MAINTENANCE_ATTACHMENTS_SQL, (request_id,))
+        first_batch = c.fetchmany(200)
+        if not first_batch:
             return jsonify(success=False, error='Maintenance request not found'), 404
-
-        c.execute('''
-            SELECT id, original_filename, stored_filename, file_size, uploaded_at, uploader_id
-            FROM maintenance_request_attachments
-            WHERE request_id = ?
-            ORDER BY uploaded_at DESC
-        ''', (request_id,))
+        if first_batch[0][0] is None:
+            return jsonify(success=True, attachments=[])
         
-        attachments = [dict(row) for row in c.fetchall()]
-        return jsonify(success=True, attachments=attachments)
+        # Stream the list from the batch already read onwards
+        response = stream_json_list(conn, c, 'attachments', head=first_batch)
+        conn = None
+        return response
     
     except Exception as e:
-        app.logger.error(f"Error fetching maintenance request attachments: {e}")
+        app.logger.error("Error fetching maintenance request attachments: %s", e)
         return jsonify(success=False, error=str(e)), 500
     finally:
-        conn.close()
+        if conn is not None:
+            conn.close()
 
 # ==================== DATABASE INITIALIZATION ====================
 
-def ensure_port_engineer_account(c, conn):
+# Columns added to emergency_requests after its first release
+EMERGENCY_REQUEST_ADDED_COLUMNS = [
+    ('location_name', 'TEXT'),
+    ('latitude', 'REAL'),
+    ('longitude', 'REAL'),
+]
+
+# Columns added to maintenance_requests after its first release, in the order
+# existing databases received them
+MAINTENANCE_REQUEST_ADDED_COLUMNS = [
+    # Approval workflow
+    ('approved', 'INTEGER DEFAULT 0'),
+    ('approved_by', 'TEXT'),
+    ('approved_at', 'TIMESTAMP'),
+    ('rejection_reason', 'TEXT'),
+    ('updated_at', 'TIMESTAMP'),
+    ('captain_comments', 'TEXT'),
+    ('rejected_by', 'TEXT'),
+    ('rejected_at', 'TIMESTAMP'),
+    ('criticality', "TEXT DEFAULT 'medium'"),
+    # Severity assessment and workflow tracking
+    ('severity', "TEXT DEFAULT 'MINOR'"),
+    ('assessment_details', 'TEXT'),
+    ('workflow_status', "TEXT DEFAULT 'submitted'"),
+    ('assigned_pm', 'TEXT'),
+    ('pm_approval_at', 'TIMESTAMP'),
+    # Part information
+    ('part_number', 'TEXT'),
+    ('part_name', 'TEXT'),
+    ('part_category', 'TEXT'),
+    ('quantity', 'INTEGER'),
+    ('manufacturer', 'TEXT'),
+    # Contact information
+    ('requested_by_name', 'TEXT'),
+    ('requested_by_email', 'TEXT'),
+    ('requested_by_phone', 'TEXT'),
+    ('emergency_contact', 'TEXT'),
+    ('imo_number', 'TEXT'),
+    ('vessel_type', 'TEXT'),
+    ('company', 'TEXT'),
+    ('eta', 'TEXT'),
+    # Who submitted the request (chief engineer, captain, etc.)
+    ('submitted_by', 'TEXT'),
+    # Sort key for the priority ordering of the request queues. SQLite computes
+    # it (VIRTUAL, since ALTER TABLE cannot add STORED generated columns) so it
+    # can be indexed and the queues read rows in index order without a CASE sort.
+    ('priority_rank', """INTEGER
+        GENERATED ALWAYS AS (
+            CASE priority
+                WHEN 'critical' THEN 1
+                WHEN 'high' THEN 2
+                WHEN 'medium' THEN 3
+                WHEN 'low' THEN 4
+                ELSE 5
+            END
+        ) VIRTUAL"""),
+    ('request_type', 'TEXT'),
+    ('notes', 'TEXT'),
+]
+
+# Every ADD COLUMN migration init_db() applies, per table. Tables are created
+# by SCHEMA_DDL first, so each list only matters for databases that predate
+# its columns.
+SCHEMA_ADDED_COLUMNS = {
+    'users': [
+        ('signature_path', 'TEXT'),
+        ('is_online', 'INTEGER DEFAULT 0'),
+        # 2FA fields and the DMPO HQ officer access_expiry
+        ('two_factor_enabled', 'INTEGER DEFAULT 0'),
+        ('two_factor_secret', 'TEXT'),
+        ('access_expiry', 'TIMESTAMP'),
+    ],
+    'emergency_requests': EMERGENCY_REQUEST_ADDED_COLUMNS,
+    'maintenance_requests': MAINTENANCE_REQUEST_ADDED_COLUMNS,
+    # Message edit tracking
+    'messaging_system': [('edited_at', 'TIMESTAMP')],
+    # Reply context and edit tracking
+    'message_replies': [
+        ('reply_to_message_id', 'TEXT'),
+        ('edited_at', 'TIMESTAMP'),
+    ],
+    'crew_members': [
+        ('profile_picture', 'TEXT'),
+        ('specialized_certificates', 'TEXT'),
+    ],
+}
+
+def add_missing_columns(c, table, columns):
+    """
+    Add the columns of ``table`` that an older database does not have yet.
+    
+    The existing columns are read once with PRAGMA table_xinfo (which, unlike
+    table_info, also lists generated columns), so an up-to-date schema costs
+    a single pragma instead of one failing ALTER TABLE per column.
+    
+    Args:
+        c: Database cursor
+        table (str): Table to migrate
+        columns (list): (name, declaration) pairs, added in order
+    
+    Returns:
+        list: Names of the columns that were added
+    """
+    existing = {row[1] for row in c.execute(f"PRAGMA table_xinfo({table})")}
+    added = []
+    for name, declaration in columns:
+        if name not in existing:
+            c.execute(f"ALTER TABLE {table} ADD COLUMN {name} {declaration}")
+            added.append(name)
+    return added
+
+# Hashes of the demo account passwords, made once with generate_password_hash()
+# so booting does not spend a deliberately slow key derivation on each of them
+DEMO_PASSWORD_HASHES = {
+    'Engineer@2026': 'scrypt:32768:8:1$FU9VK8x8XWJrd25Y$e8862150cf66f932478815167ae0227dfba8baf843b8270eead89bb6722dbef2c4af1b411970a10252c9d6250db3805c6ca1d9fa935d386994605ae161c76a7a',
+    'Quality@2026': 'scrypt:32768:8:1$ExHDkw5rik1V0fIX$914165e7f23095c89e8ea502c1186e05eaa320e39948845ebb9883e8d2d694089a084bb4db468cc88d63f6c03ecdb3ae2c76153c0a89000298d578fc03ba19b8',
+    'Harbour@2026': 'scrypt:32768:8:1$h1l9MHIpqf5Ur4Ro$cfffa583f22d7170fb429032dd4fe7a6cf8bb91ac41ffecca9752f94c683f07d1a39dec8eff2a785e3fdd44731e2f8f5fc3fcfbb587a8214ce90910aaf3d15f3',
+}
+
+def demo_password_hash(password):
+    """Stored hash for a demo password, hashing it only if it has no precomputed one."""
+    return DEMO_PASSWORD_HASHES.get(password) or generate_password_hash(password)
+
+def ensure_port_engineer_account(c, conn, commit=True, log=print):
     """
     Ensure port engineer account exists and is active.
     This function checks if the account exists and creates or updates it as needed.
@@ -12785,13 +13553,20 @@ def ensure_port_engineer_account(c, conn):
     Args:
         c: Database cursor
         conn: Database connection
+        commit (bool): Commit any change; False leaves it in the caller's transaction
+        log (callable): Receives each progress line; print by default
     """
     try:
         # Check if account exists
-        c.execute("SELECT user_id, is_active, is_approved FROM users WHERE email = 'port_engineer@marine.com'")
+        c.execute("SELECT user_id, email, role, is_active, is_approved FROM users WHERE email = 'port_engineer@marine.com'")
         user = c.fetchone()
+        result = None
         
-        if user:
+        if user and user['is_active'] and user['is_approved'] and user['role'] == 'port_engineer':
+            # Already provisioned: nothing to write or re-read on this boot
+            result = user
+            log(f"[OK] Port engineer account already active: {user['user_id']}")
+        elif user:
             user_id = user['user_id']
             # Update account to ensure it's active and approved
             c.execute('''
@@ -12799,32 +13574,35 @@ def ensure_port_engineer_account(c, conn):
                 SET is_active = 1, is_approved = 1, role = 'port_engineer'
                 WHERE email = 'port_engineer@marine.com'
             ''')
-            conn.commit()
-            print(f"[OK] Port engineer account updated: {user_id}")
+            if commit:
+                conn.commit()
+            log(f"[OK] Port engineer account updated: {user_id}")
         else:
             # Create new account
             pe_id = 'PE001'
-            hashed_password = generate_password_hash('Engineer@2026')
+            hashed_password = demo_password_hash('Engineer@2026')
             c.execute('''
                 INSERT INTO users (user_id, email, password, first_name, last_name, rank, role, phone, department, location, is_approved, is_active)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (pe_id, 'port_engineer@marine.com', hashed_password, 'John', 'Smith', 'Port Engineer', 'port_engineer', '+1234567890', 'Management', 'Headquarters', 1, 1))
-            conn.commit()
-            print("[OK] Port engineer account created successfully!")
+            if commit:
+                conn.commit()
+            log("[OK] Port engineer account created successfully!")
         
-        # Verify the account
-        c.execute("SELECT user_id, email, role, is_active, is_approved FROM users WHERE email = 'port_engineer@marine.com'")
-        result = c.fetchone()
+        # Verify the account after any write
+        if result is None:
+            c.execute("SELECT user_id, email, role, is_active, is_approved FROM users WHERE email = 'port_engineer@marine.com'")
+            result = c.fetchone()
         if result:
-            print("\n[INFO] Account Details:")
-            print(f"   User ID: {result['user_id']}")
-            print(f"   Email: {result['email']}")
-            print(f"   Role: {result['role']}")
-            print(f"   Active: {'Yes' if result['is_active'] else 'No'}")
-            print(f"   Approved: {'Yes' if result['is_approved'] else 'No'}")
-            print("\n[OK] You can now log in with:")
-            print("   Email: port_engineer@marine.com")
-            print("   Password: Engineer@2026")
+            log("\n[INFO] Account Details:")
+            log(f"   User ID: {result['user_id']}")
+            log(f"   Email: {result['email']}")
+            log(f"   Role: {result['role']}")
+            log(f"   Active: {'Yes' if result['is_active'] else 'No'}")
+            log(f"   Approved: {'Yes' if result['is_approved'] else 'No'}")
+            log("\n[OK] You can now log in with:")
+            log("   Email: port_engineer@marine.com")
+            log("   Password: Engineer@2026")
         
     except Exception as e:
         print(f"[ERROR] Error ensuring port engineer account: {e}")
@@ -12866,52 +13644,49 @@ DEMO_ACCOUNTS = [
 ]
 
 
-def ensure_demo_accounts(c, conn):
-    """Create/update demo accounts so they are always login-ready."""
-    for account in DEMO_ACCOUNTS:
-        hashed_password = generate_password_hash(account["password"])
-        c.execute("SELECT user_id FROM users WHERE email = ?", (account["email"],))
-        existing = c.fetchone()
-        if existing:
-            c.execute(
-                """
-                UPDATE users
-                SET password = ?, first_name = ?, last_name = ?, rank = ?, role = ?,
-                    is_active = 1, is_approved = 1, survey_end_date = ?
-                WHERE email = ?
-                """,
-                (
-                    hashed_password,
-                    account["first_name"],
-                    account["last_name"],
-                    account["rank"],
-                    account["role"],
-                    account["survey_end_date"],
-                    account["email"],
-                ),
-            )
-        else:
-            c.execute(
-                """
-                INSERT INTO users
-                (user_id, email, password, first_name, last_name, rank, role, survey_end_date, is_approved, is_active)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    account["user_id"],
-                    account["email"],
-                    hashed_password,
-                    account["first_name"],
-                    account["last_name"],
-                    account["rank"],
-                    account["role"],
-                    account["survey_end_date"],
-                    1,
-                    1,
-                ),
+def ensure_demo_accounts(c, conn, commit=True):
+    """
+    Create/update demo accounts so they are always login-ready.
+
+    Each account is written with a single upsert keyed on the unique email,
+    which leaves the row untouched when it is already in the expected state.
+    Pass commit=False to leave the changes in the caller's transaction.
+    """
+    c.executemany(
+        """
+        INSERT INTO users
+        (user_id, email, password, first_name, last_name, rank, role, survey_end_date, is_approved, is_active)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1, 1)
+        ON CONFLICT(email) DO UPDATE
+        SET password = excluded.password, first_name = excluded.first_name,
+            last_name = excluded.last_name, rank = excluded.rank, role = excluded.role,
+            is_active = 1, is_approved = 1, survey_end_date = excluded.survey_end_date
+        WHERE users.password IS NOT excluded.password
+           OR users.first_name IS NOT excluded.first_name
+           OR users.last_name IS NOT excluded.last_name
+           OR users.rank IS NOT excluded.rank
+           OR users.role IS NOT excluded.role
+           OR users.is_active IS NOT 1
+           OR users.is_approved IS NOT 1
+           OR users.survey_end_date IS NOT excluded.survey_end_date
+        """,
+        [
+            (
+                account["user_id"],
+                account["email"],
+                demo_password_hash(account["password"]),
+                account["first_name"],
+                account["last_name"],
+                account["rank"],
+                account["role"],
+                account["survey_end_date"],
             )
+            for account in DEMO_ACCOUNTS
+        ],
+    )
 
-    conn.commit()
+    if commit:
+        conn.commit()
 
 
 VESSEL_OPTIONAL_COLUMNS = [
@@ -12950,12 +13725,7 @@ VESSEL_OPTIONAL_COLUMNS = [
 
 def ensure_vessels_optional_columns(cursor):
     """Apply non-destructive vessel schema migrations for legacy databases."""
-    for col_name, col_type in VESSEL_OPTIONAL_COLUMNS:
-        try:
-            cursor.execute(f"ALTER TABLE vessels ADD COLUMN {col_name} {col_type}")
-        except sqlite3.OperationalError:
-            # Column already exists on newer databases.
-            pass
+    add_missing_columns(cursor, 'vessels', VESSEL_OPTIONAL_COLUMNS)
 
 
 def ensure_vessels_schema(cursor):
@@ -13024,1223 +13794,1075 @@ def ensure_vessels_schema(cursor):
         )
     ''')
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_vessel_name ON vessels (vessel_name)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_vessel_imo ON vessels (imo_number)")
+    # imo_number is UNIQUE, so its autoindex already serves IMO lookups
+    cursor.execute("DROP INDEX IF EXISTS idx_vessel_imo")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_vessel_type ON vessels (vessel_type)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_vessel_status ON vessels (status)")
     ensure_vessels_optional_columns(cursor)
 
 
-def init_db():
+# Every table and index init_db() creates unconditionally, applied with one
+# executescript(). Indexes over columns that older databases only gain
+# through a migration are created in init_db() after that migration.
+# Foreign key columns are indexed, so joins from the parent and the child
+# lookups foreign_keys=ON makes on parent updates and deletes are searches
+# rather than table scans (inventory_file_parts.file_id is already covered
+# by its UNIQUE (file_id, part_number) index).
+# Narrow tables keyed by a TEXT id are declared WITHOUT ROWID, keeping each
+# row in its primary key b-tree instead of a rowid table plus a separate
+# autoindex on the key. Tables carrying message bodies, notes or signatures
+# keep their rowid: large rows in a WITHOUT ROWID b-tree make it deeper.
+# The clause only applies when a table is first created.
+# STRICT tables (SQLite 3.37+) store every value with its declared type
+# instead of converting by affinity on each write. Only tables written
+# purely with typed Python values use it: STRICT has no TIMESTAMP type and
+# rejects the raw form values most report handlers bind.
+STRICT_TABLE_OPTION = 'STRICT, ' if sqlite3.sqlite_version_info >= (3, 37, 0) else ''
+
+SCHEMA_DDL = """
+    -- Create users table
+    CREATE TABLE IF NOT EXISTS users (
+        user_id TEXT PRIMARY KEY,
+        email TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        first_name TEXT NOT NULL,
+        last_name TEXT NOT NULL,
+        rank TEXT,
+        role TEXT NOT NULL,
+        phone TEXT,
+        department TEXT,
+        location TEXT,
+        profile_pic TEXT,
+        signature_path TEXT,
+        is_active INTEGER DEFAULT 1,
+        is_approved INTEGER DEFAULT 0,
+        survey_end_date DATE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_login TIMESTAMP,
+        last_activity TIMESTAMP
+    );
+
+    -- Create activity_logs table
+    CREATE TABLE IF NOT EXISTS activity_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        activity TEXT NOT NULL,
+        details TEXT,
+        ip_address TEXT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (user_id)
+    );
+
+    -- Create comprehensive audit_trail table for real-time tracking
+    CREATE TABLE IF NOT EXISTS audit_trail (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        user_id TEXT,
+        action_type TEXT NOT NULL,
+        entity_type TEXT NOT NULL,
+        entity_id TEXT,
+        old_value TEXT,
+        new_value TEXT,
+        ip_address TEXT,
+        status TEXT DEFAULT 'completed',
+        error_message TEXT,
+        FOREIGN KEY (user_id) REFERENCES users (user_id)
+    );
+
+    -- Create system_events table for real-time system monitoring
+    CREATE TABLE IF NOT EXISTS system_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        event_type TEXT NOT NULL,
+        entity_type TEXT NOT NULL,
+        entity_id TEXT,
+        event_data TEXT,
+        severity TEXT DEFAULT 'info',
+        processed INTEGER DEFAULT 0
+    );
+
+    -- Create update_history table to track all changes with timestamps
+    CREATE TABLE IF NOT EXISTS update_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        table_name TEXT NOT NULL,
+        record_id TEXT NOT NULL,
+        field_name TEXT NOT NULL,
+        old_value TEXT,
+        new_value TEXT,
+        user_id TEXT,
+        change_reason TEXT
+    );
+
+    -- Create user_documents table
+    CREATE TABLE IF NOT EXISTS user_documents (
+        id TEXT PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        document_name TEXT NOT NULL,
+        document_type TEXT,
+        document_path TEXT NOT NULL,
+        file_size INTEGER,
+        uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (user_id)
+    );
+
+    -- Create inventory_documents table to store multiple documents per inventory item
+    CREATE TABLE IF NOT EXISTS inventory_documents (
+        id TEXT PRIMARY KEY,
+        part_number TEXT NOT NULL,
+        original_filename TEXT NOT NULL,
+        stored_filename TEXT NOT NULL,
+        uploader_id TEXT,
+        file_size INTEGER,
+        uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (uploader_id) REFERENCES users (user_id)
+    );
+
+    -- Create service_evaluations table for SQI - FIXED VERSION
+    CREATE TABLE IF NOT EXISTS service_evaluations (
+        id TEXT PRIMARY KEY,
+        evaluator_id TEXT NOT NULL,
+        vessel_id TEXT,
+        sqi_score REAL,
+        evaluation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        notes TEXT,
+        status TEXT DEFAULT 'completed',
+        FOREIGN KEY (evaluator_id) REFERENCES users (user_id)
+    );
+
+    -- Create notifications table
+    CREATE TABLE IF NOT EXISTS notifications (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        title TEXT NOT NULL,
+        message TEXT NOT NULL,
+        type TEXT DEFAULT 'info',
+        action_url TEXT,
+        is_read INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (user_id)
+    );
+    -- Per-user feeds read newest first; mark-all-read uses the user_id prefix
+    CREATE INDEX IF NOT EXISTS idx_notifications_user_created ON notifications (user_id, created_at DESC);
+
+    -- Create notification_preferences table for user notification settings
+    CREATE TABLE IF NOT EXISTS notification_preferences (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL UNIQUE,
+        sound_enabled INTEGER DEFAULT 1,
+        browser_notifications INTEGER DEFAULT 1,
+        email_notifications INTEGER DEFAULT 1,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (user_id)
+    );
+
+    -- Create emergency_requests table
+    CREATE TABLE IF NOT EXISTS emergency_requests (
+        emergency_id TEXT PRIMARY KEY,
+        ship_name TEXT NOT NULL,
+        emergency_type TEXT NOT NULL,
+        severity_level TEXT NOT NULL,
+        description TEXT,
+        immediate_actions TEXT,
+        resources_required TEXT,
+        reported_by TEXT,
+        -- Location & map integration
+        location_name TEXT,
+        latitude REAL,
+        longitude REAL,
+        status TEXT DEFAULT 'pending',
+        authorized_by TEXT,
+        authorized_at TIMESTAMP,
+        resolved_at TIMESTAMP,
+        closed_at TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (reported_by) REFERENCES users (user_id),
+        FOREIGN KEY (authorized_by) REFERENCES users (user_id)
+    );
+
+    -- Create emergency_activity_log table for timeline/audit trail
+    CREATE TABLE IF NOT EXISTS emergency_activity_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        emergency_id TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        action_type TEXT NOT NULL,
+        action_description TEXT,
+        old_status TEXT,
+        new_status TEXT,
+        metadata TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (emergency_id) REFERENCES emergency_requests (emergency_id),
+        FOREIGN KEY (user_id) REFERENCES users (user_id)
+    );
+
+    -- Create emergency_messages table for communication hub
+    CREATE TABLE IF NOT EXISTS emergency_messages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        emergency_id TEXT NOT NULL,
+        sender_id TEXT NOT NULL,
+        message TEXT NOT NULL,
+        attachment_path TEXT,
+        is_system_message INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (emergency_id) REFERENCES emergency_requests (emergency_id),
+        FOREIGN KEY (sender_id) REFERENCES users (user_id)
+    );
+
+    -- Create available_resources table for system-wide resource management
+    CREATE TABLE IF NOT EXISTS available_resources (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        resource_type TEXT NOT NULL,
+        resource_name TEXT NOT NULL,
+        resource_id TEXT,
+        available INTEGER DEFAULT 1,
+        location TEXT,
+        notes TEXT,
+        created_by TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP,
+        FOREIGN KEY (created_by) REFERENCES users (user_id)
+    );
+
+    -- Create emergency_resources table for resource tracking
+    CREATE TABLE IF NOT EXISTS emergency_resources (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        emergency_id TEXT NOT NULL,
+        resource_type TEXT NOT NULL,
+        resource_name TEXT NOT NULL,
+        resource_id TEXT,
+        assigned_by TEXT,
+        status TEXT DEFAULT 'assigned',
+        assigned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        released_at TIMESTAMP,
+        notes TEXT,
+        FOREIGN KEY (emergency_id) REFERENCES emergency_requests (emergency_id),
+        FOREIGN KEY (assigned_by) REFERENCES users (user_id)
+    );
+
+    -- Create emergency_status_history table
+    CREATE TABLE IF NOT EXISTS emergency_status_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        emergency_id TEXT NOT NULL,
+        old_status TEXT,
+        new_status TEXT NOT NULL,
+        changed_by TEXT NOT NULL,
+        change_reason TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (emergency_id) REFERENCES emergency_requests (emergency_id),
+        FOREIGN KEY (changed_by) REFERENCES users (user_id)
+    );
+    -- Emergency timeline lookups: one index per child table matching the
+    -- endpoint's filter and (timestamp DESC, id DESC) keyset order (the users
+    -- join already probes the primary key index). idx_em_emergency_created is
+    -- read backwards, which gives that order through its implicit rowid.
+    DROP INDEX IF EXISTS idx_eal_emergency_created;
+    DROP INDEX IF EXISTS idx_esh_emergency_created;
+    DROP INDEX IF EXISTS idx_er_emergency_assigned;
+    CREATE INDEX IF NOT EXISTS idx_eal_emergency_created_id ON emergency_activity_log (emergency_id, created_at DESC, id DESC);
+    CREATE INDEX IF NOT EXISTS idx_esh_emergency_created_id ON emergency_status_history (emergency_id, created_at DESC, id DESC);
+    CREATE INDEX IF NOT EXISTS idx_em_emergency_created ON emergency_messages (emergency_id, created_at);
+    CREATE INDEX IF NOT EXISTS idx_er_emergency_assigned_id ON emergency_resources (emergency_id, assigned_at DESC, id DESC);
+    -- Emergency list: newest-first per status, and newest-first overall, with
+    -- emergency_id breaking created_at ties for the keyset cursor
+    DROP INDEX IF EXISTS idx_emergency_status_created;
+    DROP INDEX IF EXISTS idx_emergency_created;
+    CREATE INDEX IF NOT EXISTS idx_emergency_status_created_id ON emergency_requests (status, created_at DESC, emergency_id DESC);
+    CREATE INDEX IF NOT EXISTS idx_emergency_created_id ON emergency_requests (created_at DESC, emergency_id DESC);
+    -- Crew only list the emergencies they reported
+    CREATE INDEX IF NOT EXISTS idx_emergency_reporter_created_id ON emergency_requests (reported_by, created_at DESC, emergency_id DESC);
+
+    -- Create maintenance_requests table
+    CREATE TABLE IF NOT EXISTS maintenance_requests (
+        request_id TEXT PRIMARY KEY,
+        ship_name TEXT NOT NULL,
+        maintenance_type TEXT NOT NULL,
+        priority TEXT DEFAULT 'medium',
+        description TEXT,
+        location TEXT,
+        estimated_duration TEXT,
+        resources_needed TEXT,
+        requested_by TEXT,
+        status TEXT DEFAULT 'pending',
+        assigned_to TEXT,
+        approved INTEGER DEFAULT 0,
+        approved_by TEXT,
+        approved_at TIMESTAMP,
+        rejection_reason TEXT,
+        completed_at TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP,
+        notes TEXT,
+        FOREIGN KEY (requested_by) REFERENCES users (user_id),
+        FOREIGN KEY (assigned_to) REFERENCES users (user_id),
+        FOREIGN KEY (approved_by) REFERENCES users (user_id)
+    );
+    -- Shapes used by the maintenance request lists (MAINTENANCE_LIST_SQL):
+    -- owner lookups, status filters and the unfiltered priority view, each
+    -- returning rows already in ORDER BY order
+    CREATE INDEX IF NOT EXISTS idx_mr_status_created ON maintenance_requests (status, created_at DESC);
+    CREATE INDEX IF NOT EXISTS idx_mr_requested_by_created ON maintenance_requests (requested_by, created_at DESC);
+    -- Newest-first list paged by the (created_at, request_id) keyset cursor
+    CREATE INDEX IF NOT EXISTS idx_mr_created_request ON maintenance_requests (created_at DESC, request_id DESC);
+
+    -- Create maintenance_workflow_log table for tracking all actions
+    CREATE TABLE IF NOT EXISTS maintenance_workflow_log (
+        id TEXT PRIMARY KEY,
+        request_id TEXT NOT NULL,
+        action TEXT NOT NULL,
+        actor_id TEXT,
+        details TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (request_id) REFERENCES maintenance_requests (request_id),
+        FOREIGN KEY (actor_id) REFERENCES users (user_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_mwl_request_created ON maintenance_workflow_log (request_id, created_at);
+
+    -- Create maintenance_request_attachments table for storing files
+    CREATE TABLE IF NOT EXISTS maintenance_request_attachments (
+        id TEXT PRIMARY KEY,
+        request_id TEXT NOT NULL,
+        original_filename TEXT NOT NULL,
+        stored_filename TEXT NOT NULL,
+        file_size INTEGER,
+        uploader_id TEXT,
+        uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (request_id) REFERENCES maintenance_requests (request_id),
+        FOREIGN KEY (uploader_id) REFERENCES users (user_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_mra_request_uploaded ON maintenance_request_attachments (request_id, uploaded_at DESC);
+
+    -- ==================== INTERNATIONAL REPORTS TABLES ====================
+
+    -- Bilge Report Table
+    CREATE TABLE IF NOT EXISTS bilge_reports (
+        report_id TEXT PRIMARY KEY,
+        vessel_name TEXT NOT NULL,
+        imo_number TEXT,
+        report_date DATE NOT NULL,
+        report_time TIME NOT NULL,
+        bilge_water_level REAL,
+        water_temperature REAL,
+        oil_content_ppm INTEGER,
+        disposal_method TEXT,
+        location TEXT,
+        officer_name TEXT NOT NULL,
+        officer_rank TEXT,
+        officer_id TEXT,
+        signature_data BLOB,
+        notes TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (officer_id) REFERENCES users (user_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_bilge_officer_id ON bilge_reports (officer_id);
+
+    -- Fuel & Truck Number Report Table
+    CREATE TABLE IF NOT EXISTS fuel_reports (
+        report_id TEXT PRIMARY KEY,
+        vessel_name TEXT NOT NULL,
+        imo_number TEXT,
+        report_date DATE NOT NULL,
+        fuel_type TEXT NOT NULL,
+        quantity_received REAL,
+        fuel_density REAL,
+        fuel_temperature REAL,
+        truck_number TEXT,
+        supplier_name TEXT,
+        total_fuel_onboard REAL,
+        location TEXT,
+        officer_name TEXT NOT NULL,
+        officer_rank TEXT,
+        officer_id TEXT,
+        signature_data BLOB,
+        notes TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (officer_id) REFERENCES users (user_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_fuel_officer_id ON fuel_reports (officer_id);
+
+    -- Sewage Report Table
+    CREATE TABLE IF NOT EXISTS sewage_reports (
+        report_id TEXT PRIMARY KEY,
+        vessel_name TEXT NOT NULL,
+        imo_number TEXT,
+        report_date DATE NOT NULL,
+        report_time TIME NOT NULL,
+        sewage_tank_level REAL,
+        treatment_method TEXT,
+        disposal_method TEXT,
+        location TEXT,
+        environmental_notes TEXT,
+        officer_name TEXT NOT NULL,
+        officer_rank TEXT,
+        officer_id TEXT,
+        signature_data BLOB,
+        notes TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (officer_id) REFERENCES users (user_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_sewage_officer_id ON sewage_reports (officer_id);
+
+    -- Logbook Entry Table
+    CREATE TABLE IF NOT EXISTS logbook_entries (
+        entry_id TEXT PRIMARY KEY,
+        vessel_name TEXT NOT NULL,
+        imo_number TEXT,
+        entry_date DATE NOT NULL,
+        watch_period TEXT,
+        weather_conditions TEXT,
+        sea_state TEXT,
+        wind_speed REAL,
+        wind_direction TEXT,
+        course REAL,
+        speed REAL,
+        engine_hours REAL,
+        fuel_consumption REAL,
+        events TEXT,
+        remarks TEXT,
+        officer_name TEXT NOT NULL,
+        officer_rank TEXT,
+        officer_id TEXT,
+        signature_data BLOB,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (officer_id) REFERENCES users (user_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_logbook_officer_id ON logbook_entries (officer_id);
+
+    -- Emission Report Table
+    CREATE TABLE IF NOT EXISTS emission_reports (
+        report_id TEXT PRIMARY KEY,
+        vessel_name TEXT NOT NULL,
+        imo_number TEXT,
+        report_date DATE NOT NULL,
+        fuel_type TEXT,
+        fuel_consumption REAL,
+        voyage_distance REAL,
+        co2_emissions REAL,
+        energy_efficiency_indicator REAL,
+        compliance_status TEXT,
+        location TEXT,
+        officer_name TEXT NOT NULL,
+        officer_rank TEXT,
+        officer_id TEXT,
+        signature_data BLOB,
+        notes TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (officer_id) REFERENCES users (user_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_emission_officer_id ON emission_reports (officer_id);
+
+    -- Create inventory table
+    CREATE TABLE IF NOT EXISTS inventory (
+        item_id TEXT PRIMARY KEY,
+        item_name TEXT NOT NULL,
+        category TEXT,
+        quantity INTEGER DEFAULT 0,
+        unit TEXT,
+        minimum_quantity INTEGER DEFAULT 10,
+        location TEXT,
+        supplier TEXT,
+        last_restocked TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Create system_notifications table
+    CREATE TABLE IF NOT EXISTS system_notifications (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        message TEXT NOT NULL,
+        type TEXT DEFAULT 'info',
+        sender_id TEXT,
+        recipient_type TEXT DEFAULT 'all',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Create messaging_system table
+    CREATE TABLE IF NOT EXISTS messaging_system (
+        message_id TEXT PRIMARY KEY,
+        sender_id TEXT NOT NULL,
+        recipient_type TEXT NOT NULL,
+        recipient_id TEXT,
+        recipient_email TEXT,
+        recipient_phone TEXT,
+        title TEXT NOT NULL,
+        message TEXT NOT NULL,
+        message_type TEXT NOT NULL,
+        priority TEXT DEFAULT 'normal',
+        attachment_path TEXT,
+        attachment_filename TEXT,
+        is_read INTEGER DEFAULT 0,
+        allow_replies INTEGER DEFAULT 0,
+        parent_message_id TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        read_at TIMESTAMP,
+        FOREIGN KEY (sender_id) REFERENCES users (user_id),
+        FOREIGN KEY (parent_message_id) REFERENCES messaging_system (message_id)
+    );
+    -- Create indexes for messaging_system table: the inbox (a recipient's
+    -- messages, optionally only unread, newest first) and sent items (a
+    -- sender's messages, newest first) each read one index in ORDER BY order.
+    -- They replace the original single-column indexes, of which the planner
+    -- could use only one before sorting; the recipient_id and sender_id ones
+    -- are now prefixes of these and would only be maintained for nothing.
+    DROP INDEX IF EXISTS idx_messaging_recipient_id;
+    DROP INDEX IF EXISTS idx_messaging_sender_id;
+    DROP INDEX IF EXISTS idx_messaging_created_at;
+    DROP INDEX IF EXISTS idx_messaging_is_read;
+    CREATE INDEX IF NOT EXISTS idx_messaging_inbox ON messaging_system (recipient_id, is_read, created_at DESC);
+    CREATE INDEX IF NOT EXISTS idx_messaging_sent ON messaging_system (sender_id, created_at DESC);
+    CREATE INDEX IF NOT EXISTS idx_messaging_parent_id ON messaging_system (parent_message_id);
+    -- Unread badge counts and mark-all-read also match role, department and
+    -- broadcast messages, which the inbox index cannot serve; this partial
+    -- index holds only the unread backlog. SQLite uses it only for queries
+    -- that state "is_read = 0" literally (not "NOT is_read" or "is_read != 1").
+    CREATE INDEX IF NOT EXISTS idx_messaging_unread ON messaging_system (recipient_type, recipient_id) WHERE is_read = 0;
+
+    -- Create message_replies table
+    CREATE TABLE IF NOT EXISTS message_replies (
+        reply_id TEXT PRIMARY KEY,
+        message_id TEXT NOT NULL,
+        sender_id TEXT NOT NULL,
+        reply_text TEXT NOT NULL,
+        attachment_path TEXT,
+        attachment_filename TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (message_id) REFERENCES messaging_system (message_id),
+        FOREIGN KEY (sender_id) REFERENCES users (user_id)
+    );
+    -- A message's replies, read oldest first
+    CREATE INDEX IF NOT EXISTS idx_replies_message_created ON message_replies (message_id, created_at);
+    CREATE INDEX IF NOT EXISTS idx_replies_sender_id ON message_replies (sender_id);
+
+    -- Create messages table for user-to-user messaging
+    CREATE TABLE IF NOT EXISTS messages (
+        message_id TEXT PRIMARY KEY,
+        sender_id TEXT NOT NULL,
+        recipient_id TEXT NOT NULL,
+        subject TEXT,
+        body TEXT NOT NULL,
+        is_read INTEGER DEFAULT 0,
+        attachment_path TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        read_at TIMESTAMP,
+        FOREIGN KEY (sender_id) REFERENCES users (user_id),
+        FOREIGN KEY (recipient_id) REFERENCES users (user_id)
+    );
+    -- Create indexes for messages table; the inbox index takes over from the
+    -- recipient_id and is_read ones the same way
+    DROP INDEX IF EXISTS idx_messages_recipient_id;
+    DROP INDEX IF EXISTS idx_messages_is_read;
+    CREATE INDEX IF NOT EXISTS idx_messages_inbox ON messages (recipient_id, is_read, created_at DESC);
+    CREATE INDEX IF NOT EXISTS idx_messages_sender_id ON messages (sender_id);
+
+    -- ==================== PROCUREMENT SYSTEM TABLES ====================
+
+    -- Create inventory_files table for organizing parts into multiple files
+    CREATE TABLE IF NOT EXISTS inventory_files (
+        file_id TEXT PRIMARY KEY,
+        file_name TEXT NOT NULL,
+        vessel_id TEXT,
+        created_by TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        file_status TEXT DEFAULT 'active',
+        FOREIGN KEY (created_by) REFERENCES users (user_id)
+    );
+
+    -- Create inventory_file_parts table for parts within files
+    CREATE TABLE IF NOT EXISTS inventory_file_parts (
+        part_id TEXT PRIMARY KEY,
+        file_id TEXT NOT NULL,
+        part_number TEXT NOT NULL,
+        part_name TEXT NOT NULL,
+        category TEXT,
+        quantity INTEGER DEFAULT 0,
+        location TEXT,
+        supplier TEXT,
+        manufacturer TEXT,
+        notes TEXT,
+        added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        part_status TEXT DEFAULT 'active',
+        UNIQUE(file_id, part_number),
+        FOREIGN KEY (file_id) REFERENCES inventory_files (file_id)
+    );
+
+    -- Create procurement_requests table for low stock requests
+    CREATE TABLE IF NOT EXISTS procurement_requests (
+        request_id TEXT PRIMARY KEY,
+        part_number TEXT NOT NULL,
+        file_id TEXT,
+        quantity_requested INTEGER NOT NULL,
+        requested_by TEXT NOT NULL,
+        request_status TEXT DEFAULT 'pending',
+        priority TEXT DEFAULT 'standard',
+        requested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        notes TEXT,
+        FOREIGN KEY (requested_by) REFERENCES users (user_id),
+        FOREIGN KEY (file_id) REFERENCES inventory_files (file_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_procurement_req_requested_by ON procurement_requests (requested_by);
+    CREATE INDEX IF NOT EXISTS idx_procurement_req_file_id ON procurement_requests (file_id);
+
+    -- Create procurement_items table for new parts added by procurement
+    CREATE TABLE IF NOT EXISTS procurement_items (
+        item_id TEXT PRIMARY KEY,
+        request_id TEXT,
+        quantity_received INTEGER NOT NULL,
+        unit_price REAL,
+        inspection_document_path TEXT,
+        inspection_document_filename TEXT,
+        added_by TEXT NOT NULL,
+        added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        confirmed INTEGER DEFAULT 0,
+        confirmed_by TEXT,
+        confirmed_at TIMESTAMP,
+        FOREIGN KEY (request_id) REFERENCES procurement_requests (request_id),
+        FOREIGN KEY (added_by) REFERENCES users (user_id),
+        FOREIGN KEY (confirmed_by) REFERENCES users (user_id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_procurement_item_request_id ON procurement_items (request_id);
+    CREATE INDEX IF NOT EXISTS idx_procurement_item_added_by ON procurement_items (added_by);
+
+    -- Create procurement_notifications table for tracking notifications sent
+    CREATE TABLE IF NOT EXISTS procurement_notifications (
+        notification_id TEXT PRIMARY KEY,
+        request_id TEXT,
+        recipient_id TEXT NOT NULL,
+        notification_type TEXT NOT NULL,
+        sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        read_at TIMESTAMP,
+        FOREIGN KEY (request_id) REFERENCES procurement_requests (request_id),
+        FOREIGN KEY (recipient_id) REFERENCES users (user_id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_procurement_notif_request_id ON procurement_notifications (request_id);
+    CREATE INDEX IF NOT EXISTS idx_procurement_notif_recipient_id ON procurement_notifications (recipient_id);
+
+    -- Create Machinery Manual Tables
+    CREATE TABLE IF NOT EXISTS machinery_manual_folders (
+        folder_id TEXT PRIMARY KEY,
+        folder_name TEXT NOT NULL,
+        ship_name TEXT NOT NULL,
+        vessel_id TEXT,
+        description TEXT,
+        created_by TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        folder_status TEXT DEFAULT 'active',
+        FOREIGN KEY (created_by) REFERENCES users (user_id),
+        UNIQUE(ship_name, folder_name)
+    );
+    CREATE INDEX IF NOT EXISTS idx_manual_folder_created_by ON machinery_manual_folders (created_by);
+
+    CREATE TABLE IF NOT EXISTS machinery_manual_files (
+        file_id TEXT PRIMARY KEY,
+        folder_id TEXT NOT NULL,
+        file_name TEXT NOT NULL,
+        file_path TEXT NOT NULL,
+        file_size INTEGER,
+        file_type TEXT,
+        machinery_type TEXT,
+        uploaded_by TEXT NOT NULL,
+        uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        file_status TEXT DEFAULT 'active',
+        FOREIGN KEY (folder_id) REFERENCES machinery_manual_folders (folder_id),
+        FOREIGN KEY (uploaded_by) REFERENCES users (user_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_manual_file_folder_id ON machinery_manual_files (folder_id);
+    CREATE INDEX IF NOT EXISTS idx_manual_file_uploaded_by ON machinery_manual_files (uploaded_by);
+
+    -- ==================== CREW MANAGEMENT TABLES ====================
+
+    -- Create crew_members table for managing vessel crew
+    CREATE TABLE IF NOT EXISTS crew_members (
+        crew_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        vessel_id TEXT,
+        first_name TEXT NOT NULL,
+        last_name TEXT NOT NULL,
+        department TEXT NOT NULL,
+        rank TEXT NOT NULL,
+        license_number TEXT UNIQUE,
+        nationality TEXT,
+        date_of_birth TEXT,
+        phone TEXT,
+        email TEXT,
+        emergency_contact TEXT,
+        emergency_phone TEXT,
+        stcw_certificate TEXT,
+        stcw_expiry DATE,
+        gmdss_certificate TEXT,
+        gmdss_expiry DATE,
+        mlc_certificate TEXT,
+        mlc_expiry DATE,
+        medical_certificate TEXT,
+        medical_expiry DATE,
+        other_certifications TEXT,
+        certification_expiry TEXT,
+        date_joined TEXT,
+        status TEXT DEFAULT 'active',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    -- Create indexes for crew_members table
+    CREATE INDEX IF NOT EXISTS idx_crew_vessel_id ON crew_members (vessel_id);
+    CREATE INDEX IF NOT EXISTS idx_crew_department ON crew_members (department);
+    -- Certificate expiry windows over active crew; the alert queries bound
+    -- the raw expiry column so these can serve them. Filters on status alone
+    -- use the same indexes' prefix, so a status-only index would be redundant.
+    DROP INDEX IF EXISTS idx_crew_status;
+    CREATE INDEX IF NOT EXISTS idx_crew_stcw_expiry ON crew_members (status, stcw_expiry);
+    CREATE INDEX IF NOT EXISTS idx_crew_gmdss_expiry ON crew_members (status, gmdss_expiry);
+    CREATE INDEX IF NOT EXISTS idx_crew_medical_expiry ON crew_members (status, medical_expiry);
+
+    -- ==================== VESSEL MANAGEMENT TABLES (vessels itself: ensure_vessels_schema) ====================
+
+    -- Create vessel_performance_monitoring table for performance data
+    CREATE TABLE IF NOT EXISTS vessel_performance_monitoring (
+        performance_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        vessel_id INTEGER NOT NULL,
+        reporting_month TEXT NOT NULL,
+        average_speed REAL,
+        fuel_consumption_metric_tons REAL,
+        fuel_consumption_per_ton_mile REAL,
+        co2_emissions_metric_tons REAL,
+        sox_emissions_kilograms REAL,
+        nox_emissions_kilograms REAL,
+        average_load_factor REAL,
+        vessel_availability_percentage REAL,
+        number_of_port_calls INTEGER,
+        nautical_miles_traveled REAL,
+        notes TEXT,
+        reported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (vessel_id) REFERENCES vessels (vessel_id)
+    );
+    -- Create indexes for vessel_performance_monitoring
+    CREATE INDEX IF NOT EXISTS idx_performance_vessel_id ON vessel_performance_monitoring (vessel_id);
+    CREATE INDEX IF NOT EXISTS idx_performance_month ON vessel_performance_monitoring (reporting_month);
+
+    -- Create vessel_certificates table for certificate management
+    CREATE TABLE IF NOT EXISTS vessel_certificates (
+        certificate_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        vessel_id INTEGER NOT NULL,
+        certificate_type TEXT NOT NULL,
+        issue_date TEXT,
+        expiry_date TEXT,
+        issuing_authority TEXT,
+        certificate_number TEXT,
+        document_path TEXT,
+        status TEXT DEFAULT 'active',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (vessel_id) REFERENCES vessels (vessel_id)
+    );
+    -- Create indexes for vessel_certificates
+    CREATE INDEX IF NOT EXISTS idx_vessel_cert_vessel_id ON vessel_certificates (vessel_id);
+    CREATE INDEX IF NOT EXISTS idx_vessel_cert_type ON vessel_certificates (certificate_type);
+    CREATE INDEX IF NOT EXISTS idx_vessel_cert_expiry ON vessel_certificates (expiry_date);
+
+    -- ==================== CERTIFICATE MANAGEMENT TABLES ====================
+
+    -- Create certificate_documents table for storing uploaded certificate files
+    CREATE TABLE IF NOT EXISTS certificate_documents (
+        doc_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        crew_id INTEGER NOT NULL,
+        certificate_type TEXT NOT NULL,
+        document_path TEXT NOT NULL,
+        file_name TEXT NOT NULL,
+        file_size INTEGER,
+        uploaded_by TEXT,
+        uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        notes TEXT,
+        FOREIGN KEY (crew_id) REFERENCES crew_members (crew_id)
+    );
+    -- Create indexes for certificate_documents
+    CREATE INDEX IF NOT EXISTS idx_cert_doc_crew_id ON certificate_documents (crew_id);
+    CREATE INDEX IF NOT EXISTS idx_cert_doc_type ON certificate_documents (certificate_type);
+
+    -- Create certificate_alerts table for tracking expiry alerts sent
+    CREATE TABLE IF NOT EXISTS certificate_alerts (
+        alert_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        crew_id INTEGER NOT NULL,
+        certificate_type TEXT NOT NULL,
+        alert_type TEXT NOT NULL,
+        days_until_expiry INTEGER,
+        alert_sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        recipient_email TEXT,
+        recipient_phone TEXT,
+        notification_status TEXT DEFAULT 'sent',
+        expiry_date DATE,
+        FOREIGN KEY (crew_id) REFERENCES crew_members (crew_id)
+    );
+    -- Create indexes for certificate_alerts
+    CREATE INDEX IF NOT EXISTS idx_cert_alert_crew_id ON certificate_alerts (crew_id);
+    CREATE INDEX IF NOT EXISTS idx_cert_alert_type ON certificate_alerts (alert_type);
+    CREATE INDEX IF NOT EXISTS idx_cert_alert_sent_at ON certificate_alerts (alert_sent_at);
+
+    -- ==================== PUSH NOTIFICATION SUBSCRIPTIONS ====================
+
+    -- Create push_subscriptions table for storing device subscriptions for Web Push
+    CREATE TABLE IF NOT EXISTS push_subscriptions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        endpoint TEXT NOT NULL UNIQUE,
+        auth_key TEXT NOT NULL,
+        p256dh_key TEXT NOT NULL,
+        user_agent TEXT,
+        is_active INTEGER DEFAULT 1,
+        subscribed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_used_at TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (user_id)
+    );
+    -- Create index for push_subscriptions
+    CREATE INDEX IF NOT EXISTS idx_push_user_id ON push_subscriptions (user_id);
+    CREATE INDEX IF NOT EXISTS idx_push_is_active ON push_subscriptions (is_active);
+
+    -- Create crew_training_plans table for generating training recommendations
+    CREATE TABLE IF NOT EXISTS crew_training_plans (
+        plan_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        crew_id INTEGER NOT NULL,
+        vessel_id INTEGER,
+        training_type TEXT NOT NULL,
+        certificate_gap TEXT NOT NULL,
+        priority TEXT DEFAULT 'medium',
+        recommended_provider TEXT,
+        estimated_duration TEXT,
+        estimated_cost REAL,
+        plan_status TEXT DEFAULT 'pending',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        approved_at TIMESTAMP,
+        completed_at TIMESTAMP,
+        notes TEXT,
+        FOREIGN KEY (crew_id) REFERENCES crew_members (crew_id),
+        FOREIGN KEY (vessel_id) REFERENCES vessels (vessel_id)
+    );
+    -- Create indexes for crew_training_plans
+    CREATE INDEX IF NOT EXISTS idx_training_plan_crew_id ON crew_training_plans (crew_id);
+    CREATE INDEX IF NOT EXISTS idx_training_plan_vessel_id ON crew_training_plans (vessel_id);
+    CREATE INDEX IF NOT EXISTS idx_training_plan_status ON crew_training_plans (plan_status);
+    CREATE INDEX IF NOT EXISTS idx_training_plan_priority ON crew_training_plans (priority);
+
+    -- Running (sum, count) aggregates backing the dashboard statistics; only
+    -- ever written with computed numbers, so its types can be enforced
+    CREATE TABLE IF NOT EXISTS dashboard_stats (
+        key TEXT PRIMARY KEY,
+        sum_val REAL NOT NULL DEFAULT 0,
+        n INTEGER NOT NULL DEFAULT 0
+    ) """ + STRICT_TABLE_OPTION + """WITHOUT ROWID;
+"""
+
+# Stamped into PRAGMA user_version once apply_schema() has run, so later boots
+# skip the DDL and migration checks entirely. Bump it with any change to
+# SCHEMA_DDL, SCHEMA_ADDED_COLUMNS or apply_schema(), or existing databases
+# will never see the change.
+SCHEMA_VERSION = 8
+
+def apply_schema(c, conn, log=print):
     """
-    Initialize database schema while preserving existing data.
-    Uses 'CREATE TABLE IF NOT EXISTS' to ensure NO DATA LOSS.
-    Safe for repeated calls during deployments.
+    Create every table and index and migrate older databases to SCHEMA_VERSION.
     
-    All user accounts and conversations are PRESERVED across deployments.
-    Only demo accounts are ensured to exist (not reset).
+    Each step is idempotent, so a database stamped with an older version (or
+    none) is simply brought up to date. The transaction is left open for the
+    caller to commit together with the version stamp.
+    
+    Args:
+        c: Database cursor
+        conn: Database connection
+        log (callable): Receives each progress line; print by default
     """
-    conn = get_db_connection()
-    try:
-        c = conn.cursor()
-        
-        # Log data BEFORE initialization
-        print("\n" + "="*70)
-        print("[DATABASE] PRESERVATION CHECK - PRE-INITIALIZATION")
-        print("="*70)
-        
-        try:
-            c.execute("SELECT COUNT(*) FROM users")
-            user_count_before = c.fetchone()[0]
-            print(f"[DATA] Users before: {user_count_before}")
-        except:
-            user_count_before = 0
-            print("[INFO] Users table does not exist yet")
-        
-        try:
-            c.execute("SELECT COUNT(*) FROM messages")
-            messages_before = c.fetchone()[0]
-            print(f"[DATA] Messages before: {messages_before}")
-        except:
-            messages_before = 0
-        
-        try:
-            c.execute("SELECT COUNT(*) FROM maintenance_requests")
-            requests_before = c.fetchone()[0]
-            print(f"[DATA] Maintenance requests before: {requests_before}")
-        except:
-            requests_before = 0
-        
-        # Count existing records before initialization
-        c.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table'")
-        table_count_before = c.fetchone()[0]
-
-        # Create users table
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                user_id TEXT PRIMARY KEY,
-                email TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                first_name TEXT NOT NULL,
-                last_name TEXT NOT NULL,
-                rank TEXT,
-                role TEXT NOT NULL,
-                phone TEXT,
-                department TEXT,
-                location TEXT,
-                profile_pic TEXT,
-                signature_path TEXT,
-                is_active INTEGER DEFAULT 1,
-                is_approved INTEGER DEFAULT 0,
-                survey_end_date DATE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_login TIMESTAMP,
-                last_activity TIMESTAMP
-            )
-        ''')
-
-        # Check if signature_path column exists
-        c.execute("PRAGMA table_info(users)")
-        columns = [col[1] for col in c.fetchall()]
-
-        if 'signature_path' not in columns:
-            c.execute("ALTER TABLE users ADD COLUMN signature_path TEXT")
-            print("[OK] Added signature_path column to users table")
-        
-        if 'is_online' not in columns:
-            c.execute("ALTER TABLE users ADD COLUMN is_online INTEGER DEFAULT 0")
-            print("[OK] Added is_online column to users table")
-
-        # Create activity_logs table
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS activity_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT NOT NULL,
-                activity TEXT NOT NULL,
-                details TEXT,
-                ip_address TEXT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (user_id)
-            )
-        ''')
-
-        # Create comprehensive audit_trail table for real-time tracking
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS audit_trail (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                user_id TEXT,
-                action_type TEXT NOT NULL,
-                entity_type TEXT NOT NULL,
-                entity_id TEXT,
-                old_value TEXT,
-                new_value TEXT,
-                ip_address TEXT,
-                status TEXT DEFAULT 'completed',
-                error_message TEXT,
-                FOREIGN KEY (user_id) REFERENCES users (user_id)
-            )
-        ''')
-
-        # Create system_events table for real-time system monitoring
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS system_events (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                event_type TEXT NOT NULL,
-                entity_type TEXT NOT NULL,
-                entity_id TEXT,
-                event_data TEXT,
-                severity TEXT DEFAULT 'info',
-                processed INTEGER DEFAULT 0
-            )
-        ''')
-
-        # Create update_history table to track all changes with timestamps
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS update_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                table_name TEXT NOT NULL,
-                record_id TEXT NOT NULL,
-                field_name TEXT NOT NULL,
-                old_value TEXT,
-                new_value TEXT,
-                user_id TEXT,
-                change_reason TEXT
-            )
-        ''')
-
-        # Create user_documents table
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS user_documents (
-                id TEXT PRIMARY KEY,
-                user_id TEXT NOT NULL,
-                document_name TEXT NOT NULL,
-                document_type TEXT,
-                document_path TEXT NOT NULL,
-                file_size INTEGER,
-                uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (user_id)
-            )
-        ''')
-
-        # Create inventory_documents table to store multiple documents per inventory item
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS inventory_documents (
-                id TEXT PRIMARY KEY,
-                part_number TEXT NOT NULL,
-                original_filename TEXT NOT NULL,
-                stored_filename TEXT NOT NULL,
-                uploader_id TEXT,
-                file_size INTEGER,
-                uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (uploader_id) REFERENCES users (user_id)
-            )
-        ''')
-
-        # Create service_evaluations table for SQI - FIXED VERSION
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS service_evaluations (
-                id TEXT PRIMARY KEY,
-                evaluator_id TEXT NOT NULL,
-                vessel_id TEXT,
-                sqi_score REAL,
-                evaluation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                notes TEXT,
-                status TEXT DEFAULT 'completed',
-                FOREIGN KEY (evaluator_id) REFERENCES users (user_id)
-            )
-        ''')
-
-        # Check if the table exists and has required columns
-        c.execute("PRAGMA table_info(service_evaluations)")
-        columns = [col[1] for col in c.fetchall()]
-
-        if not columns:  # Table doesn't exist or is empty
-            # Recreate with correct structure
-            c.execute("DROP TABLE IF EXISTS service_evaluations")
-            c.execute('''
-                CREATE TABLE service_evaluations (
-                    id TEXT PRIMARY KEY,
-                    evaluator_id TEXT NOT NULL,
-                    vessel_id TEXT,
-                    sqi_score REAL,
-                    evaluation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    notes TEXT,
-                    status TEXT DEFAULT 'completed',
-                    FOREIGN KEY (evaluator_id) REFERENCES users (user_id)
-                )
-            ''')
-            print("[OK] Created service_evaluations table with correct structure")
-        elif 'evaluator_id' not in columns:
-            # Drop and recreate if structure is wrong
-            c.execute("DROP TABLE IF EXISTS service_evaluations")
-            c.execute('''
-                CREATE TABLE service_evaluations (
-                    id TEXT PRIMARY KEY,
-                    evaluator_id TEXT NOT NULL,
-                    vessel_id TEXT,
-                    sqi_score REAL,
-                    evaluation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    notes TEXT,
-                    status TEXT DEFAULT 'completed',
-                    FOREIGN KEY (evaluator_id) REFERENCES users (user_id)
-                )
-            ''')
-            print("[OK] Recreated service_evaluations table with correct structure")
-        
-        # Create notifications table
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS notifications (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT NOT NULL,
-                title TEXT NOT NULL,
-                message TEXT NOT NULL,
-                type TEXT DEFAULT 'info',
-                action_url TEXT,
-                is_read INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (user_id)
-            )
-        ''')
-
-        # Create notification_preferences table for user notification settings
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS notification_preferences (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT NOT NULL UNIQUE,
-                sound_enabled INTEGER DEFAULT 1,
-                browser_notifications INTEGER DEFAULT 1,
-                email_notifications INTEGER DEFAULT 1,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (user_id)
-            )
-        ''')
-        
-        # Create emergency_requests table
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS emergency_requests (
-                emergency_id TEXT PRIMARY KEY,
-                ship_name TEXT NOT NULL,
-                emergency_type TEXT NOT NULL,
-                severity_level TEXT NOT NULL,
-                description TEXT,
-                immediate_actions TEXT,
-                resources_required TEXT,
-                reported_by TEXT,
-                -- Location & map integration
-                location_name TEXT,
-                latitude REAL,
-                longitude REAL,
-                status TEXT DEFAULT 'pending',
-                authorized_by TEXT,
-                authorized_at TIMESTAMP,
-                resolved_at TIMESTAMP,
-                closed_at TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (reported_by) REFERENCES users (user_id),
-                FOREIGN KEY (authorized_by) REFERENCES users (user_id)
-            )
-        ''')
-
-        # Backwards-compatible schema upgrades for existing databases
-        try:
-            c.execute("ALTER TABLE emergency_requests ADD COLUMN location_name TEXT")
-        except Exception:
-            pass
-        try:
-            c.execute("ALTER TABLE emergency_requests ADD COLUMN latitude REAL")
-        except Exception:
-            pass
-        try:
-            c.execute("ALTER TABLE emergency_requests ADD COLUMN longitude REAL")
-        except Exception:
-            pass
-        
-        # Create emergency_activity_log table for timeline/audit trail
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS emergency_activity_log (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                emergency_id TEXT NOT NULL,
-                user_id TEXT NOT NULL,
-                action_type TEXT NOT NULL,
-                action_description TEXT,
-                old_status TEXT,
-                new_status TEXT,
-                metadata TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (emergency_id) REFERENCES emergency_requests (emergency_id),
-                FOREIGN KEY (user_id) REFERENCES users (user_id)
-            )
-        ''')
-        
-        # Create emergency_messages table for communication hub
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS emergency_messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                emergency_id TEXT NOT NULL,
-                sender_id TEXT NOT NULL,
-                message TEXT NOT NULL,
-                attachment_path TEXT,
-                is_system_message INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (emergency_id) REFERENCES emergency_requests (emergency_id),
-                FOREIGN KEY (sender_id) REFERENCES users (user_id)
-            )
-        ''')
-        
-        # Create available_resources table for system-wide resource management
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS available_resources (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                resource_type TEXT NOT NULL,
-                resource_name TEXT NOT NULL,
-                resource_id TEXT,
-                available INTEGER DEFAULT 1,
-                location TEXT,
-                notes TEXT,
-                created_by TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP,
-                FOREIGN KEY (created_by) REFERENCES users (user_id)
-            )
-        ''')
-        
-        # Create emergency_resources table for resource tracking
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS emergency_resources (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                emergency_id TEXT NOT NULL,
-                resource_type TEXT NOT NULL,
-                resource_name TEXT NOT NULL,
-                resource_id TEXT,
-                assigned_by TEXT,
-                status TEXT DEFAULT 'assigned',
-                assigned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                released_at TIMESTAMP,
-                notes TEXT,
-                FOREIGN KEY (emergency_id) REFERENCES emergency_requests (emergency_id),
-                FOREIGN KEY (assigned_by) REFERENCES users (user_id)
-            )
-        ''')
-        
-        # Create emergency_status_history table
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS emergency_status_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                emergency_id TEXT NOT NULL,
-                old_status TEXT,
-                new_status TEXT NOT NULL,
-                changed_by TEXT NOT NULL,
-                change_reason TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (emergency_id) REFERENCES emergency_requests (emergency_id),
-                FOREIGN KEY (changed_by) REFERENCES users (user_id)
-            )
-        ''')
-        
-        # Create maintenance_requests table
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS maintenance_requests (
-                request_id TEXT PRIMARY KEY,
-                ship_name TEXT NOT NULL,
-                maintenance_type TEXT NOT NULL,
-                priority TEXT DEFAULT 'medium',
-                description TEXT,
-                location TEXT,
-                estimated_duration TEXT,
-                resources_needed TEXT,
-                requested_by TEXT,
-                status TEXT DEFAULT 'pending',
-                assigned_to TEXT,
-                approved INTEGER DEFAULT 0,
-                approved_by TEXT,
-                approved_at TIMESTAMP,
-                rejection_reason TEXT,
-                completed_at TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP,
-                notes TEXT,
-                FOREIGN KEY (requested_by) REFERENCES users (user_id),
-                FOREIGN KEY (assigned_to) REFERENCES users (user_id),
-                FOREIGN KEY (approved_by) REFERENCES users (user_id)
-            )
-        ''')
-        
-        # Add approval columns if they don't exist (for existing databases)
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN approved INTEGER DEFAULT 0")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN approved_by TEXT")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN approved_at TIMESTAMP")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN rejection_reason TEXT")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN updated_at TIMESTAMP")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN captain_comments TEXT")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN rejected_by TEXT")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN rejected_at TIMESTAMP")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN criticality TEXT DEFAULT 'medium'")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-
-        # Add severity assessment and workflow tracking columns
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN severity TEXT DEFAULT 'MINOR'")
-        except sqlite3.OperationalError:
-            pass
-
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN assessment_details TEXT")
-        except sqlite3.OperationalError:
-            pass
-
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN workflow_status TEXT DEFAULT 'submitted'")
-        except sqlite3.OperationalError:
-            pass
-
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN assigned_pm TEXT")
-        except sqlite3.OperationalError:
-            pass
-
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN pm_approval_at TIMESTAMP")
-        except sqlite3.OperationalError:
-            pass
-
-        # Add part information columns
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN part_number TEXT")
-        except sqlite3.OperationalError:
-            pass
-
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN part_name TEXT")
-        except sqlite3.OperationalError:
-            pass
-
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN part_category TEXT")
-        except sqlite3.OperationalError:
-            pass
-
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN quantity INTEGER")
-        except sqlite3.OperationalError:
-            pass
-
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN manufacturer TEXT")
-        except sqlite3.OperationalError:
-            pass
-
-        # Add contact information columns
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN requested_by_name TEXT")
-        except sqlite3.OperationalError:
-            pass
-
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN requested_by_email TEXT")
-        except sqlite3.OperationalError:
-            pass
-
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN requested_by_phone TEXT")
-        except sqlite3.OperationalError:
-            pass
-
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN emergency_contact TEXT")
-        except sqlite3.OperationalError:
-            pass
-
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN imo_number TEXT")
-        except sqlite3.OperationalError:
-            pass
-
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN vessel_type TEXT")
-        except sqlite3.OperationalError:
-            pass
-
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN company TEXT")
-        except sqlite3.OperationalError:
-            pass
-
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN eta TEXT")
-        except sqlite3.OperationalError:
-            pass
-
-        # Add submitted_by column to track who submitted the request (chief engineer, captain, etc.)
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN submitted_by TEXT")
-            conn.commit()
-        except sqlite3.OperationalError:
-            pass
-
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD FOREIGN KEY (submitted_by) REFERENCES users (user_id)")
-            conn.commit()
-        except sqlite3.OperationalError:
-            pass  # Foreign key might not be supported or already exists
-
-        # Create maintenance_workflow_log table for tracking all actions
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS maintenance_workflow_log (
-                id TEXT PRIMARY KEY,
-                request_id TEXT NOT NULL,
-                action TEXT NOT NULL,
-                actor_id TEXT,
-                details TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (request_id) REFERENCES maintenance_requests (request_id),
-                FOREIGN KEY (actor_id) REFERENCES users (user_id)
-            )
-        ''')
-        
-        # Create maintenance_request_attachments table for storing files
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS maintenance_request_attachments (
-                id TEXT PRIMARY KEY,
-                request_id TEXT NOT NULL,
-                original_filename TEXT NOT NULL,
-                stored_filename TEXT NOT NULL,
-                file_size INTEGER,
-                uploader_id TEXT,
-                uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (request_id) REFERENCES maintenance_requests (request_id),
-                FOREIGN KEY (uploader_id) REFERENCES users (user_id)
-            )
-        ''')
-        
-        # ==================== INTERNATIONAL REPORTS TABLES ====================
-        
-        # Bilge Report Table
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS bilge_reports (
-                report_id TEXT PRIMARY KEY,
-                vessel_name TEXT NOT NULL,
-                imo_number TEXT,
-                report_date DATE NOT NULL,
-                report_time TIME NOT NULL,
-                bilge_water_level REAL,
-                water_temperature REAL,
-                oil_content_ppm INTEGER,
-                disposal_method TEXT,
-                location TEXT,
-                officer_name TEXT NOT NULL,
-                officer_rank TEXT,
-                officer_id TEXT,
-                signature_data TEXT,
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (officer_id) REFERENCES users (user_id)
-            )
-        ''')
-        
-        # Fuel & Truck Number Report Table
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS fuel_reports (
-                report_id TEXT PRIMARY KEY,
-                vessel_name TEXT NOT NULL,
-                imo_number TEXT,
-                report_date DATE NOT NULL,
-                fuel_type TEXT NOT NULL,
-                quantity_received REAL,
-                fuel_density REAL,
-                fuel_temperature REAL,
-                truck_number TEXT,
-                supplier_name TEXT,
-                total_fuel_onboard REAL,
-                location TEXT,
-                officer_name TEXT NOT NULL,
-                officer_rank TEXT,
-                officer_id TEXT,
-                signature_data TEXT,
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (officer_id) REFERENCES users (user_id)
-            )
-        ''')
-        
-        # Sewage Report Table
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS sewage_reports (
-                report_id TEXT PRIMARY KEY,
-                vessel_name TEXT NOT NULL,
-                imo_number TEXT,
-                report_date DATE NOT NULL,
-                report_time TIME NOT NULL,
-                sewage_tank_level REAL,
-                treatment_method TEXT,
-                disposal_method TEXT,
-                location TEXT,
-                environmental_notes TEXT,
-                officer_name TEXT NOT NULL,
-                officer_rank TEXT,
-                officer_id TEXT,
-                signature_data TEXT,
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (officer_id) REFERENCES users (user_id)
-            )
-        ''')
-        
-        # Logbook Entry Table
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS logbook_entries (
-                entry_id TEXT PRIMARY KEY,
-                vessel_name TEXT NOT NULL,
-                imo_number TEXT,
-                entry_date DATE NOT NULL,
-                watch_period TEXT,
-                weather_conditions TEXT,
-                sea_state TEXT,
-                wind_speed REAL,
-                wind_direction TEXT,
-                course REAL,
-                speed REAL,
-                engine_hours REAL,
-                fuel_consumption REAL,
-                events TEXT,
-                remarks TEXT,
-                officer_name TEXT NOT NULL,
-                officer_rank TEXT,
-                officer_id TEXT,
-                signature_data TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (officer_id) REFERENCES users (user_id)
-            )
-        ''')
-        
-        # Emission Report Table
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS emission_reports (
-                report_id TEXT PRIMARY KEY,
-                vessel_name TEXT NOT NULL,
-                imo_number TEXT,
-                report_date DATE NOT NULL,
-                fuel_type TEXT,
-                fuel_consumption REAL,
-                voyage_distance REAL,
-                co2_emissions REAL,
-                energy_efficiency_indicator REAL,
-                compliance_status TEXT,
-                location TEXT,
-                officer_name TEXT NOT NULL,
-                officer_rank TEXT,
-                officer_id TEXT,
-                signature_data TEXT,
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (officer_id) REFERENCES users (user_id)
-            )
-        ''')
-        
-        
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN request_type TEXT")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        try:
-            c.execute("ALTER TABLE maintenance_requests ADD COLUMN notes TEXT")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        # Create inventory table
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS inventory (
-                item_id TEXT PRIMARY KEY,
-                item_name TEXT NOT NULL,
-                category TEXT,
-                quantity INTEGER DEFAULT 0,
-                unit TEXT,
-                minimum_quantity INTEGER DEFAULT 10,
-                location TEXT,
-                supplier TEXT,
-                last_restocked TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create system_notifications table
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS system_notifications (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                message TEXT NOT NULL,
-                type TEXT DEFAULT 'info',
-                sender_id TEXT,
-                recipient_type TEXT DEFAULT 'all',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create messaging_system table
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS messaging_system (
-                message_id TEXT PRIMARY KEY,
-                sender_id TEXT NOT NULL,
-                recipient_type TEXT NOT NULL,
-                recipient_id TEXT,
-                recipient_email TEXT,
-                recipient_phone TEXT,
-                title TEXT NOT NULL,
-                message TEXT NOT NULL,
-                message_type TEXT NOT NULL,
-                priority TEXT DEFAULT 'normal',
-                attachment_path TEXT,
-                attachment_filename TEXT,
-                is_read INTEGER DEFAULT 0,
-                allow_replies INTEGER DEFAULT 0,
-                parent_message_id TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                read_at TIMESTAMP,
-                FOREIGN KEY (sender_id) REFERENCES users (user_id),
-                FOREIGN KEY (parent_message_id) REFERENCES messaging_system (message_id)
-            )
-        ''')
-        
-        # Create indexes for messaging_system table
-        c.execute("CREATE INDEX IF NOT EXISTS idx_messaging_recipient_id ON messaging_system (recipient_id)")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_messaging_sender_id ON messaging_system (sender_id)")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_messaging_created_at ON messaging_system (created_at)")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_messaging_is_read ON messaging_system (is_read)")
-        
-        # Add edited_at column if it doesn't exist (for message edit tracking)
-        try:
-            c.execute("ALTER TABLE messaging_system ADD COLUMN edited_at TIMESTAMP")
-            print("[OK] Added edited_at column to messaging_system table")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        # Create message_replies table
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS message_replies (
-                reply_id TEXT PRIMARY KEY,
-                message_id TEXT NOT NULL,
-                sender_id TEXT NOT NULL,
-                reply_text TEXT NOT NULL,
-                attachment_path TEXT,
-                attachment_filename TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (message_id) REFERENCES messaging_system (message_id),
-                FOREIGN KEY (sender_id) REFERENCES users (user_id)
-            )
-        ''')
-        
-        # Create messages table for user-to-user messaging
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS messages (
-                message_id TEXT PRIMARY KEY,
-                sender_id TEXT NOT NULL,
-                recipient_id TEXT NOT NULL,
-                subject TEXT,
-                body TEXT NOT NULL,
-                is_read INTEGER DEFAULT 0,
-                attachment_path TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                read_at TIMESTAMP,
-                FOREIGN KEY (sender_id) REFERENCES users (user_id),
-                FOREIGN KEY (recipient_id) REFERENCES users (user_id)
-            )
-        ''')
-        
-        # Create indexes for messages table
-        c.execute("CREATE INDEX IF NOT EXISTS idx_messages_recipient_id ON messages (recipient_id)")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_messages_sender_id ON messages (sender_id)")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_messages_is_read ON messages (is_read)")
-        
-        # ==================== PROCUREMENT SYSTEM TABLES ====================
-        
-        # Create inventory_files table for organizing parts into multiple files
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS inventory_files (
-                file_id TEXT PRIMARY KEY,
-                file_name TEXT NOT NULL,
-                vessel_id TEXT,
-                created_by TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                file_status TEXT DEFAULT 'active',
-                FOREIGN KEY (created_by) REFERENCES users (user_id)
-            )
-        ''')
-        
-        # Create inventory_file_parts table for parts within files
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS inventory_file_parts (
-                part_id TEXT PRIMARY KEY,
-                file_id TEXT NOT NULL,
-                part_number TEXT NOT NULL,
-                part_name TEXT NOT NULL,
-                category TEXT,
-                quantity INTEGER DEFAULT 0,
-                location TEXT,
-                supplier TEXT,
-                manufacturer TEXT,
-                notes TEXT,
-                added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                part_status TEXT DEFAULT 'active',
-                UNIQUE(file_id, part_number),
-                FOREIGN KEY (file_id) REFERENCES inventory_files (file_id)
-            )
-        ''')
-        
-        # Create procurement_requests table for low stock requests
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS procurement_requests (
-                request_id TEXT PRIMARY KEY,
-                part_number TEXT NOT NULL,
-                file_id TEXT,
-                quantity_requested INTEGER NOT NULL,
-                requested_by TEXT NOT NULL,
-                request_status TEXT DEFAULT 'pending',
-                priority TEXT DEFAULT 'standard',
-                requested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                notes TEXT,
-                FOREIGN KEY (requested_by) REFERENCES users (user_id),
-                FOREIGN KEY (file_id) REFERENCES inventory_files (file_id)
-            )
-        ''')
-        
-        # Create procurement_items table for new parts added by procurement
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS procurement_items (
-                item_id TEXT PRIMARY KEY,
-                request_id TEXT,
-                quantity_received INTEGER NOT NULL,
-                unit_price REAL,
-                inspection_document_path TEXT,
-                inspection_document_filename TEXT,
-                added_by TEXT NOT NULL,
-                added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                confirmed INTEGER DEFAULT 0,
-                confirmed_by TEXT,
-                confirmed_at TIMESTAMP,
-                FOREIGN KEY (request_id) REFERENCES procurement_requests (request_id),
-                FOREIGN KEY (added_by) REFERENCES users (user_id),
-                FOREIGN KEY (confirmed_by) REFERENCES users (user_id)
-            )
-        ''')
-        
-        # Create procurement_notifications table for tracking notifications sent
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS procurement_notifications (
-                notification_id TEXT PRIMARY KEY,
-                request_id TEXT,
-                recipient_id TEXT NOT NULL,
-                notification_type TEXT NOT NULL,
-                sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                read_at TIMESTAMP,
-                FOREIGN KEY (request_id) REFERENCES procurement_requests (request_id),
-                FOREIGN KEY (recipient_id) REFERENCES users (user_id)
-            )
-        ''')
-        
-        # Create Machinery Manual Tables
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS machinery_manual_folders (
-                folder_id TEXT PRIMARY KEY,
-                folder_name TEXT NOT NULL,
-                ship_name TEXT NOT NULL,
-                vessel_id TEXT,
-                description TEXT,
-                created_by TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                folder_status TEXT DEFAULT 'active',
-                FOREIGN KEY (created_by) REFERENCES users (user_id),
-                UNIQUE(ship_name, folder_name)
-            )
-        ''')
-        
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS machinery_manual_files (
-                file_id TEXT PRIMARY KEY,
-                folder_id TEXT NOT NULL,
-                file_name TEXT NOT NULL,
-                file_path TEXT NOT NULL,
-                file_size INTEGER,
-                file_type TEXT,
-                machinery_type TEXT,
-                uploaded_by TEXT NOT NULL,
-                uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                file_status TEXT DEFAULT 'active',
-                FOREIGN KEY (folder_id) REFERENCES machinery_manual_folders (folder_id),
-                FOREIGN KEY (uploaded_by) REFERENCES users (user_id)
-            )
-        ''')
-        
-        # Add 2FA fields to users table (if not already present)
-        try:
-            c.execute("ALTER TABLE users ADD COLUMN two_factor_enabled INTEGER DEFAULT 0")
-        except Exception:
-            pass
-        try:
-            c.execute("ALTER TABLE users ADD COLUMN two_factor_secret TEXT")
-        except Exception:
-            pass
-        
-        # Add access_expiry field for DMPO HQ officer access management
-        try:
-            c.execute("ALTER TABLE users ADD COLUMN access_expiry TIMESTAMP")
-        except Exception:
-            pass
-        
-        # Add reply context and edit tracking to message_replies
-        try:
-            c.execute("ALTER TABLE message_replies ADD COLUMN reply_to_message_id TEXT")
-        except Exception:
-            pass
-        try:
-            c.execute("ALTER TABLE message_replies ADD COLUMN edited_at TIMESTAMP")
-        except Exception:
-            pass
-        
-        # Add edit tracking to messaging_system
-        try:
-            c.execute("ALTER TABLE messaging_system ADD COLUMN edited_at TIMESTAMP")
-        except Exception:
-            pass
-
-        # ==================== CREW MANAGEMENT TABLES ====================
-        
-        # Create crew_members table for managing vessel crew
+    # Schema, migrations and seed accounts are applied as one transaction
+    # (sqlite3 runs DDL in autocommit otherwise): a single commit at the
+    # end of init_db(), and a failed start leaves the database as it was. The
+    # connection is already in WAL mode with synchronous=NORMAL (see
+    # get_db_connection()), so that commit appends to the WAL without an
+    # fsync. WAL lets the app's readers keep going while a writer is
+    # active; its one cost, a reader-held snapshot delaying checkpoints,
+    # does not matter to a single-writer app like this one.
+    # executescript() would commit an open transaction before running, so
+    # the script opens it itself; every CREATE ... IF NOT EXISTS is then
+    # parsed and applied in one pass. IMMEDIATE takes the write lock up
+    # front, as begin_immediate() does, so workers booting together queue
+    # on the busy timeout instead of failing to upgrade a read lock.
+    conn.executescript(f"BEGIN IMMEDIATE;\n{SCHEMA_DDL}")
+
+    # Check if the table exists and has required columns
+    c.execute("PRAGMA table_info(service_evaluations)")
+    columns = [col[1] for col in c.fetchall()]
+
+    if not columns:  # Table doesn't exist or is empty
+        # Recreate with correct structure
+        c.execute("DROP TABLE IF EXISTS service_evaluations")
         c.execute('''
-            CREATE TABLE IF NOT EXISTS crew_members (
-                crew_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            CREATE TABLE service_evaluations (
+                id TEXT PRIMARY KEY,
+                evaluator_id TEXT NOT NULL,
                 vessel_id TEXT,
-                first_name TEXT NOT NULL,
-                last_name TEXT NOT NULL,
-                department TEXT NOT NULL,
-                rank TEXT NOT NULL,
-                license_number TEXT UNIQUE,
-                nationality TEXT,
-                date_of_birth TEXT,
-                phone TEXT,
-                email TEXT,
-                emergency_contact TEXT,
-                emergency_phone TEXT,
-                stcw_certificate TEXT,
-                stcw_expiry DATE,
-                gmdss_certificate TEXT,
-                gmdss_expiry DATE,
-                mlc_certificate TEXT,
-                mlc_expiry DATE,
-                medical_certificate TEXT,
-                medical_expiry DATE,
-                other_certifications TEXT,
-                certification_expiry TEXT,
-                date_joined TEXT,
-                status TEXT DEFAULT 'active',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create indexes for crew_members table
-        c.execute("CREATE INDEX IF NOT EXISTS idx_crew_vessel_id ON crew_members (vessel_id)")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_crew_department ON crew_members (department)")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_crew_status ON crew_members (status)")
-        
-        # Add missing columns to crew_members if they don't exist
-        try:
-            c.execute("ALTER TABLE crew_members ADD COLUMN profile_picture TEXT")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        try:
-            c.execute("ALTER TABLE crew_members ADD COLUMN specialized_certificates TEXT")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
-        
-        # ==================== VESSEL MANAGEMENT TABLES ====================
-        
-        # Create and migrate vessels schema for both new and legacy databases.
-        ensure_vessels_schema(c)
-        
-        # Create vessel_performance_monitoring table for performance data
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS vessel_performance_monitoring (
-                performance_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                vessel_id INTEGER NOT NULL,
-                reporting_month TEXT NOT NULL,
-                average_speed REAL,
-                fuel_consumption_metric_tons REAL,
-                fuel_consumption_per_ton_mile REAL,
-                co2_emissions_metric_tons REAL,
-                sox_emissions_kilograms REAL,
-                nox_emissions_kilograms REAL,
-                average_load_factor REAL,
-                vessel_availability_percentage REAL,
-                number_of_port_calls INTEGER,
-                nautical_miles_traveled REAL,
+                sqi_score REAL,
+                evaluation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 notes TEXT,
-                reported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (vessel_id) REFERENCES vessels (vessel_id)
-            )
-        ''')
-        
-        # Create indexes for vessel_performance_monitoring
-        c.execute("CREATE INDEX IF NOT EXISTS idx_performance_vessel_id ON vessel_performance_monitoring (vessel_id)")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_performance_month ON vessel_performance_monitoring (reporting_month)")
-        
-        # Create vessel_certificates table for certificate management
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS vessel_certificates (
-                certificate_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                vessel_id INTEGER NOT NULL,
-                certificate_type TEXT NOT NULL,
-                issue_date TEXT,
-                expiry_date TEXT,
-                issuing_authority TEXT,
-                certificate_number TEXT,
-                document_path TEXT,
-                status TEXT DEFAULT 'active',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (vessel_id) REFERENCES vessels (vessel_id)
+                status TEXT DEFAULT 'completed',
+                FOREIGN KEY (evaluator_id) REFERENCES users (user_id)
             )
         ''')
-        
-        # Create indexes for vessel_certificates
-        c.execute("CREATE INDEX IF NOT EXISTS idx_vessel_cert_vessel_id ON vessel_certificates (vessel_id)")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_vessel_cert_type ON vessel_certificates (certificate_type)")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_vessel_cert_expiry ON vessel_certificates (expiry_date)")
-
-        # ==================== CERTIFICATE MANAGEMENT TABLES ====================
-        
-        # Create certificate_documents table for storing uploaded certificate files
+        log("[OK] Created service_evaluations table with correct structure")
+    elif 'evaluator_id' not in columns:
+        # Drop and recreate if structure is wrong
+        c.execute("DROP TABLE IF EXISTS service_evaluations")
         c.execute('''
-            CREATE TABLE IF NOT EXISTS certificate_documents (
-                doc_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                crew_id INTEGER NOT NULL,
-                certificate_type TEXT NOT NULL,
-                document_path TEXT NOT NULL,
-                file_name TEXT NOT NULL,
-                file_size INTEGER,
-                uploaded_by TEXT,
-                uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            CREATE TABLE service_evaluations (
+                id TEXT PRIMARY KEY,
+                evaluator_id TEXT NOT NULL,
+                vessel_id TEXT,
+                sqi_score REAL,
+                evaluation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 notes TEXT,
-                FOREIGN KEY (crew_id) REFERENCES crew_members (crew_id)
+                status TEXT DEFAULT 'completed',
+                FOREIGN KEY (evaluator_id) REFERENCES users (user_id)
             )
         ''')
+        log("[OK] Recreated service_evaluations table with correct structure")
+
+    # Backwards-compatible schema upgrades for existing databases
+    for table, table_columns in SCHEMA_ADDED_COLUMNS.items():
+        added = add_missing_columns(c, table, table_columns)
+        if added:
+            log(f"[OK] Added {', '.join(added)} to {table} table")
+    
+    # REAL affinity already stores numeric text as floats; clear any leftover
+    # non-numeric coordinates so readers can trust the column type.
+    c.execute("UPDATE emergency_requests SET latitude = NULL WHERE typeof(latitude) = 'text'")
+    c.execute("UPDATE emergency_requests SET longitude = NULL WHERE typeof(longitude) = 'text'")
+    
+    # Queue and list indexes over migrated columns, so created after them
+    c.execute("CREATE INDEX IF NOT EXISTS idx_mr_pending_rank ON maintenance_requests (status, priority_rank, created_at DESC)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_mr_submitted_by_created ON maintenance_requests (submitted_by, created_at DESC)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_mr_rank_created ON maintenance_requests (priority_rank, created_at DESC)")
+    
+    # Create and migrate vessels schema for both new and legacy databases.
+    ensure_vessels_schema(c)
+    
+    # Seed from existing completed requests the first time the table is created
+    c.execute('''
+        INSERT OR IGNORE INTO dashboard_stats (key, sum_val, n)
+        SELECT 'response_hours',
+               COALESCE(SUM((julianday(updated_at) - julianday(created_at)) * 24), 0),
+               COUNT(*)
+        FROM maintenance_requests
+        WHERE status = 'completed' AND updated_at IS NOT NULL AND created_at IS NOT NULL
+    ''')
+
+    # Give the planner row counts for the indexes above; without sqlite_stat1
+    # it picks between them by heuristics alone. analysis_limit samples each
+    # index rather than reading it whole. Empty tables get no statistics, so
+    # a new database keeps the heuristics until close_db_pools() refreshes them.
+    c.execute("PRAGMA analysis_limit=400")
+    c.execute("ANALYZE")
+
+    c.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def init_db():
+    """
+    Initialize database schema while preserving existing data.
+    Uses 'CREATE TABLE IF NOT EXISTS' to ensure NO DATA LOSS.
+    Safe for repeated calls during deployments.
+    
+    All user accounts and conversations are PRESERVED across deployments.
+    Only demo accounts are ensured to exist (not reset).
+    """
+    # Progress lines from inside the transaction are held back and printed
+    # after it ends, so slow stdout (a log pipe or driver) never blocks
+    # while the write lock is held
+    init_log = []
+    log = init_log.append
+    conn = get_db_connection()
+    try:
+        c = conn.cursor()
         
-        # Create indexes for certificate_documents
-        c.execute("CREATE INDEX IF NOT EXISTS idx_cert_doc_crew_id ON certificate_documents (crew_id)")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_cert_doc_type ON certificate_documents (certificate_type)")
-        
-        # Create certificate_alerts table for tracking expiry alerts sent
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS certificate_alerts (
-                alert_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                crew_id INTEGER NOT NULL,
-                certificate_type TEXT NOT NULL,
-                alert_type TEXT NOT NULL,
-                days_until_expiry INTEGER,
-                alert_sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                recipient_email TEXT,
-                recipient_phone TEXT,
-                notification_status TEXT DEFAULT 'sent',
-                expiry_date DATE,
-                FOREIGN KEY (crew_id) REFERENCES crew_members (crew_id)
-        ''')
-        
-        # Create indexes for certificate_alerts
-        c.execute("CREATE INDEX IF NOT EXISTS idx_cert_alert_crew_id ON certificate_alerts (crew_id)")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_cert_alert_type ON certificate_alerts (alert_type)")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_cert_alert_sent_at ON certificate_alerts (alert_sent_at)")
-        
-        # ==================== PUSH NOTIFICATION SUBSCRIPTIONS ====================
+        # Log data BEFORE initialization
+        print("\n" + "="*70)
+        print("[DATABASE] PRESERVATION CHECK - PRE-INITIALIZATION")
+        print("="*70)
         
-        # Create push_subscriptions table for storing device subscriptions for Web Push
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS push_subscriptions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT NOT NULL,
-                endpoint TEXT NOT NULL UNIQUE,
-                auth_key TEXT NOT NULL,
-                p256dh_key TEXT NOT NULL,
-                user_agent TEXT,
-                is_active INTEGER DEFAULT 1,
-                subscribed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_used_at TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (user_id)
-            )
-        ''')
+        try:
+            c.execute("SELECT COUNT(*) FROM users")
+            user_count_before = c.fetchone()[0]
+            print(f"[DATA] Users before: {user_count_before}")
+        except:
+            user_count_before = 0
+            print("[INFO] Users table does not exist yet")
         
-        # Create index for push_subscriptions
-        c.execute("CREATE INDEX IF NOT EXISTS idx_push_user_id ON push_subscriptions (user_id)")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_push_is_active ON push_subscriptions (is_active)")
+        try:
+            c.execute("SELECT COUNT(*) FROM messages")
+            messages_before = c.fetchone()[0]
+            print(f"[DATA] Messages before: {messages_before}")
+        except:
+            messages_before = 0
         
-        # Create crew_training_plans table for generating training recommendations
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS crew_training_plans (
-                plan_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                crew_id INTEGER NOT NULL,
-                vessel_id INTEGER,
-                training_type TEXT NOT NULL,
-                certificate_gap TEXT NOT NULL,
-                priority TEXT DEFAULT 'medium',
-                recommended_provider TEXT,
-                estimated_duration TEXT,
-                estimated_cost REAL,
-                plan_status TEXT DEFAULT 'pending',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                approved_at TIMESTAMP,
-                completed_at TIMESTAMP,
-                notes TEXT,
-                FOREIGN KEY (crew_id) REFERENCES crew_members (crew_id),
-                FOREIGN KEY (vessel_id) REFERENCES vessels (vessel_id)
-            )
-        ''')
+        try:
+            c.execute("SELECT COUNT(*) FROM maintenance_requests")
+            requests_before = c.fetchone()[0]
+            print(f"[DATA] Maintenance requests before: {requests_before}")
+        except:
+            requests_before = 0
         
-        # Create indexes for crew_training_plans
-        c.execute("CREATE INDEX IF NOT EXISTS idx_training_plan_crew_id ON crew_training_plans (crew_id)")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_training_plan_status ON crew_training_plans (plan_status)")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_training_plan_priority ON crew_training_plans (priority)")
+        # Count existing records before initialization
+        c.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table'")
+        table_count_before = c.fetchone()[0]
 
-        conn.commit()
-        print("[OK] Database tables initialized successfully")
+        c.execute("PRAGMA user_version")
+        schema_version = c.fetchone()[0]
+        if schema_version < SCHEMA_VERSION:
+            apply_schema(c, conn, log=log)
+            log("[OK] Database tables initialized successfully")
+        else:
+            # The seed writes below still share one transaction and one commit
+            begin_immediate(conn)
+            log(f"[OK] Database schema is current (version {schema_version})")
+        
+        # Resolve optional tables once here rather than probing sqlite_master per request
+        c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='service_evaluations'")
+        app.config['HAS_SERVICE_EVALUATIONS'] = c.fetchone() is not None
         
         # Ensure port engineer account exists and is properly configured
-        ensure_port_engineer_account(c, conn)
+        ensure_port_engineer_account(c, conn, commit=False, log=log)
         
         # Always update demo accounts to correct credentials and status
-        ensure_demo_accounts(c, conn)
-        print("[OK] DMPO HQ ensured: dmpo@marine.com / Quality@2026")
-        print("[OK] Harbour Master ensured: harbour_master@marine.com / Harbour@2026")
+        ensure_demo_accounts(c, conn, commit=False)
+        log("[OK] DMPO HQ ensured: dmpo@marine.com / Quality@2026")
+        log("[OK] Harbour Master ensured: harbour_master@marine.com / Harbour@2026")
         
-        # Create a sample emergency request
-        c.execute("SELECT COUNT(*) FROM emergency_requests")
-        if c.fetchone()[0] == 0:
-            emergency_id = generate_id('EMG')
-            c.execute('''
-                INSERT INTO emergency_requests
-                (emergency_id, ship_name, emergency_type, severity_level, description,
-                 immediate_actions, resources_required, reported_by, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (emergency_id, 'Atlantic Voyager', 'Engine Failure', 'critical',
-                  'Complete engine failure during voyage, ship adrift',
-                  'Dispatch rescue team, send tugboat, evacuate if necessary',
-                  'Tugboat, rescue team, emergency supplies', 'PE001', 'pending'))
-            conn.commit()
-            print("[OK] Sample emergency request created")
+        # Create a sample emergency request when the table is empty; the
+        # emptiness check is part of the INSERT, so it takes one statement
+        c.execute('''
+            INSERT INTO emergency_requests
+            (emergency_id, ship_name, emergency_type, severity_level, description,
+             immediate_actions, resources_required, reported_by, status)
+            SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?
+            WHERE NOT EXISTS (SELECT 1 FROM emergency_requests)
+        ''', (generate_id('EMG'), 'Atlantic Voyager', 'Engine Failure', 'critical',
+              'Complete engine failure during voyage, ship adrift',
+              'Dispatch rescue team, send tugboat, evacuate if necessary',
+              'Tugboat, rescue team, emergency supplies', 'PE001', 'pending'))
+        if c.rowcount:
+            log("[OK] Sample emergency request created")
         
         conn.commit()
+        print("\n".join(init_log))
+        init_log.clear()
+        app.config['VESSELS_SCHEMA_READY'] = True
         
         # Count records after initialization to prove data preservation
-        c.execute("SELECT COUNT(*) FROM users")
-        users_after = c.fetchone()[0]
-        c.execute("SELECT COUNT(*) FROM messages")
-        messages_after = c.fetchone()[0]
-        c.execute("SELECT COUNT(*) FROM maintenance_requests")
-        requests_after = c.fetchone()[0]
-        c.execute("SELECT COUNT(*) FROM logbook_entries")
-        logbook_after = c.fetchone()[0]
+        c.execute("""
+            SELECT (SELECT COUNT(*) FROM users),
+                   (SELECT COUNT(*) FROM messages),
+                   (SELECT COUNT(*) FROM maintenance_requests),
+                   (SELECT COUNT(*) FROM logbook_entries)
+        """)
+        users_after, messages_after, requests_after, logbook_after = c.fetchone()
         
         # Print data preservation confirmation
         print("\n" + "="*70)
@@ -14272,6 +14894,8 @@ def init_db():
         print("="*70 + "\n")
 
     except Exception as e:
+        if init_log:
+            print("\n".join(init_log))
         print(f"[ERROR] Error initializing database: {e}")
     finally:
         conn.close()
@@ -14282,20 +14906,33 @@ def init_db():
 @login_required
 def api_get_maintenance_request(request_id):
     """Get a single maintenance request by ID."""
-    conn = get_db_connection()
+    conn = get_request_db()
     try:
         c = conn.cursor()
+        # Requester, assignee and approver names come from the same statement
+        # rather than a users lookup each; the requester may be stored by user
+        # ID or by email, and the first matching account is used
         c.execute("""
-            SELECT request_id, ship_name, maintenance_type, request_type, priority, criticality,
-                   description, location, estimated_duration, resources_needed, requested_by,
-                   status, assigned_to, approved, approved_by, approved_at, captain_comments,
-                   rejection_reason, rejected_by, rejected_at, completed_at, created_at, updated_at, notes,
-                   severity, assessment_details, workflow_status, assigned_pm, pm_approval_at,
-                   part_number, part_name, part_category, quantity, manufacturer,
-                   requested_by_name, requested_by_email, requested_by_phone, emergency_contact,
-                   imo_number, vessel_type, company, eta
-            FROM maintenance_requests
-            WHERE request_id = ?
+            SELECT mr.request_id, mr.ship_name, mr.maintenance_type, mr.request_type, mr.priority, mr.criticality,
+                   mr.description, mr.location, mr.estimated_duration, mr.resources_needed, mr.requested_by,
+                   mr.status, mr.assigned_to, mr.approved, mr.approved_by, mr.approved_at, mr.captain_comments,
+                   mr.rejection_reason, mr.rejected_by, mr.rejected_at, mr.completed_at, mr.created_at, mr.updated_at, mr.notes,
+                   mr.severity, mr.assessment_details, mr.workflow_status, mr.assigned_pm, mr.pm_approval_at,
+                   mr.part_number, mr.part_name, mr.part_category, mr.quantity, mr.manufacturer,
+                   mr.requested_by_name, mr.requested_by_email, mr.requested_by_phone, mr.emergency_contact,
+                   mr.imo_number, mr.vessel_type, mr.company, mr.eta,
+                   ru.first_name AS req_first_name, ru.last_name AS req_last_name, ru.email AS req_email,
+                   au.first_name AS asg_first_name, au.last_name AS asg_last_name, au.email AS asg_email,
+                   pu.first_name AS apr_first_name, pu.last_name AS apr_last_name
+            FROM maintenance_requests mr
+            LEFT JOIN users ru ON ru.user_id = (
+                SELECT u.user_id FROM users u
+                WHERE u.user_id = mr.requested_by OR u.email = mr.requested_by
+                LIMIT 1
+            )
+            LEFT JOIN users au ON au.user_id = mr.assigned_to
+            LEFT JOIN users pu ON pu.user_id = mr.approved_by
+            WHERE mr.request_id = ?
         """, (request_id,))
         
         request_data = c.fetchone()
@@ -14303,56 +14940,33 @@ def api_get_maintenance_request(request_id):
             return jsonify({'success': False, 'error': 'Request not found'})
         
         request_dict = dict(request_data)
+        requester = {k: request_dict.pop(k) for k in ('req_first_name', 'req_last_name', 'req_email')}
+        assigned = {k: request_dict.pop(k) for k in ('asg_first_name', 'asg_last_name', 'asg_email')}
+        approver = {k: request_dict.pop(k) for k in ('apr_first_name', 'apr_last_name')}
         
-        # Use stored requester name/email if available, otherwise try to fetch from users table
-        if not request_dict.get('requested_by_name') and request_dict.get('requested_by'):
-            c.execute("""
-                SELECT first_name, last_name, email 
-                FROM users 
-                WHERE user_id = ? OR email = ?
-                LIMIT 1
-            """, (request_dict['requested_by'], request_dict['requested_by']))
-            user = c.fetchone()
-            if user:
-                request_dict['requested_by_name'] = f"{user['first_name']} {user['last_name']}"
-                if not request_dict.get('requested_by_email'):
-                    request_dict['requested_by_email'] = user.get('email', '')
+        # Use stored requester name/email if available, otherwise the matching user's
+        if not request_dict.get('requested_by_name') and requester['req_first_name'] is not None:
+            request_dict['requested_by_name'] = f"{requester['req_first_name']} {requester['req_last_name']}"
+            if not request_dict.get('requested_by_email'):
+                request_dict['requested_by_email'] = requester['req_email'] or ''
         
         # Set requester_name for backwards compatibility
         request_dict['requester_name'] = request_dict.get('requested_by_name')
         request_dict['requester_email'] = request_dict.get('requested_by_email')
         
-        # Get assigned to info if assigned_to exists
-        if request_dict.get('assigned_to'):
-            c.execute("""
-                SELECT first_name, last_name, email 
-                FROM users 
-                WHERE user_id = ?
-                LIMIT 1
-            """, (request_dict['assigned_to'],))
-            assigned = c.fetchone()
-            if assigned:
-                request_dict['assigned_to_name'] = f"{assigned['first_name']} {assigned['last_name']}"
-                request_dict['assigned_to_email'] = assigned.get('email', '')
-        
-        # Get approver info if approved_by exists
-        if request_dict.get('approved_by'):
-            c.execute("""
-                SELECT first_name, last_name 
-                FROM users 
-                WHERE user_id = ?
-                LIMIT 1
-            """, (request_dict['approved_by'],))
-            approver = c.fetchone()
-            if approver:
-                request_dict['approved_by_name'] = f"{approver['first_name']} {approver['last_name']}"
+        # Assigned to info if the assignee has an account
+        if assigned['asg_first_name'] is not None:
+            request_dict['assigned_to_name'] = f"{assigned['asg_first_name']} {assigned['asg_last_name']}"
+            request_dict['assigned_to_email'] = assigned['asg_email'] or ''
+        
+        # Approver info if the approver has an account
+        if approver['apr_first_name'] is not None:
+            request_dict['approved_by_name'] = f"{approver['apr_first_name']} {approver['apr_last_name']}"
         
         return jsonify({'success': True, 'request': request_dict})
     except Exception as e:
         app.logger.error(f"Error getting maintenance request: {e}")
         return jsonify({'success': False, 'error': str(e)})
-    finally:
-        conn.close()
 
 @app.route('/api/maintenance-requests/<request_id>/assign', methods=['POST'])
 @login_required
@@ -14362,7 +14976,7 @@ def api_assign_maintenance_request(request_id):
         data = request.get_json()
         assigned_to = data.get('assigned_to', current_user.id)
         
-        conn = get_db_connection()
+        conn = get_request_db()
         try:
             c = conn.cursor()
             c.execute("""
@@ -14378,8 +14992,6 @@ def api_assign_maintenance_request(request_id):
             conn.rollback()
             app.logger.error(f"Error assigning request: {e}")
             return jsonify({'success': False, 'error': 'Database error'})
-        finally:
-            conn.close()
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -14388,7 +15000,7 @@ def api_assign_maintenance_request(request_id):
 def api_start_maintenance_request(request_id):
     """Start service for maintenance request."""
     try:
-        conn = get_db_connection()
+        conn = get_request_db()
         try:
             c = conn.cursor()
             c.execute("""
@@ -14404,8 +15016,6 @@ def api_start_maintenance_request(request_id):
             conn.rollback()
             app.logger.error(f"Error starting service: {e}")
             return jsonify({'success': False, 'error': 'Database error'})
-        finally:
-            conn.close()
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -14420,14 +15030,17 @@ def api_update_maintenance_status(request_id):
         if not status:
             return jsonify({'success': False, 'error': 'Status is required'})
         
-        conn = get_db_connection()
+        conn = get_request_db()
         try:
             c = conn.cursor()
+            now = datetime.now()
+            if status == 'completed':
+                record_request_completion(c, request_id, now)
             c.execute("""
                 UPDATE maintenance_requests
                 SET status = ?, updated_at = ?
                 WHERE request_id = ?
-            """, (status, datetime.now(), request_id))
+            """, (status, now, request_id))
             conn.commit()
             
             log_activity('status_updated', f'Updated status of request {request_id} to {status}')
@@ -14436,8 +15049,6 @@ def api_update_maintenance_status(request_id):
             conn.rollback()
             app.logger.error(f"Error updating status: {e}")
             return jsonify({'success': False, 'error': 'Database error'})
-        finally:
-            conn.close()
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -14448,9 +15059,11 @@ def api_approve_maintenance_request(request_id):
     """Approve a maintenance request (Port Manager/PE only)."""
     try:
         data = request.get_json() or {}
-        conn = get_db_connection()
+        conn = get_request_db()
         try:
             c = conn.cursor()
+            # Approval and its notifications are written in one transaction
+            c.execute("BEGIN IMMEDIATE")
             
             # Check if request exists
             c.execute("SELECT * FROM maintenance_requests WHERE request_id = ?", (request_id,))
@@ -14474,15 +15087,6 @@ def api_approve_maintenance_request(request_id):
                 WHERE request_id = ?
             """, (current_user.id, datetime.now(), current_user.id, datetime.now(), new_workflow_status, request_id))
             
-            conn.commit()
-            
-            # Log workflow action
-            log_workflow_action(request_id, 'pm_approved', current_user.id, 
-                              f'Port Manager {current_user.get_full_name()} approved critical resolution plan')
-            
-            # Log activity
-            log_activity('maintenance_approved', f'Approved maintenance request {request_id}')
-            
             # If CRITICAL, notify HM & PE for execution
             if severity == 'CRITICAL':
                 c.execute("SELECT user_id FROM users WHERE role IN ('harbour_master', 'port_engineer') AND is_active = 1")
@@ -14493,7 +15097,8 @@ def api_approve_maintenance_request(request_id):
                         f'CRITICAL Request Approved for Execution: {request_data["ship_name"]}',
                         f'Critical maintenance plan approved. Begin execution for request {request_id}.',
                         'danger',
-                        f'/view-request/{request_id}'
+                        f'/view-request/{request_id}',
+                        conn=conn
                     )
             else:
                 # For MINOR, notify HM to coordinate
@@ -14505,9 +15110,20 @@ def api_approve_maintenance_request(request_id):
                         f'Minor Maintenance - Coordinate Action: {request_data["ship_name"]}',
                         f'Minor maintenance request {request_id}. Coordinate with Port Engineer on technical details.',
                         'info',
-                        f'/view-request/{request_id}'
+                        f'/view-request/{request_id}',
+                        conn=conn
                     )
             
+            conn.commit()
+            invalidate_dashboard_cache(request_data.get('submitted_by'), request_data.get('requested_by'))
+            
+            # Log workflow action
+            log_workflow_action(request_id, 'pm_approved', current_user.id, 
+                              f'Port Manager {current_user.get_full_name()} approved critical resolution plan')
+            
+            # Log activity
+            log_activity('maintenance_approved', f'Approved maintenance request {request_id}')
+            
             return jsonify({
                 'success': True,
                 'message': 'Maintenance request approved successfully'
@@ -14516,8 +15132,6 @@ def api_approve_maintenance_request(request_id):
             conn.rollback()
             app.logger.error(f"Error approving maintenance request: {e}")
             return jsonify({'success': False, 'error': 'Database error'})
-        finally:
-            conn.close()
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -14528,7 +15142,7 @@ def api_execute_maintenance_request(request_id):
     """Mark maintenance as in execution."""
     try:
         data = request.get_json() or {}
-        conn = get_db_connection()
+        conn = get_request_db()
         try:
             c = conn.cursor()
             
@@ -14553,8 +15167,6 @@ def api_execute_maintenance_request(request_id):
             conn.rollback()
             app.logger.error(f"Error executing maintenance request: {e}")
             return jsonify({'success': False, 'error': str(e)})
-        finally:
-            conn.close()
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -14565,7 +15177,7 @@ def api_resolve_maintenance_request(request_id):
     """Mark maintenance as resolved."""
     try:
         data = request.get_json() or {}
-        conn = get_db_connection()
+        conn = get_request_db()
         try:
             c = conn.cursor()
             
@@ -14574,13 +15186,15 @@ def api_resolve_maintenance_request(request_id):
             if not request_data:
                 return jsonify({'success': False, 'error': 'Request not found'})
             
+            completed_at = datetime.now()
+            record_request_completion(c, request_id, completed_at)
             c.execute("""
                 UPDATE maintenance_requests
                 SET workflow_status = 'resolved',
                     status = 'completed',
                     completed_at = ?
                 WHERE request_id = ?
-            """, (datetime.now(), request_id))
+            """, (completed_at, request_id))
             conn.commit()
             
             log_workflow_action(request_id, 'resolved', current_user.id,
@@ -14603,8 +15217,6 @@ def api_resolve_maintenance_request(request_id):
             conn.rollback()
             app.logger.error(f"Error resolving maintenance request: {e}")
             return jsonify({'success': False, 'error': str(e)})
-        finally:
-            conn.close()
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -14613,7 +15225,7 @@ def api_resolve_maintenance_request(request_id):
 def api_maintenance_request_history(request_id):
     """Get complete history and workflow log for a maintenance request (for PM & PE review)."""
     try:
-        conn = get_db_connection()
+        conn = get_request_db()
         try:
             c = conn.cursor()
             
@@ -14652,8 +15264,6 @@ def api_maintenance_request_history(request_id):
         except Exception as e:
             app.logger.error(f"Error fetching maintenance history: {e}")
             return jsonify({'success': False, 'error': str(e)})
-        finally:
-            conn.close()
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -14667,9 +15277,11 @@ def api_reject_maintenance_request(request_id):
         data = request.get_json() or {}
         rejection_reason = data.get('rejection_reason', 'No reason provided')
         
-        conn = get_db_connection()
+        conn = get_request_db()
         try:
             c = conn.cursor()
+            # Rejection and the requester notification are written in one transaction
+            c.execute("BEGIN IMMEDIATE")
             
             # Check if request exists
             c.execute("SELECT * FROM maintenance_requests WHERE request_id = ?", (request_id,))
@@ -14688,11 +15300,6 @@ def api_reject_maintenance_request(request_id):
                 WHERE request_id = ?
             """, (current_user.id, datetime.now(), rejection_reason, request_id))
             
-            conn.commit()
-            
-            # Log activity
-            log_activity('maintenance_rejected', f'Rejected maintenance request {request_id}')
-            
             # Send notification to requester if they have an account
             if request_data['requested_by']:
                 create_notification(
@@ -14700,9 +15307,16 @@ def api_reject_maintenance_request(request_id):
                     'Maintenance Request Rejected',
                     f'Your maintenance request {request_id} for {request_data["ship_name"]} has been rejected. Reason: {rejection_reason}',
                     'warning',
-                    '/maintenance-request'
+                    '/maintenance-request',
+                    conn=conn
                 )
             
+            conn.commit()
+            invalidate_dashboard_cache(request_data['submitted_by'], request_data['requested_by'])
+            
+            # Log activity
+            log_activity('maintenance_rejected', f'Rejected maintenance request {request_id}')
+            
             return jsonify({
                 'success': True,
                 'message': 'Maintenance request rejected'
@@ -14711,8 +15325,6 @@ def api_reject_maintenance_request(request_id):
             conn.rollback()
             app.logger.error(f"Error rejecting maintenance request: {e}")
             return jsonify({'success': False, 'error': 'Database error'})
-        finally:
-            conn.close()
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -14798,7 +15410,7 @@ def api_maintenance_request_progress(request_id):
 def api_pending_maintenance_approvals():
     """Get maintenance requests pending approval (Port Engineer only)."""
     try:
-        conn = get_db_connection()
+        conn = get_request_db()
         try:
             c = conn.cursor()
             
@@ -14831,13 +15443,7 @@ def api_pending_maintenance_approvals():
                 AND (mr.approved IS NULL OR mr.approved = 0)
                 AND mr.rejection_reason IS NULL
                 ORDER BY 
-                    CASE mr.priority
-                        WHEN 'critical' THEN 1
-                        WHEN 'high' THEN 2
-                        WHEN 'medium' THEN 3
-                        WHEN 'low' THEN 4
-                        ELSE 5
-                    END,
+                    mr.priority_rank,
                     CASE mr.severity
                         WHEN 'CRITICAL' THEN 1
                         WHEN 'MAJOR' THEN 2
@@ -14856,8 +15462,6 @@ def api_pending_maintenance_approvals():
         except Exception as e:
             app.logger.error(f"Error getting pending approvals: {e}", exc_info=True)
             return jsonify({'success': False, 'error': str(e)})
-        finally:
-            conn.close()
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -14868,7 +15472,7 @@ def api_update_maintenance_request(request_id):
     try:
         data = request.get_json()
         
-        conn = get_db_connection()
+        conn = get_request_db()
         try:
             c = conn.cursor()
             
@@ -14888,11 +15492,14 @@ def api_update_maintenance_request(request_id):
                 updates.append('notes = ?')
                 params.append(data['notes'])
             
+            now = datetime.now()
             updates.append('updated_at = ?')
-            params.append(datetime.now())
+            params.append(now)
             params.append(request_id)
             
             if updates:
+                if data.get('status') == 'completed':
+                    record_request_completion(c, request_id, now)
                 query = f"UPDATE maintenance_requests SET {', '.join(updates)} WHERE request_id = ?"
                 c.execute(query, params)
                 conn.commit()
@@ -14905,8 +15512,6 @@ def api_update_maintenance_request(request_id):
             conn.rollback()
             app.logger.error(f"Error updating request: {e}")
             return jsonify({'success': False, 'error': 'Database error'})
-        finally:
-            conn.close()
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -14921,7 +15526,7 @@ def api_add_maintenance_notes(request_id):
         if not notes:
             return jsonify({'success': False, 'error': 'Notes are required'})
         
-        conn = get_db_connection()
+        conn = get_request_db()
         try:
             c = conn.cursor()
             c.execute("SELECT notes FROM maintenance_requests WHERE request_id = ?", (request_id,))
@@ -14943,8 +15548,6 @@ def api_add_maintenance_notes(request_id):
             conn.rollback()
             app.logger.error(f"Error adding notes: {e}")
             return jsonify({'success': False, 'error': 'Database error'})
-        finally:
-            conn.close()
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -14953,7 +15556,7 @@ def api_add_maintenance_notes(request_id):
 def api_export_maintenance_request(request_id):
     """Export maintenance request data."""
     try:
-        conn = get_db_connection()
+        conn = get_request_db()
         try:
             c = conn.cursor()
             c.execute("SELECT * FROM maintenance_requests WHERE request_id = ?", (request_id,))
@@ -14966,8 +15569,6 @@ def api_export_maintenance_request(request_id):
         except Exception as e:
             app.logger.error(f"Error exporting request: {e}")
             return jsonify({'success': False, 'error': 'Database error'})
-        finally:
-            conn.close()
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
@@ -14994,6 +15595,28 @@ def api_share_maintenance_request():
 
 # ==================== INTERNATIONAL REPORTS API ENDPOINTS ====================
 
+def signature_blob(data_url):
+    """
+    Decode a signature pad's PNG data URL for storing as a BLOB.
+    
+    The raw image is a third smaller than its base64 text and is bound as a
+    BLOB, which SQLite stores as-is under any column affinity. Input that is
+    not valid base64 is stored unchanged, as it was before.
+    
+    Args:
+        data_url (str): ``data:image/png;base64,...`` from canvas.toDataURL()
+    
+    Returns:
+        bytes or str: PNG bytes, the original value if it cannot be decoded,
+        or None when no signature was given
+    """
+    if not data_url:
+        return None
+    try:
+        return base64.b64decode(data_url.split(',', 1)[-1], validate=True)
+    except (binascii.Error, ValueError, AttributeError):
+        return data_url
+
 @app.route('/api/bilge-report', methods=['POST'])
 @login_required
 @role_required(['chief_engineer', 'captain'])
@@ -15033,33 +15656,29 @@ def api_create_bilge_report():
         data = request.get_json()
         report_id = generate_id('BLG')
         
-        conn = get_db_connection()
-        try:
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO bilge_reports
-                (report_id, vessel_name, imo_number, report_date, report_time, bilge_water_level,
-                 water_temperature, oil_content_ppm, disposal_method, location, officer_name, officer_rank,
-                 officer_id, signature_data, notes, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                report_id, data.get('vessel_name'), data.get('imo_number'), data.get('report_date'),
-                data.get('report_time'), data.get('bilge_water_level'), data.get('water_temperature'),
-                data.get('oil_content_ppm'), data.get('disposal_method'), data.get('location'),
-                f"{current_user.first_name} {current_user.last_name}", current_user.role, current_user.id,
-                data.get('signature_data'), data.get('notes'), datetime.now(), datetime.now()
-            ))
-            
-            conn.commit()
-            log_activity('bilge_report_created', f'Created and submitted bilge report {report_id}')
-            
-            return jsonify(
-                {'success': True, 'report_id': report_id, 'message': 'Bilge report submitted successfully'}
-            ), 201
-
-        finally:
-            conn.close()
+        conn = get_request_db()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            INSERT INTO bilge_reports
+            (report_id, vessel_name, imo_number, report_date, report_time, bilge_water_level,
+             water_temperature, oil_content_ppm, disposal_method, location, officer_name, officer_rank,
+             officer_id, signature_data, notes, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            report_id, data.get('vessel_name'), data.get('imo_number'), data.get('report_date'),
+            data.get('report_time'), data.get('bilge_water_level'), data.get('water_temperature'),
+            data.get('oil_content_ppm'), data.get('disposal_method'), data.get('location'),
+            f"{current_user.first_name} {current_user.last_name}", current_user.role, current_user.id,
+            signature_blob(data.get('signature_data')), data.get('notes'), datetime.now(), datetime.now()
+        ))
+        
+        conn.commit()
+        log_activity('bilge_report_created', f'Created and submitted bilge report {report_id}')
+        
+        return jsonify(
+            {'success': True, 'report_id': report_id, 'message': 'Bilge report submitted successfully'}
+        ), 201
 
     except Exception as e:
         app.logger.error(f"Error creating bilge report: {e}")
@@ -15106,34 +15725,30 @@ def api_create_fuel_report():
         data = request.get_json()
         report_id = generate_id('FUL')
         
-        conn = get_db_connection()
-        try:
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO fuel_reports
-                (report_id, vessel_name, imo_number, report_date, fuel_type, quantity_received,
-                 fuel_density, fuel_temperature, truck_number, supplier_name, total_fuel_onboard,
-                 location, officer_name, officer_rank, officer_id, signature_data, notes, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                report_id, data.get('vessel_name'), data.get('imo_number'), data.get('report_date'),
-                data.get('fuel_type'), data.get('quantity_received'), data.get('fuel_density'),
-                data.get('fuel_temperature'), data.get('truck_number'), data.get('supplier_name'),
-                data.get('total_fuel_onboard'), data.get('location'),
-                f"{current_user.first_name} {current_user.last_name}", current_user.role, current_user.id,
-                data.get('signature_data'), data.get('notes'), datetime.now(), datetime.now()
-            ))
-            
-            conn.commit()
-            log_activity('fuel_report_created', f'Created and submitted fuel report {report_id}')
-            
-            return jsonify(
-                {'success': True, 'report_id': report_id, 'message': 'Fuel report submitted successfully'}
-            ), 201
-
-        finally:
-            conn.close()
+        conn = get_request_db()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            INSERT INTO fuel_reports
+            (report_id, vessel_name, imo_number, report_date, fuel_type, quantity_received,
+             fuel_density, fuel_temperature, truck_number, supplier_name, total_fuel_onboard,
+             location, officer_name, officer_rank, officer_id, signature_data, notes, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            report_id, data.get('vessel_name'), data.get('imo_number'), data.get('report_date'),
+            data.get('fuel_type'), data.get('quantity_received'), data.get('fuel_density'),
+            data.get('fuel_temperature'), data.get('truck_number'), data.get('supplier_name'),
+            data.get('total_fuel_onboard'), data.get('location'),
+            f"{current_user.first_name} {current_user.last_name}", current_user.role, current_user.id,
+            signature_blob(data.get('signature_data')), data.get('notes'), datetime.now(), datetime.now()
+        ))
+        
+        conn.commit()
+        log_activity('fuel_report_created', f'Created and submitted fuel report {report_id}')
+        
+        return jsonify(
+            {'success': True, 'report_id': report_id, 'message': 'Fuel report submitted successfully'}
+        ), 201
 
     except Exception as e:
         app.logger.error(f"Error creating fuel report: {e}")
@@ -15194,7 +15809,7 @@ def api_create_sewage_report():
                 data.get('report_time'), data.get('sewage_tank_level'), data.get('treatment_method'),
                 data.get('disposal_method'), data.get('location'), data.get('environmental_notes'),
                 f"{current_user.first_name} {current_user.last_name}", current_user.role, current_user.id,
-                data.get('signature_data'), data.get('notes'), datetime.now(), datetime.now()
+                signature_blob(data.get('signature_data')), data.get('notes'), datetime.now(), datetime.now()
             ))
             
             conn.commit()
@@ -15235,7 +15850,7 @@ def api_create_logbook_entry():
               data.get('speed'), data.get('engine_hours'), data.get('fuel_consumption'),
               data.get('events'), data.get('remarks'),
               current_user.first_name + ' ' + current_user.last_name, current_user.role, current_user.id,
-              data.get('signature_data'), datetime.now(), datetime.now()))
+              signature_blob(data.get('signature_data')), datetime.now(), datetime.now()))
         
         conn.commit()
         conn.close()
@@ -15270,7 +15885,7 @@ def api_create_emission_report():
               data.get('co2_emissions'), data.get('energy_efficiency_indicator'),
               data.get('compliance_status'), data.get('location'),
               current_user.first_name + ' ' + current_user.last_name, current_user.role, current_user.id,
-              data.get('signature_data'), data.get('notes'), datetime.now(), datetime.now()))
+              signature_blob(data.get('signature_data')), data.get('notes'), datetime.now(), datetime.now()))
         
         conn.commit()
         conn.close()
@@ -15283,6 +15898,56 @@ def api_create_emission_report():
         return jsonify({'success': False, 'error': str(e)})
 
 # GET endpoints for retrieving reports
+
+# The report lists leave out signature_data: each signature is a PNG (stored
+# as a BLOB by signature_blob(), or a base64 data URL in older rows), tens of
+# kilobytes per row held in overflow pages, that the list pages never display. Reading it would dominate both the scan and the
+# response for every report listed.
+BILGE_REPORT_LIST_SQL = """
+    SELECT report_id, vessel_name, imo_number, report_date, report_time,
+           bilge_water_level, water_temperature, oil_content_ppm, disposal_method,
+           location, officer_name, officer_rank, officer_id, notes, created_at,
+           updated_at
+    FROM bilge_reports
+    ORDER BY report_date DESC, report_time DESC
+"""
+
+FUEL_REPORT_LIST_SQL = """
+    SELECT report_id, vessel_name, imo_number, report_date, fuel_type,
+           quantity_received, fuel_density, fuel_temperature, truck_number,
+           supplier_name, total_fuel_onboard, location, officer_name, officer_rank,
+           officer_id, notes, created_at, updated_at
+    FROM fuel_reports
+    ORDER BY report_date DESC
+"""
+
+SEWAGE_REPORT_LIST_SQL = """
+    SELECT report_id, vessel_name, imo_number, report_date, report_time,
+           sewage_tank_level, treatment_method, disposal_method, location,
+           environmental_notes, officer_name, officer_rank, officer_id, notes,
+           created_at, updated_at
+    FROM sewage_reports
+    ORDER BY report_date DESC, report_time DESC
+"""
+
+LOGBOOK_ENTRY_LIST_SQL = """
+    SELECT entry_id, vessel_name, imo_number, entry_date, watch_period,
+           weather_conditions, sea_state, wind_speed, wind_direction, course, speed,
+           engine_hours, fuel_consumption, events, remarks, officer_name,
+           officer_rank, officer_id, created_at, updated_at
+    FROM logbook_entries
+    ORDER BY entry_date DESC
+"""
+
+EMISSION_REPORT_LIST_SQL = """
+    SELECT report_id, vessel_name, imo_number, report_date, fuel_type,
+           fuel_consumption, voyage_distance, co2_emissions,
+           energy_efficiency_indicator, compliance_status, location, officer_name,
+           officer_rank, officer_id, notes, created_at, updated_at
+    FROM emission_reports
+    ORDER BY report_date DESC
+"""
+
 @app.route('/api/bilge-reports', methods=['GET'])
 @login_required
 @role_required(['chief_engineer', 'captain', 'harbour_master'])
@@ -15291,7 +15956,7 @@ def api_get_bilge_reports():
     try:
         conn = get_db_connection()
         c = conn.cursor()
-        c.execute("SELECT * FROM bilge_reports ORDER BY report_date DESC, report_time DESC")
+        c.execute(BILGE_REPORT_LIST_SQL)
         reports = [dict(row) for row in c.fetchall()]
         conn.close()
         return jsonify({'success': True, 'reports': reports})
@@ -15306,7 +15971,7 @@ def api_get_fuel_reports():
     try:
         conn = get_db_connection()
         c = conn.cursor()
-        c.execute("SELECT * FROM fuel_reports ORDER BY report_date DESC")
+        c.execute(FUEL_REPORT_LIST_SQL)
         reports = [dict(row) for row in c.fetchall()]
         conn.close()
         return jsonify({'success': True, 'reports': reports})
@@ -15321,7 +15986,7 @@ def api_get_sewage_reports():
     try:
         conn = get_db_connection()
         c = conn.cursor()
-        c.execute("SELECT * FROM sewage_reports ORDER BY report_date DESC, report_time DESC")
+        c.execute(SEWAGE_REPORT_LIST_SQL)
         reports = [dict(row) for row in c.fetchall()]
         conn.close()
         return jsonify({'success': True, 'reports': reports})
@@ -15336,7 +16001,7 @@ def api_get_logbook_entries():
     try:
         conn = get_db_connection()
         c = conn.cursor()
-        c.execute("SELECT * FROM logbook_entries ORDER BY entry_date DESC")
+        c.execute(LOGBOOK_ENTRY_LIST_SQL)
         entries = [dict(row) for row in c.fetchall()]
         conn.close()
         return jsonify({'success': True, 'entries': entries})
@@ -15351,7 +16016,7 @@ def api_get_emission_reports():
     try:
         conn = get_db_connection()
         c = conn.cursor()
-        c.execute("SELECT * FROM emission_reports ORDER BY report_date DESC")
+        c.execute(EMISSION_REPORT_LIST_SQL)
         reports = [dict(row) for row in c.fetchall()]
         conn.close()
         return jsonify({'success': True, 'reports': reports})
@@ -15991,7 +16656,10 @@ def api_get_expiry_alerts():
         try:
             c = conn.cursor()
             
-            # Calculate crew members with expiring certificates
+            # Calculate crew members with expiring certificates. The date
+            # bounds are a slightly wider, index-friendly form of the exact
+            # days_remaining range, which is still applied as well.
+            window = f'+{days_threshold + 2} days'
             c.execute("""
                 SELECT 
                     cm.crew_id,
@@ -16006,6 +16674,7 @@ def api_get_expiry_alerts():
                 FROM crew_members cm
                 LEFT JOIN vessels v ON cm.vessel_id = v.vessel_id
                 WHERE cm.stcw_expiry IS NOT NULL AND cm.status = 'active'
+                    AND cm.stcw_expiry >= date('now', '-1 day') AND cm.stcw_expiry <= date('now', ?)
                     AND CAST((julianday(cm.stcw_expiry) - julianday('now')) AS INTEGER) <= ?
                     AND CAST((julianday(cm.stcw_expiry) - julianday('now')) AS INTEGER) >= 0
                 
@@ -16024,6 +16693,7 @@ def api_get_expiry_alerts():
                 FROM crew_members cm
                 LEFT JOIN vessels v ON cm.vessel_id = v.vessel_id
                 WHERE cm.gmdss_expiry IS NOT NULL AND cm.status = 'active'
+                    AND cm.gmdss_expiry >= date('now', '-1 day') AND cm.gmdss_expiry <= date('now', ?)
                     AND CAST((julianday(cm.gmdss_expiry) - julianday('now')) AS INTEGER) <= ?
                     AND CAST((julianday(cm.gmdss_expiry) - julianday('now')) AS INTEGER) >= 0
                 
@@ -16042,11 +16712,12 @@ def api_get_expiry_alerts():
                 FROM crew_members cm
                 LEFT JOIN vessels v ON cm.vessel_id = v.vessel_id
                 WHERE cm.medical_expiry IS NOT NULL AND cm.status = 'active'
+                    AND cm.medical_expiry >= date('now', '-1 day') AND cm.medical_expiry <= date('now', ?)
                     AND CAST((julianday(cm.medical_expiry) - julianday('now')) AS INTEGER) <= ?
                     AND CAST((julianday(cm.medical_expiry) - julianday('now')) AS INTEGER) >= 0
                 
                 ORDER BY days_remaining ASC
-            """, (days_threshold, days_threshold, days_threshold))
+            """, (window, days_threshold) * 3)
             
             alerts = []
             for row in c.fetchall():
@@ -16097,6 +16768,7 @@ def api_check_certificate_renewals():
                 FROM crew_members cm
                 WHERE cm.stcw_expiry IS NOT NULL 
                     AND cm.status = 'active'
+                    AND cm.stcw_expiry >= date('now', '+29 days') AND cm.stcw_expiry <= date('now', '+92 days')
                     AND (
                         CAST((julianday(cm.stcw_expiry) - julianday('now')) AS INTEGER) = 30
                         OR CAST((julianday(cm.stcw_expiry) - julianday('now')) AS INTEGER) = 60
@@ -16698,11 +17370,13 @@ def add_caching_headers(response):
     # Cache static files (CSS, JS, images) for 1 month
     if request.path.startswith('/static/'):
         response.headers['Cache-Control'] = 'public, max-age=2592000'  # 30 days
-    # Don't cache HTML templates or API responses
+    # Don't cache HTML templates or API responses, unless the endpoint chose
+    # its own policy (e.g. ETag-validated static payloads)
     elif request.path.startswith('/api/'):
-        response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-        response.headers['Pragma'] = 'no-cache'
-        response.headers['Expires'] = '0'
+        if 'Cache-Control' not in response.headers:
+            response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+            response.headers['Pragma'] = 'no-cache'
+            response.headers['Expires'] = '0'
     else:
         # Cache HTML pages for 1 minute (allows back button without reload)
         response.headers['Cache-Control'] = 'public, max-age=60'